@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Adaptive Probing - per-host probe interval and packet count from recent results
+Down hosts are probed with exponential backoff, degraded hosts more often and
+with more packets, healthy hosts at their configured settings
+"""
+
+from typing import Optional
+
+from host_stats import HostStats
+from probe_result import ProbeResult
+
+
+NORMAL = "normal"
+DEGRADED = "degraded"
+DOWN = "down"
+
+# Jitter below this many ms never counts as degradation (LAN noise)
+JITTER_FLOOR_MS = 1.0
+
+# Backoff exponent limit: far past any max_interval, and keeps the power finite
+# however long a host stays down
+MAX_BACKOFF_EXPONENT = 64
+
+
+class HostAdaptation:
+    """Current probing settings of one host"""
+
+    __slots__ = ('base_interval', 'base_count', 'interval', 'count', 'state', 'failures', 'loss')
+
+    def __init__(self, interval: float, count: int):
+        self.base_interval = interval
+        self.base_count = count
+        self.interval = interval
+        self.count = count
+        self.state = NORMAL
+        self.failures = 0   # consecutive failed probes
+        self.loss = 0.0     # exponentially weighted packet loss fraction
+
+
+class AdaptiveController:
+    """Decides each host's probe interval and ping count from its results
+
+    - down (down_after or more consecutive failures): one packet per probe,
+      interval multiplied by backoff_factor per further failure, up to
+      max_interval
+    - degraded (smoothed loss at least degraded_loss, or jitter at least
+      degraded_jitter times the average RTT): interval divided by
+      intensify_factor (not below min_interval) and twice the packets (up to
+      max_count)
+    - normal: the configured interval and ping count
+    """
+
+    def __init__(self, min_interval: float = 5, max_interval: float = 600, max_count: int = 10,
+                 backoff_factor: float = 2.0, down_after: int = 2, degraded_loss: float = 0.02,
+                 degraded_jitter: float = 0.5, intensify_factor: float = 4.0, alpha: float = 0.25):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_count = max_count
+        self.backoff_factor = backoff_factor
+        self.down_after = max(1, int(down_after))
+        self.degraded_loss = degraded_loss
+        self.degraded_jitter = degraded_jitter
+        self.intensify_factor = intensify_factor
+        self.alpha = alpha
+        self.hosts = {}
+
+    def add(self, ip_address: str, interval: float, count: int):
+        """Start adapting a host with its configured interval and ping count"""
+        self.hosts[ip_address] = HostAdaptation(float(interval), int(count))
+
+    def remove(self, ip_address: str):
+        """Stop adapting a host"""
+        self.hosts.pop(ip_address, None)
+
+    def reconfigure(self, ip_address: str, interval: float, count: int) -> Optional[HostAdaptation]:
+        """Change a host's configured interval and ping count, keeping its state
+
+        Hosts in the normal state switch to the new settings at once; degraded
+        and down hosts derive theirs from them with their next result.
+        """
+        host = self.hosts.get(ip_address)
+        if host is None:
+            return None
+        host.base_interval = float(interval)
+        host.base_count = int(count)
+        if host.state == NORMAL:
+            host.interval = host.base_interval
+            host.count = host.base_count
+        return host
+
+    def count(self, ip_address: str) -> Optional[int]:
+        """Return the ping count to use for a host's next probe"""
+        host = self.hosts.get(ip_address)
+        return host.count if host else None
+
+    def get(self, ip_address: str) -> Optional[HostAdaptation]:
+        """Return a host's current settings"""
+        return self.hosts.get(ip_address)
+
+    def update(self, result: ProbeResult, stats: Optional[HostStats] = None) -> Optional[HostAdaptation]:
+        """Take a probe result into account; return the host's settings if they changed"""
+        host = self.hosts.get(result.ip)
+        if host is None:
+            return None
+
+        host.loss += self.alpha * (result.packet_loss / 100 - host.loss)
+        host.failures = 0 if result.success else host.failures + 1
+
+        if host.failures >= self.down_after:
+            state = DOWN
+            backoff = self.backoff_factor ** min(host.failures - self.down_after + 1, MAX_BACKOFF_EXPONENT)
+            interval = min(max(self.max_interval, host.base_interval), host.base_interval * backoff)
+            count = 1
+        elif host.loss >= self.degraded_loss or self._jittery(stats):
+            state = DEGRADED
+            interval = max(min(self.min_interval, host.base_interval),
+                           host.base_interval / self.intensify_factor)
+            count = max(host.base_count, min(self.max_count, host.base_count * 2))
+        else:
+            state = NORMAL
+            interval = host.base_interval
+            count = host.base_count
+
+        if state == host.state and interval == host.interval and count == host.count:
+            return None
+        host.state = state
+        host.interval = interval
+        host.count = count
+        return host
+
+    def _jittery(self, stats: Optional[HostStats]) -> bool:
+        """Return True if a host's jitter is high relative to its latency"""
+        if stats is None or stats.ewma is None:
+            return False
+        return stats.jitter >= JITTER_FLOOR_MS and stats.jitter >= self.degraded_jitter * stats.ewma
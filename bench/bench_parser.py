@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Ping parser micro-benchmark - checks and times ping_parser against the sample corpus
+Run from the repository root: python bench/bench_parser.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_parser import parse_ping_output  # noqa: E402
+
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ping_samples")
+
+# sample file -> (windows format, average RTT, packet loss %, per-reply RTT count)
+EXPECTED = {
+    "linux_iputils.txt": (False, 12.345, 0.0, 2),
+    "linux_iputils_loss.txt": (False, 3.013, 25.0, 3),
+    "linux_iputils_unreachable.txt": (False, None, 100.0, 0),
+    "busybox.txt": (False, 0.480, 0.0, 2),
+    "macos.txt": (False, 10.022, 0.0, 2),
+    "macos_loss.txt": (False, 4.102, 50.0, 1),
+    "windows.txt": (True, 13.0, 0.0, 2),
+    "windows_loss.txt": (True, 0.0, 50.0, 1),
+    "windows_timeout.txt": (True, None, 100.0, 0),
+}
+
+
+def load_samples():
+    """Read every corpus file, keeping Windows line endings intact"""
+    samples = {}
+    for name in sorted(EXPECTED):
+        with open(os.path.join(SAMPLES_DIR, name), 'r', newline='') as f:
+            samples[name] = f.read()
+    return samples
+
+
+def check(samples) -> bool:
+    """Verify the parser against the expected values for each sample"""
+    ok = True
+    for name, output in samples.items():
+        windows, average, loss, replies = EXPECTED[name]
+        stats = parse_ping_output(output, windows=windows)
+        problems = []
+        if stats['rtt_avg'] != average:
+            problems.append(f"avg {stats['rtt_avg']} != {average}")
+        if stats['packet_loss'] != loss:
+            problems.append(f"loss {stats['packet_loss']} != {loss}")
+        if len(stats['rtts']) != replies:
+            problems.append(f"{len(stats['rtts'])} replies != {replies}")
+        print(f"  {'FAIL' if problems else 'ok  '} {name}" + (f": {', '.join(problems)}" if problems else ""))
+        ok = ok and not problems
+    return ok
+
+
+def benchmark(samples, iterations: int):
+    """Time repeated parsing of each sample"""
+    total_parses = 0
+    total_time = 0.0
+    for name, output in samples.items():
+        windows = EXPECTED[name][0]
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parse_ping_output(output, windows=windows)
+        elapsed = time.perf_counter() - start
+        total_parses += iterations
+        total_time += elapsed
+        print(f"  {name:<32} {iterations / elapsed:>12,.0f} parses/s  {elapsed / iterations * 1e6:>8.2f} us/parse")
+    print(f"  {'overall':<32} {total_parses / total_time:>12,.0f} parses/s")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Ping output parser micro-benchmark')
+    parser.add_argument('--iterations', '-n', type=int, default=20000, help='Parses per sample')
+    args = parser.parse_args()
+
+    samples = load_samples()
+    print("Checking sample corpus:")
+    if not check(samples):
+        sys.exit(1)
+    print(f"Parsing throughput ({args.iterations} iterations per sample):")
+    benchmark(samples, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
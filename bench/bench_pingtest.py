@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+PingTest benchmark - sweep time, CPU per probe, memory growth and log throughput on a simulated network
+Run from the repository root: python bench/bench_pingtest.py [--hosts 10 100 1000 10000] [--output FILE]
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_prober import FakeProber, FakeReactorProber, make_profiles  # noqa: E402
+from probe_result import STATUS_OK, ProbeResult  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# fake: blocking FakeProber on the thread pool
+# fake-reactor: non-blocking FakeReactorProber on the submit path
+# fake-ping: subprocess backend running bench/fake_ping.py (one process per probe)
+BACKENDS = ("fake", "fake-reactor", "fake-ping")
+FAKE_PING = os.path.join(BENCH_DIR, "fake_ping.py")
+
+
+def host_list(count: int):
+    """Return count consecutive addresses starting at 10.0.0.1"""
+    first = int(ipaddress.ip_address("10.0.0.1"))
+    return [str(ipaddress.ip_address(first + i)) for i in range(count)]
+
+
+def rss_kb():
+    """Current resident set size in KB (peak size where the current one is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
+
+
+def child_cpu_seconds() -> float:
+    """CPU time used by finished child processes (the fake ping commands)"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_scenario(options: dict) -> dict:
+    """Benchmark one backend and host count (runs in its own process)"""
+    from pingtest import PingTest
+
+    backend, hosts = options['backend'], options['hosts']
+    ips = host_list(hosts)
+    profiles = make_profiles(ips, rtt=options['rtt'], loss=options['loss'], down_fraction=options['down'])
+    workdir = tempfile.mkdtemp(prefix="pingtest_bench_")
+    config_path = os.path.join(workdir, "config.json")
+    with open(config_path, 'w') as f:
+        json.dump({
+            "ip_addresses": {ip: "" for ip in ips},
+            "ping_interval": options['interval'],
+            "ping_count": options['count'],
+            "timeout": options['timeout'],
+            "log_file": os.path.join(workdir, "pingtest.log"),
+            "log_max_bytes": 0,
+            "log_rotate_interval": 0,
+            "log_compress": False,
+            "max_concurrent": options['max_concurrent'],
+            "backend": "subprocess",
+            "ping_path": FAKE_PING,
+            "stats_summary": False
+        }, f)
+
+    # The console log handler writes to stdout; keep it but discard the text
+    sys.stdout = open(os.devnull, 'w')
+    pingtest = PingTest(config_path)
+    if backend == "fake":
+        pingtest.prober = FakeProber(options['count'], options['timeout'], profiles=profiles)
+    elif backend == "fake-reactor":
+        pingtest.prober = FakeReactorProber(options['count'], options['timeout'], profiles=profiles)
+    else:
+        os.environ['FAKE_PING_RTT'] = str(options['rtt'])
+        os.environ['FAKE_PING_LOSS'] = str(options['loss'])
+        os.environ['FAKE_PING_DOWN'] = ",".join(ip for ip, profile in profiles.items() if profile.down)
+        os.environ['FAKE_PING_SLEEP'] = "1"
+    pingtest.engine = pingtest.create_engine()
+
+    # Sweeps: wall time, CPU (including spawned processes) and memory
+    rss_start = rss_kb()
+    cpu_start = time.process_time() + child_cpu_seconds()
+    walls = []
+    for _ in range(options['sweeps']):
+        start = time.perf_counter()
+        pingtest.run_sweep(ips)
+        walls.append(time.perf_counter() - start)
+    cpu = time.process_time() + child_cpu_seconds() - cpu_start
+    rss_end = rss_kb()
+    probes = hosts * options['sweeps']
+
+    # Continuous mode: how many of the scheduled probes run_ping_test completes
+    continuous = None
+    if options['runtime'] > 0:
+        probes_before = sum(stats.probes for stats in pingtest.stats.hosts.values())
+        pingtest.config['total_runtime'] = options['runtime']
+        pingtest.run_ping_test()
+        completed = sum(stats.probes for stats in pingtest.stats.hosts.values()) - probes_before
+        expected = hosts * options['runtime'] / options['interval']
+        continuous = {
+            'runtime_s': options['runtime'],
+            'interval_s': options['interval'],
+            'probes_completed': completed,
+            'probes_scheduled': int(expected),
+            'completion_ratio': completed / expected if expected else None
+        }
+    else:
+        pingtest.shutdown()
+
+    # Log throughput: log_ping_result calls until every line is on disk
+    log_results = options['log_results']
+    start = time.perf_counter()
+    for i in range(log_results):
+        pingtest.log_ping_result(ProbeResult(ips[i % hosts], status=STATUS_OK, response_time=1.23, packet_loss=0.0))
+    enqueued = time.perf_counter() - start
+    pingtest.log_pipeline.stop()
+    written = time.perf_counter() - start
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'backend': backend,
+        'hosts': hosts,
+        'sweeps': options['sweeps'],
+        'sweep_wall_s': [round(wall, 6) for wall in walls],
+        'sweep_wall_median_s': round(sorted(walls)[len(walls) // 2], 6),
+        'probes_per_s': round(probes / sum(walls), 1),
+        'cpu_per_probe_us': round(cpu / probes * 1e6, 2),
+        'rss_start_kb': rss_start,
+        'rss_growth_kb': rss_end - rss_start if rss_start is not None else None,
+        'continuous': continuous,
+        'log_results': log_results,
+        'log_enqueue_per_s': round(log_results / enqueued, 1),
+        'log_written_per_s': round(log_results / written, 1)
+    }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='PingTest benchmark on a simulated network')
+    parser.add_argument('--hosts', type=int, nargs='+', default=[10, 100, 1000, 10000], help='Host counts to benchmark')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS), help='Backends to benchmark')
+    parser.add_argument('--sweeps', type=int, default=3, help='Sweeps per scenario')
+    parser.add_argument('--count', type=int, default=1, help='Pings per probe')
+    parser.add_argument('--rtt', type=float, default=1.0, help='Mean simulated round trip time in ms')
+    parser.add_argument('--loss', type=float, default=0.01, help='Simulated packet loss fraction')
+    parser.add_argument('--down', type=float, default=0.01, help='Fraction of hosts that never reply')
+    parser.add_argument('--timeout', type=float, default=0.2, help='Probe timeout in seconds')
+    parser.add_argument('--max-concurrent', type=int, default=64, help='max_concurrent setting')
+    parser.add_argument('--runtime', type=int, default=0, help='Also run run_ping_test for this many seconds')
+    parser.add_argument('--interval', type=float, default=1.0, help='ping_interval for --runtime')
+    parser.add_argument('--log-results', type=int, default=20000, help='Results logged for the log throughput test')
+    parser.add_argument('--max-spawn-hosts', type=int, default=100,
+                        help='Largest host count for fake-ping (one process per probe)')
+    parser.add_argument('--output', '-o', help='Write the JSON results to this file instead of stdout')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        options = json.loads(args.child)
+        result = run_scenario(options)
+        with open(options['result_file'], 'w') as f:
+            json.dump(result, f)
+        return
+
+    # Every scenario runs in a fresh process so memory and logging start clean
+    results = []
+    for backend in args.backends:
+        for hosts in args.hosts:
+            if backend == "fake-ping" and hosts > args.max_spawn_hosts:
+                continue
+            print(f"Benchmarking {backend} with {hosts} hosts...", file=sys.stderr)
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+                result_file = f.name
+            options = {
+                'backend': backend, 'hosts': hosts, 'sweeps': args.sweeps, 'count': args.count,
+                'rtt': args.rtt, 'loss': args.loss, 'down': args.down, 'timeout': args.timeout,
+                'max_concurrent': args.max_concurrent, 'runtime': args.runtime, 'interval': args.interval,
+                'log_results': args.log_results, 'result_file': result_file
+            }
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(options)])
+            if process.returncode == 0:
+                with open(result_file) as f:
+                    results.append(json.load(f))
+            else:
+                results.append({'backend': backend, 'hosts': hosts, 'error': f"exit code {process.returncode}"})
+            os.remove(result_file)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'child')},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
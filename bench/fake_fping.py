@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Fake fping - stands in for fping when exercising the fping backend without a network
+Prints fping -C -q style summaries for targets given as arguments or on stdin
+
+Behaviour is controlled with environment variables:
+  FAKE_PING_RTT    mean round trip time in ms (default: 1.0)
+  FAKE_PING_LOSS   fraction of packets lost, 0.0 - 1.0 (default: 0.0)
+  FAKE_PING_DOWN   comma-separated hosts that never reply
+  FAKE_PING_SLEEP  set to 1 to actually wait for the emulated replies/timeouts
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Fake fping for testing')
+    parser.add_argument('-C', dest='count', type=int, default=1)
+    parser.add_argument('-q', action='store_true')
+    parser.add_argument('-t', dest='timeout_ms', type=int, default=500)
+    parser.add_argument('-r', dest='retries', type=int, default=3)
+    parser.add_argument('-p', dest='period_ms', type=int, default=1000)
+    parser.add_argument('-i', dest='gap_ms', type=int, default=10)
+    parser.add_argument('targets', nargs='*')
+    args = parser.parse_args()
+
+    targets = args.targets or [line.strip() for line in sys.stdin if line.strip()]
+    rtt = float(os.environ.get('FAKE_PING_RTT', '1.0'))
+    loss = float(os.environ.get('FAKE_PING_LOSS', '0.0'))
+    down = set(filter(None, os.environ.get('FAKE_PING_DOWN', '').split(',')))
+    sleep = os.environ.get('FAKE_PING_SLEEP') == '1'
+
+    width = max((len(target) for target in targets), default=0)
+    any_lost = False
+    any_unknown = False
+    lines = []
+    for target in targets:
+        try:
+            ipaddress.ip_address(target)
+        except ValueError:
+            any_unknown = True
+            lines.append(f"{target}: Name or service not known")
+            continue
+
+        rng = random.Random(target)
+        samples = []
+        for _ in range(args.count):
+            if target in down or rng.random() < loss:
+                samples.append('-')
+                any_lost = True
+            else:
+                samples.append(f"{max(0.01, rng.gauss(rtt, rtt / 10)):.2f}")
+        lines.append(f"{target.ljust(width)} : {' '.join(samples)}")
+
+    if sleep:
+        wait_ms = (args.count - 1) * args.period_ms + (args.timeout_ms if any_lost else rtt)
+        time.sleep(wait_ms / 1000)
+
+    for line in lines:
+        sys.stderr.write(line + '\n')
+
+    if any_unknown:
+        sys.exit(2)
+    sys.exit(1 if any_lost else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Fake ping - stands in for the system ping command when exercising the subprocess backend
+Prints Linux iputils style output; use it via the ping_path setting (not on Windows)
+
+Behaviour is controlled with the same environment variables as fake_fping.py:
+  FAKE_PING_RTT    mean round trip time in ms (default: 1.0)
+  FAKE_PING_LOSS   fraction of packets lost, 0.0 - 1.0 (default: 0.0)
+  FAKE_PING_DOWN   comma-separated hosts that never reply
+  FAKE_PING_SLEEP  set to 1 to actually wait for the emulated replies/timeouts
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Fake ping for testing')
+    parser.add_argument('-c', dest='count', type=int, default=4)
+    parser.add_argument('-W', dest='timeout', type=float, default=5)
+    parser.add_argument('host')
+    args = parser.parse_args()
+
+    rtt = float(os.environ.get('FAKE_PING_RTT', '1.0'))
+    loss = float(os.environ.get('FAKE_PING_LOSS', '0.0'))
+    down = set(filter(None, os.environ.get('FAKE_PING_DOWN', '').split(',')))
+    sleep = os.environ.get('FAKE_PING_SLEEP') == '1'
+
+    rng = random.Random()
+    lines = [f"PING {args.host} ({args.host}) 56(84) bytes of data."]
+    rtts = []
+    for sequence in range(1, args.count + 1):
+        if args.host in down or rng.random() < loss:
+            continue
+        sample = max(0.01, rng.gauss(rtt, rtt / 10))
+        rtts.append(sample)
+        lines.append(f"64 bytes from {args.host}: icmp_seq={sequence} ttl=64 time={sample:.3f} ms")
+
+    received = len(rtts)
+    lost = (args.count - received) / args.count * 100
+    lines.append("")
+    lines.append(f"--- {args.host} ping statistics ---")
+    lines.append(f"{args.count} packets transmitted, {received} received, {lost:g}% packet loss, time 0ms")
+    if rtts:
+        average = sum(rtts) / received
+        mdev = (sum((sample - average) ** 2 for sample in rtts) / received) ** 0.5
+        lines.append(f"rtt min/avg/max/mdev = {min(rtts):.3f}/{average:.3f}/{max(rtts):.3f}/{mdev:.3f} ms")
+
+    if sleep:
+        time.sleep(args.timeout if received < args.count else max(rtts) / 1000)
+
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.exit(0 if received else 1)
+
+
+if __name__ == "__main__":
+    main()
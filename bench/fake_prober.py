@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Fake prober - simulated network backend for benchmarking PingTest without real hosts
+Drop-in replacements for the ICMP probers with per-host latency, loss and timeouts
+"""
+
+import heapq
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from probe_result import ProbeResult
+
+
+class HostProfile:
+    """How a simulated host responds"""
+
+    __slots__ = ('rtt', 'jitter', 'loss', 'down')
+
+    def __init__(self, rtt: float = 1.0, jitter: float = 0.1, loss: float = 0.0, down: bool = False):
+        self.rtt = rtt        # mean round trip time in ms
+        self.jitter = jitter  # standard deviation of the round trip time in ms
+        self.loss = loss      # fraction of packets lost, 0.0 - 1.0
+        self.down = down      # never replies; every probe runs into the timeout
+
+
+class FakeProber:
+    """Blocking simulated prober with the IcmpProber interface
+
+    ping() sleeps for as long as the emulated probe would take (unless
+    sleep is False) and returns a result in the ping_host format.
+    """
+
+    name = "fake"
+
+    def __init__(self, count: int = 1, timeout: float = 1.0, interval: float = 0.0,
+                 default: Optional[HostProfile] = None, profiles: Optional[Dict[str, HostProfile]] = None,
+                 sleep: bool = True, seed: int = 0):
+        self.count = count
+        self.timeout = timeout
+        self.interval = interval
+        self.default = default or HostProfile()
+        self.profiles = profiles or {}
+        self.sleep = sleep
+        self._random = random.Random(seed)
+
+    def profile(self, ip_address: str) -> HostProfile:
+        """Return the profile of a host"""
+        return self.profiles.get(ip_address, self.default)
+
+    def simulate(self, ip_address: str, count: Optional[int] = None) -> Tuple[ProbeResult, float]:
+        """Return (result, seconds the probe would take) for one probe of count packets"""
+        count = count or self.count
+        profile = self.profile(ip_address)
+        rng = self._random
+        rtts = []
+        sequences = []
+        if not profile.down:
+            for sequence in range(count):
+                if rng.random() >= profile.loss:
+                    rtts.append(max(0.01, rng.gauss(profile.rtt, profile.jitter)))
+                    sequences.append(sequence)
+
+        received = len(rtts)
+        # Packets go out interval apart; the probe ends with the last reply,
+        # or at the timeout if any packet was lost
+        duration = (count - 1) * self.interval
+        duration += self.timeout if received < count else max(rtts) / 1000
+        result = ProbeResult.from_replies(ip_address, time.time_ns(), count, rtts, sequences)
+        return result, duration
+
+    def ping(self, ip_address: str, count: Optional[int] = None) -> ProbeResult:
+        """Ping a simulated host and return results in the ping_host format"""
+        result, duration = self.simulate(ip_address, count)
+        if self.sleep:
+            time.sleep(duration)
+        return result
+
+
+class FakeReactorProber(FakeProber):
+    """Non-blocking simulated prober with the MultiplexIcmpProber interface
+
+    submit() returns at once; a single timer thread delivers each result to
+    its callback when the emulated probe would have completed.
+    """
+
+    name = "fake-reactor"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._heap = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="fake-reactor", daemon=True)
+        self._thread.start()
+
+    def submit(self, ip_address: str, callback: Callable[[ProbeResult], None], count: Optional[int] = None):
+        """Start a simulated probe; callback receives the result when done"""
+        result, duration = self.simulate(ip_address, count)
+        due = time.monotonic() + (duration if self.sleep else 0.0)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Prober is closed")
+            self._sequence += 1
+            heapq.heappush(self._heap, (due, self._sequence, result, callback))
+            if self._heap[0][1] == self._sequence:
+                self._condition.notify()
+
+    def ping(self, ip_address: str, count: Optional[int] = None) -> ProbeResult:
+        """Ping a simulated host and return results in the ping_host format"""
+        done = threading.Event()
+        holder = []
+
+        def on_result(result):
+            holder.append(result)
+            done.set()
+
+        self.submit(ip_address, on_result, count)
+        done.wait()
+        return holder[0]
+
+    def close(self):
+        """Stop the timer thread; probes still pending are dropped"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        """Timer loop"""
+        heap = self._heap
+        while True:
+            with self._condition:
+                while not self._closed and (not heap or heap[0][0] > time.monotonic()):
+                    self._condition.wait(heap[0][0] - time.monotonic() if heap else None)
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due = []
+                while heap and heap[0][0] <= now:
+                    due.append(heapq.heappop(heap))
+            for _, _, result, callback in due:
+                try:
+                    callback(result)
+                except Exception:
+                    pass
+
+
+def make_profiles(ip_addresses: Iterable[str], rtt: float = 1.0, loss: float = 0.0,
+                  down_fraction: float = 0.0) -> Dict[str, HostProfile]:
+    """Profiles for a host list where every n-th host is down (n from down_fraction)"""
+    every = round(1 / down_fraction) if down_fraction > 0 else 0
+    profiles = {}
+    for index, ip in enumerate(ip_addresses):
+        down = bool(every) and index % every == every - 1
+        profiles[ip] = HostProfile(rtt=rtt, jitter=rtt / 10, loss=loss, down=down)
+    return profiles
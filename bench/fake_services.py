@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Fake services - local stand-ins for exercising the tcp, udp and http probe types
+Runs a TCP listener, a UDP echo server and an HTTP/1.1 keep-alive server on localhost
+and reports how many HTTP connections and requests they served when stopped
+"""
+
+import argparse
+import http.server
+import socket
+import socketserver
+import threading
+import time
+
+
+class UdpEchoHandler(socketserver.BaseRequestHandler):
+    """Sends every datagram back unchanged"""
+
+    def handle(self):
+        data, sock = self.request
+        sock.sendto(data, self.client_address)
+
+
+class HeadHandler(http.server.BaseHTTPRequestHandler):
+    """Answers HEAD and GET with an empty 200 response, keeping the connection open"""
+
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    requests = 0
+    status = 200
+
+    def setup(self):
+        super().setup()
+        HeadHandler.connections += 1
+
+    def do_HEAD(self):
+        HeadHandler.requests += 1
+        self.send_response(HeadHandler.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_HEAD
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeServices:
+    """The three stand-in services, each on its own thread"""
+
+    def __init__(self, address: str = "127.0.0.1", tcp_port: int = 0, udp_port: int = 0, http_port: int = 0):
+        self.tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.tcp.bind((address, tcp_port))
+        self.tcp.listen(128)
+        self.udp = socketserver.ThreadingUDPServer((address, udp_port), UdpEchoHandler)
+        http.server.ThreadingHTTPServer.allow_reuse_address = True
+        self.http = http.server.ThreadingHTTPServer((address, http_port), HeadHandler)
+        self.http.daemon_threads = True
+        self.ports = {
+            'tcp': self.tcp.getsockname()[1],
+            'udp': self.udp.server_address[1],
+            'http': self.http.server_address[1]
+        }
+        self._running = True
+
+    def start(self):
+        """Start serving"""
+        threading.Thread(target=self._accept, daemon=True).start()
+        threading.Thread(target=self.udp.serve_forever, daemon=True).start()
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Stop serving"""
+        self._running = False
+        self.tcp.close()
+        self.udp.shutdown()
+        self.http.shutdown()
+
+    def _accept(self):
+        """Accept TCP connections and close them straight away"""
+        while self._running:
+            try:
+                client, _ = self.tcp.accept()
+            except OSError:
+                return
+            client.close()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Local stand-in services for the tcp, udp and http probes')
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--tcp-port', type=int, default=9201)
+    parser.add_argument('--udp-port', type=int, default=9202)
+    parser.add_argument('--http-port', type=int, default=9203)
+    parser.add_argument('--status', type=int, default=200, help='HTTP status to answer with')
+    args = parser.parse_args()
+
+    HeadHandler.status = args.status
+    services = FakeServices(args.address, args.tcp_port, args.udp_port, args.http_port)
+    services.start()
+    print(f"TCP {args.address}:{services.ports['tcp']}, UDP echo {args.address}:{services.ports['udp']}, "
+          f"HTTP {args.address}:{services.ports['http']} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    services.stop()
+    print(f"HTTP: {HeadHandler.requests} requests on {HeadHandler.connections} connections")
+
+
+if __name__ == "__main__":
+    main()
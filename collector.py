@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Collector - ships results from PingTest agents at several sites to one collector
+Agents send batches of compact records over TCP and replay unacknowledged batches
+after reconnecting; the collector logs, stores and aggregates them (pingtest.py collect)
+"""
+
+import argparse
+import collections
+import json
+import logging
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from probe_result import STATUS_NAMES, ProbeResult
+from sharding import RECORD_FIELDS, to_record
+
+
+DEFAULT_PORT = 9103
+
+# Accepted JSON types of each record field; agents send to_record() plus the host's name
+_NUMBER = (int, float)
+_FIELD_TYPES = {
+    'ip': (str,), 'timestamp_ns': (int,), 'status': (int,), 'response_time': _NUMBER + (type(None),),
+    'packet_loss': _NUMBER, 'error': (str, type(None)), 'rtts': (list,), 'sequences': (list,),
+    'address': (str, type(None)), 'resolve_time': _NUMBER + (type(None),), 'name': (str,)
+}
+AGENT_RECORD_FIELDS = RECORD_FIELDS + ('name',)
+
+
+def encode(message: Dict) -> bytes:
+    """Encode a protocol message as one JSON line"""
+    return (json.dumps(message, separators=(',', ':')) + "\n").encode()
+
+
+def record_error(record) -> Optional[str]:
+    """Return why a record sent by an agent cannot be used, None if it is well-formed"""
+    if not isinstance(record, list) or len(record) != len(AGENT_RECORD_FIELDS):
+        return f"expected a list of {len(AGENT_RECORD_FIELDS)} fields"
+    for field, value in zip(AGENT_RECORD_FIELDS, record):
+        if isinstance(value, bool) or not isinstance(value, _FIELD_TYPES[field]):
+            return f"invalid {field} {value!r:.40}"
+    fields = dict(zip(AGENT_RECORD_FIELDS, record))
+    if fields['status'] not in STATUS_NAMES:
+        return f"invalid status {fields['status']!r}"
+    if not all(isinstance(rtt, _NUMBER) and not isinstance(rtt, bool) for rtt in fields['rtts']):
+        return "invalid rtts"
+    if not all(isinstance(sequence, int) and not isinstance(sequence, bool) for sequence in fields['sequences']):
+        return "invalid sequences"
+    return None
+
+
+def parse_address(text: str, default_port: int = DEFAULT_PORT) -> Tuple[str, int]:
+    """Split "host[:port]" (IPv6 as "[addr]:port") into host and port"""
+    if text.startswith('['):
+        host, _, rest = text[1:].partition(']')
+        return host, int(rest[1:]) if rest.startswith(':') else default_port
+    if text.count(':') == 1:
+        host, port = text.split(':')
+        return host, int(port)
+    return text, default_port
+
+
+class AgentShipper:
+    """Sends results to a collector in batches from a background thread
+
+    publish() only appends to the open batch, so probing never waits for
+    the network. A batch is sealed every batch_interval seconds or at
+    batch_size records and kept until the collector acknowledges it; after
+    a reconnect every unacknowledged batch is sent again. When more than
+    max_batches are waiting the oldest are dropped (and counted), so an
+    unreachable collector costs bounded memory.
+    """
+
+    def __init__(self, address: str, port: int = DEFAULT_PORT, name: Optional[str] = None,
+                 batch_size: int = 500, batch_interval: float = 1.0, max_batches: int = 1000,
+                 retry_interval: float = 2.0, send_timeout: float = 5.0):
+        self.address = address
+        self.port = port
+        self.name = name or socket.gethostname()
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_batches = max_batches
+        self.retry_interval = retry_interval
+        self.send_timeout = send_timeout
+        self.session = uuid.uuid4().hex  # lets the collector tell a restarted agent from a replay
+        self.connected = False
+        self.dropped = 0    # records dropped because the backlog was full
+        self.acked = 0      # records acknowledged by the collector
+        self._lock = threading.Lock()
+        self._open = []
+        self._sealed_at = time.monotonic()
+        self._sequence = 0
+        self._unacked = collections.OrderedDict()  # seq -> (record count, encoded batch)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start shipping"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="agent", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Send what is left (for up to timeout seconds while connected) and stop"""
+        self._stop_deadline = time.monotonic() + timeout
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def publish(self, result: ProbeResult, name: str = ""):
+        """Queue a result for the collector"""
+        record = to_record(result) + (name,)
+        with self._lock:
+            self._open.append(record)
+
+    @property
+    def backlog(self) -> int:
+        """Number of batches not yet acknowledged"""
+        return len(self._unacked)
+
+    def _seal(self, force: bool = False):
+        """Turn the open records into a numbered batch when it is full or old enough"""
+        now = time.monotonic()
+        with self._lock:
+            if not self._open or (not force and len(self._open) < self.batch_size
+                                  and now - self._sealed_at < self.batch_interval):
+                return
+            records, self._open = self._open, []
+            self._sealed_at = now
+        self._sequence += 1
+        self._unacked[self._sequence] = (len(records), encode({'seq': self._sequence, 'records': records}))
+        while len(self._unacked) > self.max_batches:
+            _, (count, _) = self._unacked.popitem(last=False)
+            self.dropped += count
+
+    def _run(self):
+        """Connect, send batches, read acknowledgements and reconnect after failures"""
+        sock = None
+        sent = 0        # highest sequence number sent on the current connection
+        buffer = b""
+        while True:
+            stopping = not self._running
+            self._seal(force=stopping)
+            if stopping and (not self._unacked or sock is None or time.monotonic() >= self._stop_deadline):
+                break
+
+            if sock is None:
+                try:
+                    sock = socket.create_connection((self.address, self.port), timeout=self.send_timeout)
+                    sock.sendall(encode({'hello': self.name, 'session': self.session}))
+                except OSError:
+                    sock = None
+                    if stopping:
+                        break
+                    self._sleep(self.retry_interval)
+                    continue
+                self.connected = True
+                sent = 0
+                buffer = b""
+
+            try:
+                # Replay after a reconnect, then whatever was sealed since
+                sock.settimeout(self.send_timeout)
+                for seq, (_, data) in list(self._unacked.items()):
+                    if seq > sent:
+                        sock.sendall(data)
+                        sent = seq
+                sock.settimeout(0.1)
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                if not data:
+                    raise ConnectionResetError("collector closed the connection")
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    ack = json.loads(line).get('ack', 0)
+                    while self._unacked and next(iter(self._unacked)) <= ack:
+                        _, (count, _) = self._unacked.popitem(last=False)
+                        self.acked += count
+            except (OSError, ValueError):
+                sock.close()
+                sock = None
+                self.connected = False
+                if not stopping:
+                    self._sleep(self.retry_interval)
+        if sock is not None:
+            sock.close()
+        self.connected = False
+
+    def _sleep(self, seconds: float):
+        """Sleep, waking early when stop() is called"""
+        deadline = time.monotonic() + seconds
+        while self._running and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+
+class CollectorServer:
+    """Accepts agent connections and queues their batches for the collecting PingTest
+
+    Each batch is acknowledged once queued. A replayed batch that was
+    already received (same agent session, sequence number not higher than
+    the last one) is acknowledged again but not queued twice. When the
+    queue is full, reading from the agents pauses, and their own bounded
+    backlogs absorb the delay.
+
+    Agents are not authenticated, so the server listens on localhost
+    unless given another address, and every record is checked before it
+    is queued: malformed records are logged and dropped one at a time, and
+    a malformed message ends only that agent's connection.
+    """
+
+    def __init__(self, port: int = DEFAULT_PORT, address: str = "127.0.0.1", max_pending: int = 1000,
+                 logger: Optional[logging.Logger] = None):
+        self.port = port
+        self.address = address
+        self.batches = queue.Queue(maxsize=max_pending)
+        self.logger = logger or logging.getLogger(__name__)
+        self.agents = {}          # agent name -> number of open connections
+        self.rejected = 0         # records dropped as malformed
+        self._last_seq = {}       # (agent, session) -> last sequence number queued
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Start accepting agents"""
+        collector = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    collector._serve(self.rfile, self.wfile)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    collector.logger.warning(f"Closed agent connection from {self.client_address[0]}: {e!r:.80}")
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((self.address, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="collector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop accepting agents"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def receive(self, timeout: float) -> Optional[Tuple[str, List[list]]]:
+        """Return the next (agent, records) batch, or None if none arrived within timeout"""
+        try:
+            return self.batches.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _serve(self, rfile, wfile):
+        """Read one agent's batches until it disconnects"""
+        hello = json.loads(rfile.readline())
+        agent = str(hello['hello'])
+        key = (agent, str(hello.get('session')))
+        with self._lock:
+            self.agents[agent] = self.agents.get(agent, 0) + 1
+        try:
+            for line in rfile:
+                batch = json.loads(line)
+                seq, records = batch['seq'], batch['records']
+                if isinstance(seq, bool) or not isinstance(seq, int) or not isinstance(records, list):
+                    raise ValueError("malformed batch")
+                # An old and a new connection of the same session may overlap
+                with self._lock:
+                    fresh = seq > self._last_seq.get(key, 0)
+                    if fresh:
+                        self._last_seq[key] = seq
+                if fresh:
+                    valid = []
+                    for record in records:
+                        error = record_error(record)
+                        if error is None:
+                            valid.append(record)
+                            continue
+                        with self._lock:
+                            self.rejected += 1
+                        self.logger.warning(f"Dropped a malformed record from agent {agent}: {error}")
+                    if valid:
+                        self.batches.put((agent, valid))
+                wfile.write(encode({'ack': seq}))
+        finally:
+            with self._lock:
+                self.agents[agent] -= 1
+                if not self.agents[agent]:
+                    del self.agents[agent]
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function"""
+    parser = argparse.ArgumentParser(prog='pingtest.py collect',
+                                     description='Collect results from PingTest agents (pingtest.py --agent)')
+    parser.add_argument('--config', '-c', default='config.json',
+                        help='Configuration file for logging, result store and statistics settings')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--address', default='127.0.0.1',
+                        help='Address to listen on (default: 127.0.0.1; agents are not authenticated, '
+                             'so use 0.0.0.0 for all interfaces only on a trusted network)')
+    parser.add_argument('--runtime', '-r', type=int, help='Stop after this many seconds')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics for all agents on this port')
+    parser.add_argument('--metrics-address', default='0.0.0.0', help='Address for the metrics endpoint (default: all interfaces)')
+    args = parser.parse_args(argv)
+
+    from pingtest import PingTest
+    try:
+        pingtest = PingTest(args.config)
+        if args.runtime:
+            pingtest.config['total_runtime'] = args.runtime
+        if args.metrics_port is not None:
+            pingtest.start_metrics(args.metrics_port, args.metrics_address)
+        pingtest.run_collector(args.port, args.address)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
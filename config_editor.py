@@ -5,10 +5,155 @@ PingTest Config Editor - GUI application for modifying ping test configuration
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import collections
+import csv
+import itertools
 import json
 import os
 import sys
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from result_stream import DEFAULT_PORT, ResultSubscriber, sparkline
+from targets import is_valid_target, target_error
+
+
+# Entries listed in confirmation and warning dialogs before the rest are counted
+SUMMARY_ROWS = 20
+
+# Table rows inserted at a time; the next page is loaded when the table is scrolled near its end
+TABLE_PAGE_ROWS = 500
+
+
+class TargetList:
+    """Ordered IP addresses and their names, indexed by address
+
+    Lookups, adds, renames and moves by one position are O(1). Removing
+    compacts the order once per call, however many addresses are removed.
+    """
+    
+    def __init__(self, ip_addresses: Optional[Dict[str, str]] = None):
+        self.names = {}       # address -> name
+        self.order = []       # addresses in configuration order
+        self._positions = {}  # address -> index in order
+        for ip, name in (ip_addresses or {}).items():
+            self.add(ip, name)
+    
+    def __len__(self) -> int:
+        return len(self.order)
+    
+    def __contains__(self, ip: str) -> bool:
+        return ip in self.names
+    
+    def __iter__(self):
+        return iter(self.order)
+    
+    def add(self, ip: str, name: str = "") -> bool:
+        """Append an address; return False if it is already listed"""
+        if ip in self.names:
+            return False
+        self.names[ip] = name
+        self._positions[ip] = len(self.order)
+        self.order.append(ip)
+        return True
+    
+    def rename(self, ip: str, name: str):
+        """Change the name of a listed address"""
+        self.names[ip] = name
+    
+    def remove(self, ips: Iterable[str]) -> int:
+        """Remove addresses; return how many of them were listed"""
+        removed = {ip for ip in ips if ip in self.names}
+        if not removed:
+            return 0
+        for ip in removed:
+            del self.names[ip]
+        self.order = [ip for ip in self.order if ip not in removed]
+        self._positions = {ip: index for index, ip in enumerate(self.order)}
+        return len(removed)
+    
+    def clear(self):
+        """Remove all addresses"""
+        self.names = {}
+        self.order = []
+        self._positions = {}
+    
+    def position(self, ip: str) -> int:
+        """Return the index of a listed address"""
+        return self._positions[ip]
+    
+    def move(self, ip: str, offset: int) -> Optional[int]:
+        """Swap an address with the one offset places away; return its new index (None at either end)"""
+        index = self._positions[ip]
+        other = index + offset
+        if not 0 <= other < len(self.order):
+            return None
+        neighbour = self.order[other]
+        self.order[index], self.order[other] = neighbour, ip
+        self._positions[ip], self._positions[neighbour] = other, index
+        return other
+    
+    def search(self, text: str) -> List[str]:
+        """Return the addresses whose address or name contains text (ignoring case), in order"""
+        text = text.strip().lower()
+        if not text:
+            return list(self.order)
+        names = self.names
+        return [ip for ip in self.order if text in ip.lower() or text in names[ip].lower()]
+    
+    def to_dict(self) -> Dict[str, str]:
+        """Return the addresses and names as the ip_addresses configuration"""
+        return {ip: self.names[ip] for ip in self.order}
+
+
+def read_targets_file(filename: str) -> List[Tuple[str, str]]:
+    """Read (address, name) rows from a CSV file or a text file
+
+    CSV files hold the address in the first column and an optional name in
+    the second; a header row is skipped. Text files hold one address per
+    line, optionally followed by a space and a name. Blank lines and lines
+    starting with # are ignored in both.
+    """
+    rows = []
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+        if filename.lower().endswith('.csv'):
+            for line_number, fields in enumerate(csv.reader(f)):
+                if not fields or not fields[0].strip() or fields[0].lstrip().startswith('#'):
+                    continue
+                ip = fields[0].strip()
+                if line_number == 0 and not is_valid_target(ip):
+                    continue  # header row
+                rows.append((ip, fields[1].strip() if len(fields) > 1 else ""))
+        else:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.split(None, 1)
+                rows.append((parts[0], parts[1].strip() if len(parts) > 1 else ""))
+    return rows
+
+
+def write_targets_file(filename: str, rows: Iterable[Tuple[str, str]]):
+    """Write (address, name) rows as CSV (.csv files) or one address and name per line"""
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        if filename.lower().endswith('.csv'):
+            writer = csv.writer(f)
+            writer.writerow(["ip", "name"])
+            writer.writerows(rows)
+        else:
+            for ip, name in rows:
+                f.write(f"{ip} {name}".rstrip() + "\n")
+
+
+def summarize_lines(lines: List[str], total: Optional[int] = None, limit: int = SUMMARY_ROWS) -> str:
+    """Join the first limit lines and count the rest (of total, default len(lines)), for dialogs"""
+    if total is None:
+        total = len(lines)
+    text = "\n".join(lines[:limit])
+    if total > limit:
+        text += f"\n  ... and {total - limit} more"
+    return text
 
 
 class ConfigEditor:
@@ -21,6 +166,10 @@ class ConfigEditor:
         # Configuration file path
         self.config_file = "config.json"
         self.config_data = {}
+        self.targets = TargetList()
+        self._matches = []  # addresses matching the search, in list order
+        self._loaded = 0    # leading entries of _matches inserted into the table
+        self._search_after = None
         
         # Load configuration
         self.load_config()
@@ -84,25 +233,42 @@ class ConfigEditor:
         ip_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))  # Increased padding
         ip_frame.columnconfigure(0, weight=1)
         
-        # IP listbox with scrollbar
+        # Search box
+        search_frame = ttk.Frame(ip_frame)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 8))
+        search_frame.columnconfigure(1, weight=1)
+        ttk.Label(search_frame, text="Search:").grid(row=0, column=0, sticky=tk.W)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', lambda *args: self.schedule_search())
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(15, 15))
+        ttk.Button(search_frame, text="Clear", command=lambda: self.search_var.set("")).grid(row=0, column=2)
+        
+        # IP table with scrollbar
         ip_listbox_frame = ttk.Frame(ip_frame)
-        ip_listbox_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))  # Increased padding
+        ip_listbox_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))
         ip_listbox_frame.columnconfigure(0, weight=1)
         
-        # Create a frame for listbox and reorder buttons
+        # Create a frame for the table and reorder buttons
         listbox_controls_frame = ttk.Frame(ip_listbox_frame)
         listbox_controls_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         listbox_controls_frame.columnconfigure(0, weight=1)
         
-        self.ip_listbox = tk.Listbox(listbox_controls_frame, height=10)  # Increased height from 8
-        ip_scrollbar = ttk.Scrollbar(listbox_controls_frame, orient=tk.VERTICAL, command=self.ip_listbox.yview)
-        self.ip_listbox.configure(yscrollcommand=ip_scrollbar.set)
+        # Rows are keyed by IP address and inserted a page at a time as the table is scrolled
+        self.ip_tree = ttk.Treeview(listbox_controls_frame, columns=("ip", "name"), show="headings",
+                                    height=10, selectmode="extended")
+        self.ip_tree.heading("ip", text="IP Address")
+        self.ip_tree.heading("name", text="Name")
+        self.ip_tree.column("ip", width=260, stretch=False)
+        self.ip_tree.column("name", width=400)
+        ip_scrollbar = ttk.Scrollbar(listbox_controls_frame, orient=tk.VERTICAL, command=self.ip_tree.yview)
+        self.ip_tree.configure(yscrollcommand=lambda first, last: self.on_table_scroll(ip_scrollbar, first, last))
         
         # Reorder buttons frame
         reorder_frame = ttk.Frame(listbox_controls_frame)
         
-        # Place listbox and scrollbar
-        self.ip_listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # Place table and scrollbar
+        self.ip_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         ip_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         # Place reorder buttons
@@ -113,7 +279,7 @@ class ConfigEditor:
         ttk.Button(reorder_frame, text="▼", width=3, command=self.move_ip_down).grid(row=1, column=0, pady=(2, 0))
         
         # Help text for reordering
-        reorder_help = ttk.Label(ip_listbox_frame, text="Use ▲▼ buttons or Ctrl+↑↓ to reorder IPs", 
+        reorder_help = ttk.Label(ip_listbox_frame, text="Use ▲▼ buttons or Ctrl+↑↓ to reorder IPs, Shift/Ctrl+click to select several", 
                                  font=("Arial", 8), foreground="gray")
         reorder_help.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
         
@@ -126,7 +292,7 @@ class ConfigEditor:
         
         # IP input and buttons
         ip_input_frame = ttk.Frame(ip_frame)
-        ip_input_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))  # Increased padding
+        ip_input_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))  # Increased padding
         ip_input_frame.columnconfigure(0, weight=1)
         
         # IP entry
@@ -146,7 +312,9 @@ class ConfigEditor:
         ttk.Button(button_frame, text="Add IP", command=self.add_ip).grid(row=0, column=0, padx=(0, 8))  # Increased padding
         ttk.Button(button_frame, text="Remove IP", command=self.remove_ip).grid(row=0, column=1, padx=(0, 8))  # Increased padding
         ttk.Button(button_frame, text="Edit Name", command=self.edit_name).grid(row=0, column=2, padx=(0, 8))  # Increased padding
-        ttk.Button(button_frame, text="Clear All", command=self.clear_ips).grid(row=0, column=3)
+        ttk.Button(button_frame, text="Clear All", command=self.clear_ips).grid(row=0, column=3, padx=(0, 8))
+        ttk.Button(button_frame, text="Import...", command=self.import_ips).grid(row=0, column=4, padx=(0, 8))
+        ttk.Button(button_frame, text="Export...", command=self.export_ips).grid(row=0, column=5)
         
         # Buttons Section
         button_frame = ttk.Frame(main_frame)
@@ -159,14 +327,17 @@ class ConfigEditor:
         save_button.grid(row=0, column=0, padx=(0, 15))  # Increased padding
         
         ttk.Button(button_frame, text="⚙️ Settings", command=self.open_settings_dialog).grid(row=0, column=1, padx=(0, 15))  # Added Settings button
-        ttk.Button(button_frame, text="Reset to Defaults", command=self.reset_to_defaults).grid(row=0, column=2, padx=(0, 15))  # Increased padding
-        ttk.Button(button_frame, text="Exit", command=self.root.quit).grid(row=0, column=3)
+        ttk.Button(button_frame, text="📈 Live View", command=self.open_live_view).grid(row=0, column=2, padx=(0, 15))
+        ttk.Button(button_frame, text="Reset to Defaults", command=self.reset_to_defaults).grid(row=0, column=3, padx=(0, 15))  # Increased padding
+        ttk.Button(button_frame, text="Exit", command=self.root.quit).grid(row=0, column=4)
         
         # Bind keyboard shortcuts
         self.root.bind('<Control-s>', lambda e: self.save_config())
         self.root.bind('<Control-S>', lambda e: self.save_config())
         self.root.bind('<Control-Up>', lambda e: self.move_ip_up())
         self.root.bind('<Control-Down>', lambda e: self.move_ip_down())
+        self.root.bind('<Control-f>', lambda e: self.search_entry.focus_set())
+        self.ip_tree.bind('<Delete>', lambda e: self.remove_ip())
         
         # Status bar
         self.status_var = tk.StringVar()
@@ -177,9 +348,8 @@ class ConfigEditor:
     def load_current_values(self):
         """Load current configuration values into the GUI"""
         # Load IP addresses
-        self.ip_listbox.delete(0, tk.END)
-        for ip, name in self.config_data.get("ip_addresses", {}).items():
-            self.ip_listbox.insert(tk.END, f"{ip} ({name})")
+        self.targets = TargetList(self.config_data.get("ip_addresses", {}))
+        self.refresh_view()
         
         # Load other settings
         self.interval_var.set(str(self.config_data.get("ping_interval", 60)))
@@ -198,20 +368,24 @@ class ConfigEditor:
             return
         
         # Basic IP validation
-        if not self.is_valid_ip(ip):
-            messagebox.showwarning("Warning", "Please enter a valid IP address")
+        error = target_error(ip)
+        if error is not None:
+            messagebox.showwarning("Warning", f"{error}\n\nPlease enter a valid IP address, host name, CIDR block (192.168.1.0/24) or range (192.168.1.10-20)")
             return
         
-        if ip in self.config_data["ip_addresses"]:
+        if not self.targets.add(ip, name):
             messagebox.showwarning("Warning", "IP address already exists")
             return
         
-        # Add IP with name to config
-        self.config_data["ip_addresses"][ip] = name
-        
-        # Update listbox
-        display_name = name if name else "No Name"
-        self.ip_listbox.insert(tk.END, f"{ip} ({display_name})")
+        # Show the new row unless the search hides it; with rows still to load it comes with the last page
+        if self.matches_search(ip):
+            self._matches.append(ip)
+            if self._loaded == len(self._matches) - 1:
+                self.ip_tree.insert("", tk.END, iid=ip, values=(ip, name))
+                self._loaded += 1
+                self.ip_tree.selection_set(ip)
+                self.ip_tree.see(ip)
+        self.update_count()
         
         # Clear entries
         self.ip_entry.delete(0, tk.END)
@@ -219,91 +393,160 @@ class ConfigEditor:
         self.status_var.set(f"Added IP: {ip}" + (f" - {name}" if name else ""))
     
     def remove_ip(self):
-        """Remove selected IP address"""
-        selection = self.ip_listbox.curselection()
+        """Remove the selected IP addresses"""
+        selection = self.ip_tree.selection()
         if not selection:
             messagebox.showwarning("Warning", "Please select an IP address to remove")
             return
         
-        ip_item = self.ip_listbox.get(selection[0])
-        ip_text = ip_item.split(" (")[0] # Extract IP from "IP (Name)"
-        
-        if ip_text in self.config_data["ip_addresses"]:
-            del self.config_data["ip_addresses"][ip_text]
-            self.ip_listbox.delete(selection[0])
-            self.status_var.set(f"Removed IP: {ip_text}")
+        removed = self.targets.remove(selection)
+        self.ip_tree.delete(*selection)
+        selected = set(selection)
+        self._matches = [ip for ip in self._matches if ip not in selected]
+        self._loaded -= len(selection)  # only loaded rows can be selected
+        self.update_count()
+        if removed == 1:
+            self.status_var.set(f"Removed IP: {selection[0]}")
         else:
-            messagebox.showwarning("Warning", "IP address not found in configuration")
+            self.status_var.set(f"Removed {removed} IP addresses")
     
     def clear_ips(self):
         """Clear all IP addresses"""
         if messagebox.askyesno("Confirm", "Are you sure you want to clear all IP addresses?"):
-            self.ip_listbox.delete(0, tk.END)
-            self.config_data["ip_addresses"] = {} # Clear the dictionary
+            self.targets.clear()
+            self.ip_tree.delete(*self.ip_tree.get_children())
+            self._matches = []
+            self._loaded = 0
             self.status_var.set("Cleared all IP addresses")
     
     def move_ip_up(self):
         """Move selected IP address up in the list"""
-        selection = self.ip_listbox.curselection()
-        if not selection:
-            messagebox.showwarning("Warning", "Please select an IP address to move")
-            return
-        
-        index = selection[0]
-        if index == 0:  # Already at the top
-            return
-        
-        # Get the IP item text
-        ip_item = self.ip_listbox.get(index)
-        
-        # Remove from current position
-        self.ip_listbox.delete(index)
-        
-        # Insert at new position (one up)
-        self.ip_listbox.insert(index - 1, ip_item)
-        
-        # Select the moved item
-        self.ip_listbox.selection_set(index - 1)
-        
-        self.status_var.set(f"Moved IP up: {ip_item.split(' (')[0]}")
+        self.move_ip(-1)
     
     def move_ip_down(self):
         """Move selected IP address down in the list"""
-        selection = self.ip_listbox.curselection()
+        self.move_ip(1)
+    
+    def move_ip(self, offset: int):
+        """Move the selected IP address offset places in the list"""
+        selection = self.ip_tree.selection()
         if not selection:
             messagebox.showwarning("Warning", "Please select an IP address to move")
             return
-        
-        index = selection[0]
-        if index == self.ip_listbox.size() - 1:  # Already at the bottom
+        if self.search_var.get().strip():
+            messagebox.showwarning("Warning", "Clear the search to reorder IP addresses")
             return
         
-        # Get the IP item text
-        ip_item = self.ip_listbox.get(index)
-        
-        # Remove from current position
-        self.ip_listbox.delete(index)
-        
-        # Insert at new position (one down)
-        self.ip_listbox.insert(index + 1, ip_item)
+        ip = selection[0]
+        index = self.targets.move(ip, offset)
+        if index is None:  # Already at the top or bottom
+            return
         
-        # Select the moved item
-        self.ip_listbox.selection_set(index + 1)
+        # Without a search the table rows are in list order; moving past the loaded rows loads the next page
+        if index >= self._loaded:
+            self.load_rows()
+        self._matches[index - offset], self._matches[index] = self._matches[index], ip
+        self.ip_tree.move(ip, "", index)
+        self.ip_tree.selection_set(ip)
+        self.ip_tree.see(ip)
+        self.status_var.set(f"Moved IP {'up' if offset < 0 else 'down'}: {ip}")
+    
+    def matches_search(self, ip: str) -> bool:
+        """Return True if an address is shown with the current search"""
+        text = self.search_var.get().strip().lower()
+        return not text or text in ip.lower() or text in self.targets.names[ip].lower()
+    
+    def schedule_search(self):
+        """Refresh the table shortly after the search text stops changing"""
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(200, self.refresh_view)
+    
+    def refresh_view(self):
+        """Fill the table with the first page of addresses matching the search"""
+        self._search_after = None
+        self.ip_tree.delete(*self.ip_tree.get_children())
+        self._matches = self.targets.search(self.search_var.get())
+        self._loaded = 0
+        self.load_rows()
+        self.update_count()
+    
+    def load_rows(self):
+        """Insert the next page of matching addresses into the table"""
+        names = self.targets.names
+        page = self._matches[self._loaded:self._loaded + TABLE_PAGE_ROWS]
+        for ip in page:
+            self.ip_tree.insert("", tk.END, iid=ip, values=(ip, names[ip]))
+        self._loaded += len(page)
+    
+    def on_table_scroll(self, scrollbar: ttk.Scrollbar, first: str, last: str):
+        """Update the scrollbar and load the next page once the end of the loaded rows comes into view"""
+        scrollbar.set(first, last)
+        if float(last) >= 0.9 and self._loaded < len(self._matches):
+            self.load_rows()
+    
+    def update_count(self):
+        """Show how many addresses are listed (and shown, while searching)"""
+        total = len(self.targets)
+        shown = len(self._matches)
+        if shown == total:
+            self.status_var.set(f"{total} IP addresses")
+        else:
+            self.status_var.set(f"Showing {shown} of {total} IP addresses")
+    
+    def import_ips(self):
+        """Add the IP addresses (and names) from a CSV or text file"""
+        filename = filedialog.askopenfilename(
+            title="Import IP Addresses",
+            filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            rows = read_targets_file(filename)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            messagebox.showerror("Error", f"Failed to import {filename}: {e}")
+            return
         
-        self.status_var.set(f"Moved IP down: {ip_item.split(' (')[0]}")
+        added = 0
+        duplicates = 0
+        invalid = []
+        for ip, name in rows:
+            if not self.is_valid_ip(ip):
+                invalid.append(ip)
+            elif self.targets.add(ip, name):
+                added += 1
+            else:
+                duplicates += 1
+        self.refresh_view()
+        
+        message = f"Imported {added} IP addresses from {os.path.basename(filename)}"
+        if duplicates:
+            message += f", {duplicates} already listed"
+        if invalid:
+            message += f", {len(invalid)} invalid"
+            messagebox.showwarning("Import", f"{message}.\n\nInvalid entries:\n{summarize_lines(invalid)}")
+        self.status_var.set(message)
     
-    def is_valid_ip(self, ip: str) -> bool:
-        """Basic IP address validation"""
+    def export_ips(self):
+        """Write the IP addresses and names to a CSV or text file"""
+        filename = filedialog.asksaveasfilename(
+            title="Export IP Addresses",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
         try:
-            parts = ip.split('.')
-            if len(parts) != 4:
-                return False
-            for part in parts:
-                if not part.isdigit() or not 0 <= int(part) <= 255:
-                    return False
-            return True
-        except:
-            return False
+            write_targets_file(filename, self.targets.to_dict().items())
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export to {filename}: {e}")
+            return
+        self.status_var.set(f"Exported {len(self.targets)} IP addresses to {os.path.basename(filename)}")
+    
+    def is_valid_ip(self, ip: str) -> bool:
+        """Validate an IPv4/IPv6 address, host name, CIDR block or address range"""
+        return is_valid_target(ip)
     
     def save_config(self):
         """Save configuration to file"""
@@ -321,29 +564,24 @@ class ConfigEditor:
                 messagebox.showerror("Error", f"Invalid numeric values: {e}")
                 return
             
-            # Get IP addresses with their names from the current config data
-            ip_addresses = {}
-            for item_index in range(self.ip_listbox.size()):
-                ip_item = self.ip_listbox.get(item_index)
-                ip_text = ip_item.split(" (")[0]  # Extract IP from "IP (Name)"
-                
-                # Get the name from the current config data
-                name = self.config_data["ip_addresses"].get(ip_text, "")
-                ip_addresses[ip_text] = name
+            # Get IP addresses with their names, in list order
+            ip_addresses = self.targets.to_dict()
             
             if not ip_addresses:
                 messagebox.showerror("Error", "At least one IP address is required")
                 return
             
-            # Create new config
-            new_config = {
+            # Create new config, keeping settings this editor does not manage
+            # (e.g. host_settings) as they are
+            new_config = dict(self.config_data)
+            new_config.update({
                 "ip_addresses": ip_addresses,
                 "ping_interval": interval,
                 "ping_count": count,
                 "timeout": timeout,
                 "log_file": self.log_file_var.get(),
                 "total_runtime": runtime
-            }
+            })
             
             # Show save confirmation with summary
             summary = f"Configuration Summary:\n\n"
@@ -354,13 +592,11 @@ class ConfigEditor:
             summary += f"Log File: {self.log_file_var.get()}\n"
             summary += f"Total Runtime: {runtime if runtime > 0 else 'Indefinite'} seconds\n\n"
             
-            # Add IP list
+            # Add IP list (the first SUMMARY_ROWS entries)
             summary += "IP Addresses:\n"
-            for ip, name in ip_addresses.items():
-                if name:
-                    summary += f"  {ip} → {name}\n"
-                else:
-                    summary += f"  {ip}\n"
+            summary += summarize_lines([f"  {ip} → {name}" if name else f"  {ip}"
+                                        for ip, name in itertools.islice(ip_addresses.items(), SUMMARY_ROWS)],
+                                       total=len(ip_addresses))
             
             if not messagebox.askyesno("Confirm Save", f"{summary}\n\nSave this configuration?"):
                 return
@@ -399,20 +635,15 @@ class ConfigEditor:
 
     def edit_name(self):
         """Edit the name of a selected IP address"""
-        selection = self.ip_listbox.curselection()
+        selection = self.ip_tree.selection()
         if not selection:
             messagebox.showwarning("Warning", "Please select an IP address to edit")
             return
         
-        ip_item = self.ip_listbox.get(selection[0])
-        ip_text = ip_item.split(" (")[0]  # Extract IP from "IP (Name)"
-        
-        if ip_text not in self.config_data["ip_addresses"]:
-            messagebox.showwarning("Warning", "IP address not found in configuration")
-            return
+        ip_text = selection[0]
         
         # Get current name
-        current_name = self.config_data["ip_addresses"][ip_text]
+        current_name = self.targets.names[ip_text]
         
         # Create a simple dialog for editing the name
         dialog = tk.Toplevel(self.root)
@@ -442,12 +673,10 @@ class ConfigEditor:
         
         def save_name():
             new_name = name_var.get().strip()
-            self.config_data["ip_addresses"][ip_text] = new_name
+            self.targets.rename(ip_text, new_name)
             
-            # Update listbox
-            display_name = new_name if new_name else "No Name"
-            self.ip_listbox.delete(selection[0])
-            self.ip_listbox.insert(selection[0], f"{ip_text} ({display_name})")
+            # Update table
+            self.ip_tree.set(ip_text, "name", new_name)
             
             self.status_var.set(f"Updated name for {ip_text}: {new_name if new_name else 'No Name'}")
             dialog.destroy()
@@ -466,6 +695,10 @@ class ConfigEditor:
         """Open the settings dialog"""
         SettingsDialog(self.root, self)
     
+    def open_live_view(self):
+        """Open the live results view of a running pingtest.py"""
+        LiveView(self.root)
+    
     def browse_log_file(self):
         """Browse for log file location"""
         filename = filedialog.asksaveasfilename(
@@ -580,6 +813,144 @@ class SettingsDialog:
             self.config_editor.log_file_var.set(filename)
 
 
+class LiveView:
+    """Live per-host results streamed from a running pingtest.py (started with --stream)
+    
+    Results arrive on the subscriber thread and are only recorded there;
+    the table is redrawn FRAME_MS apart on the Tk thread, updating just the
+    rows of hosts that had results since the previous frame.
+    """
+    
+    FRAME_MS = 250       # redraw interval (4 frames per second)
+    HISTORY = 30         # results per host in the sparkline
+    
+    def __init__(self, parent, address: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.parent = parent
+        self.hosts = {}          # ip -> host row data, updated by the subscriber thread
+        self.changed = set()     # hosts with results not drawn yet
+        self.lock = threading.Lock()
+        self.subscriber = None
+        self.frame_job = None
+        
+        # Create window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("PingTest Live View")
+        self.dialog.geometry("900x500")
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+        self.dialog.bind('<Escape>', lambda e: self.close())
+        
+        self.address_var = tk.StringVar(value=address)
+        self.port_var = tk.StringVar(value=str(port))
+        self.status_var = tk.StringVar(value="Not connected")
+        self.create_widgets()
+        self.connect()
+    
+    def create_widgets(self):
+        """Create the live view widgets"""
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.dialog.columnconfigure(0, weight=1)
+        self.dialog.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        # Connection settings
+        connect_frame = ttk.Frame(main_frame)
+        connect_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        ttk.Label(connect_frame, text="Address:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(connect_frame, textvariable=self.address_var, width=20).grid(row=0, column=1, padx=(5, 15))
+        ttk.Label(connect_frame, text="Port:").grid(row=0, column=2, sticky=tk.W)
+        ttk.Entry(connect_frame, textvariable=self.port_var, width=8).grid(row=0, column=3, padx=(5, 15))
+        ttk.Button(connect_frame, text="Connect", command=self.connect).grid(row=0, column=4)
+        
+        # Results table
+        table_frame = ttk.Frame(main_frame)
+        table_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        columns = ("ip", "name", "state", "rtt", "loss", "history")
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for column, heading, width in (("ip", "IP Address", 150), ("name", "Name", 170), ("state", "State", 70),
+                                       ("rtt", "Last RTT", 80), ("loss", "Loss", 60), ("history", "History", 300)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=(column == "history"))
+        self.tree.tag_configure("down", foreground="red")
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        # Status bar
+        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+    
+    def connect(self):
+        """(Re)connect to the result stream and start drawing frames"""
+        try:
+            port = int(self.port_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid port", parent=self.dialog)
+            return
+        if self.subscriber is not None:
+            self.subscriber.stop()
+        self.subscriber = ResultSubscriber(self.on_result, self.address_var.get().strip(), port)
+        self.subscriber.start()
+        if self.frame_job is None:
+            self.frame_job = self.dialog.after(self.FRAME_MS, self.draw_frame)
+    
+    def on_result(self, result: Dict):
+        """Record a streamed result (subscriber thread)"""
+        ip = result['ip']
+        with self.lock:
+            host = self.hosts.get(ip)
+            if host is None:
+                host = self.hosts[ip] = {'history': collections.deque(maxlen=self.HISTORY)}
+            host['name'] = result.get('name', "")
+            host['success'] = result['success']
+            host['rtt'] = result['response_time']
+            host['loss'] = result['packet_loss']
+            host['history'].append(result['response_time'] if result['success'] else None)
+            self.changed.add(ip)
+    
+    def draw_frame(self):
+        """Update the rows of hosts that changed since the previous frame"""
+        with self.lock:
+            changed, self.changed = self.changed, set()
+            rows = [(ip, self.row_values(ip, self.hosts[ip])) for ip in changed]
+        tree = self.tree
+        for ip, (values, down) in rows:
+            tags = ("down",) if down else ()
+            if tree.exists(ip):
+                tree.item(ip, values=values, tags=tags)
+            else:
+                tree.insert("", tk.END, iid=ip, values=values, tags=tags)
+        
+        subscriber = self.subscriber
+        if subscriber.connected:
+            self.status_var.set(f"Connected to {subscriber.address}:{subscriber.port} - {len(self.hosts)} hosts")
+        else:
+            self.status_var.set(f"Waiting for pingtest.py --stream on {subscriber.address}:{subscriber.port}"
+                                + (f" ({subscriber.error})" if subscriber.error else ""))
+        self.frame_job = self.dialog.after(self.FRAME_MS, self.draw_frame)
+    
+    @staticmethod
+    def row_values(ip: str, host: Dict) -> Tuple[tuple, bool]:
+        """Return a host's table values and whether it is down"""
+        down = not host['success']
+        rtt = f"{host['rtt']:.2f}ms" if host['rtt'] is not None else "-"
+        values = (ip, host['name'], "DOWN" if down else "UP", rtt, f"{host['loss']:.0f}%",
+                  sparkline(host['history']))
+        return values, down
+    
+    def close(self):
+        """Disconnect and close the window"""
+        if self.frame_job is not None:
+            self.dialog.after_cancel(self.frame_job)
+        if self.subscriber is not None:
+            self.subscriber.stop()
+        self.dialog.destroy()
+
+
 def main():
     """Main function"""
     root = tk.Tk()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Config Watcher - detects changes to the PingTest configuration file
+Polls the file's modification time and size, so one check costs a single stat() call
+"""
+
+import os
+import time
+from typing import Callable, Optional, Tuple
+
+
+class ConfigWatcher:
+    """Reports when a file has changed since the previous check
+
+    check() is called from the probing loop and only stats the file once
+    every check_interval seconds. A file caught half-written (e.g. while the
+    config editor is saving it) changes size or modification time again when
+    the write completes, so the complete version is reported as well.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self.clock = clock
+        self.next_check = clock() + check_interval
+        self._signature_seen = self._signature()
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        """Return (modification time in ns, size) of the file, or None if it is missing"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self, now: Optional[float] = None) -> bool:
+        """Return True if the file changed since the previous check (at most one stat per interval)"""
+        if now is None:
+            now = self.clock()
+        if now < self.next_check:
+            return False
+        self.next_check = now + self.check_interval
+        signature = self._signature()
+        if signature is None or signature == self._signature_seen:
+            return False
+        self._signature_seen = signature
+        return True
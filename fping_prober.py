@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Fping Prober - pings a whole batch of hosts with one fping process
+Used where ICMP sockets are not permitted but one ping process per host is too costly
+"""
+
+import re
+import subprocess
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from probe_result import ProbeResult
+
+
+# fping -C summary line, e.g. "192.168.1.1 : 0.41 0.38 -"
+SUMMARY_LINE = re.compile(r'^(\S+)\s+:\s+((?:[\d.]+|-)(?:\s+(?:[\d.]+|-))*)\s*$')
+# fping error line for a single target, e.g. "badhost: Name or service not known"
+ERROR_LINE = re.compile(r'^(\S+?):\s+(.+)$')
+
+
+def parse_summary_line(line: str) -> Optional[tuple]:
+    """Return (host, [rtt ms or None per packet]) for an fping -C line"""
+    match = SUMMARY_LINE.match(line)
+    if not match:
+        return None
+    samples = [None if value == '-' else float(value) for value in match.group(2).split()]
+    return match.group(1), samples
+
+
+class FpingProber:
+    """Ping many hosts per process by streaming targets to fping and parsing its summary"""
+
+    name = "fping"
+    watchdog_slack = 5.0  # seconds fping may run past its worst case before it is killed
+
+    def __init__(self, count: int = 4, timeout: float = 5, interval: float = 0.1,
+                 fping_path: str = "fping", send_gap_ms: int = 1):
+        self.count = max(1, int(count))
+        self.timeout = timeout
+        self.interval = interval
+        self.fping_path = fping_path
+        self.send_gap_ms = send_gap_ms
+
+    def command(self, count: Optional[int] = None) -> List[str]:
+        """Return the fping command line (targets are written to its stdin)"""
+        return [
+            self.fping_path,
+            '-C', str(count or self.count),              # per-packet RTTs, summary on stderr
+            '-q',                                        # no per-reply lines
+            '-t', str(int(self.timeout * 1000)),         # reply timeout (ms)
+            '-r', '0',                                   # no retries
+            '-p', str(max(10, int(self.interval * 1000))),  # gap between packets to one host (ms)
+            '-i', str(self.send_gap_ms),                 # gap between any two packets (ms)
+        ]
+
+    def ping(self, ip_address: str, count: Optional[int] = None) -> ProbeResult:
+        """Ping a single host and return results in the ping_host format"""
+        return next(self.ping_many([ip_address], count))
+
+    def ping_many(self, ip_addresses: List[str], count: Optional[int] = None) -> Iterator[ProbeResult]:
+        """Ping all hosts with one fping process, yielding results as lines arrive"""
+        count = max(1, int(count)) if count else self.count
+        timestamp = time.time_ns()
+        remaining = dict.fromkeys(ip_addresses)
+        if not remaining:
+            return
+
+        try:
+            process = subprocess.Popen(
+                self.command(count),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except OSError as e:
+            for ip in remaining:
+                yield self._error_result(ip, timestamp, f"Cannot run fping: {e}")
+            return
+
+        # Feed targets from a separate thread so a large batch cannot deadlock
+        # against fping filling up its stderr pipe
+        def write_targets():
+            try:
+                process.stdin.write('\n'.join(remaining) + '\n')
+                process.stdin.close()
+            except OSError:
+                pass
+
+        writer = threading.Thread(target=write_targets, daemon=True)
+        writer.start()
+
+        # fping paces packets; kill it if it runs far past its worst case
+        budget = (count * self.interval + self.timeout
+                  + len(remaining) * count * self.send_gap_ms / 1000 + self.watchdog_slack)
+        watchdog = threading.Timer(budget, process.kill)
+        watchdog.start()
+
+        unparsed = []
+        try:
+            for line in process.stderr:
+                line = line.strip()
+                if not line:
+                    continue
+                parsed = parse_summary_line(line)
+                if parsed and parsed[0] in remaining:
+                    host, samples = parsed
+                    del remaining[host]
+                    yield self._result(host, timestamp, samples, count)
+                    continue
+                error = ERROR_LINE.match(line)
+                if error and error.group(1) in remaining:
+                    del remaining[error.group(1)]
+                    yield self._error_result(error.group(1), timestamp, error.group(2))
+                    continue
+                unparsed.append(line)
+            process.wait()
+        finally:
+            watchdog.cancel()
+            writer.join()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if remaining:
+            if process.returncode is not None and process.returncode < 0:
+                message = "fping timed out"
+            else:
+                message = f"No result from fping (return code: {process.returncode})"
+            if unparsed:
+                message += f" - {unparsed[-1]}"
+            for ip in remaining:
+                yield self._error_result(ip, timestamp, message)
+
+    def _result(self, ip_address: str, timestamp: int, samples: list, count: int) -> ProbeResult:
+        """Build a result from one host's per-packet RTTs"""
+        sequences = [sequence for sequence, rtt in enumerate(samples) if rtt is not None]
+        rtts = [samples[sequence] for sequence in sequences]
+        return ProbeResult.from_replies(ip_address, timestamp, len(samples) or count, rtts, sequences)
+
+    def _error_result(self, ip_address: str, timestamp: int, error: str) -> ProbeResult:
+        """Build a failed result"""
+        return ProbeResult.failed(ip_address, error, timestamp)
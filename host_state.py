@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Host State - UP/DEGRADED/DOWN state of each host for transition-only logging
+A host changes state only after several consecutive results disagree with it, and a
+degraded host has to get well below the degradation thresholds to count as up again
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+from probe_result import ProbeResult
+
+
+UP = "UP"
+DEGRADED = "DEGRADED"
+DOWN = "DOWN"
+
+STATES = (UP, DEGRADED, DOWN)
+
+
+class HostState:
+    """Current state of one host"""
+
+    __slots__ = ('state', 'previous', 'since', 'duration', 'streak')
+
+    def __init__(self, state: str, since: float):
+        self.state = state
+        self.previous = None  # state before the latest change (None until the first change)
+        self.since = since    # clock time of the latest change
+        self.duration = 0.0   # seconds the host spent in the previous state
+        self.streak = 0       # consecutive results that disagree with the current state
+
+
+class HostStateTracker:
+    """Tracks the UP/DEGRADED/DOWN state of every host from its results
+
+    A result is evidence for:
+    - DOWN if the probe failed
+    - DEGRADED if packet loss is at least degraded_loss (%) or the response
+      time at least degraded_rtt (ms); a threshold of 0 is not used
+    - UP if loss and response time are below recovery_ratio times the
+      thresholds
+    Results between the recovery and degradation thresholds keep the
+    current state (a down host that replies counts as up). A host changes
+    state after change_after consecutive results disagree with its current
+    state, so a single lost probe or slow reply does not flap the state.
+    """
+
+    def __init__(self, change_after: int = 2, degraded_loss: float = 10.0, degraded_rtt: float = 0.0,
+                 recovery_ratio: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        self.change_after = max(1, int(change_after))
+        self.degraded_loss = degraded_loss
+        self.degraded_rtt = degraded_rtt
+        self.recovery_ratio = recovery_ratio
+        self.clock = clock
+        self.hosts = {}
+
+    def classify(self, result: ProbeResult) -> Optional[str]:
+        """Return the state a single result points to, or None if it is between the thresholds"""
+        if not result.success:
+            return DOWN
+        loss = result.packet_loss
+        rtt = result.response_time or 0.0
+        degraded_loss = self.degraded_loss
+        degraded_rtt = self.degraded_rtt
+        if (degraded_loss and loss >= degraded_loss) or (degraded_rtt and rtt >= degraded_rtt):
+            return DEGRADED
+        ratio = self.recovery_ratio
+        if (not degraded_loss or loss < degraded_loss * ratio) and (not degraded_rtt or rtt < degraded_rtt * ratio):
+            return UP
+        return None
+
+    def update(self, result: ProbeResult) -> Optional[HostState]:
+        """Take a result into account; return the host's state if it is new or has changed"""
+        observed = self.classify(result)
+        host = self.hosts.get(result.ip)
+        if host is None:
+            host = HostState(observed or UP, self.clock())
+            self.hosts[result.ip] = host
+            return host
+
+        if observed is None:
+            observed = UP if host.state == DOWN else host.state
+        if observed == host.state:
+            host.streak = 0
+            return None
+        host.streak += 1
+        if host.streak < self.change_after:
+            return None
+
+        now = self.clock()
+        host.previous = host.state
+        host.state = observed
+        host.duration = now - host.since
+        host.since = now
+        host.streak = 0
+        return host
+
+    def remove(self, ip_address: str):
+        """Stop tracking a host"""
+        self.hosts.pop(ip_address, None)
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of hosts in each state"""
+        counts = dict.fromkeys(STATES, 0)
+        for host in self.hosts.values():
+            counts[host.state] += 1
+        return counts
+
+    def hosts_in(self, state: str) -> List[str]:
+        """Return the hosts currently in a state"""
+        return [ip for ip, host in self.hosts.items() if host.state == state]
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as 45s, 12m 5s, 3h 2m or 2d 4h"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
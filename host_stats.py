@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Host Stats - rolling per-host latency and loss statistics for PingTest
+Every update is O(1) per packet: fixed-size array ring buffers plus streaming estimators
+"""
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from probe_result import ProbeResult
+
+
+class P2Quantile:
+    """Streaming quantile estimate using the P-squared algorithm (Jain & Chlamtac)
+
+    Keeps five markers instead of the observations, so memory and update
+    cost are constant no matter how many values are added.
+    """
+
+    __slots__ = ('q', 'count', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, q: float):
+        self.q = q
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value: float):
+        """Add one observation"""
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(value)
+            if self.count == 5:
+                heights.sort()
+            return
+
+        # Find the cell the value falls into, stretching the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            offset = desired[i] - positions[i]
+            if ((offset >= 1 and positions[i + 1] - positions[i] > 1)
+                    or (offset <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        """Piecewise-parabolic prediction of marker i moved by step"""
+        h, n = self.heights, self.positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        """Linear prediction of marker i moved by step"""
+        h, n = self.heights, self.positions
+        return h[i] + step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+
+    def value(self) -> Optional[float]:
+        """Return the current estimate (exact while fewer than 5 values were seen)"""
+        if self.count == 0:
+            return None
+        if self.count < 5:
+            ordered = sorted(self.heights)
+            return ordered[min(len(ordered) - 1, int(self.q * len(ordered)))]
+        return self.heights[2]
+
+
+class HostStats:
+    """Rolling statistics for one host
+
+    The loss ratio and average RTT cover the last `window` results, kept in
+    array-backed ring buffers with running sums. EWMA latency is
+    exponentially weighted over the probes' average RTTs.
+
+    The RTT of every individual reply is kept too: the last `samples`
+    replies sit in a float32 ring with their sequence numbers in a uint32
+    ring beside it (8 bytes per sample). Jitter and the p50/p95/p99
+    P-squared sketches are fed with these per-packet RTTs, so a probe's
+    average does not smooth away a slow reply. Results without per-packet
+    RTTs count as a single sample.
+
+    The percentiles cover the last `quantile_window` replies (0 = the whole
+    session). Two sets of sketches run half a window apart and the older
+    one is restarted every half window, so the reported set has always
+    seen between half and a whole window of recent replies.
+    """
+
+    __slots__ = ('window', 'alpha', 'rtts', 'rtt_index', 'rtt_sum', 'losses', 'loss_index',
+                 'loss_sum', 'probes', 'failures', 'up', 'last_rtt', 'ewma', 'jitter', 'quantiles',
+                 'quantile_half', 'samples', 'sample_rtts', 'sample_sequences', 'sample_index', 'last_sample', 'replies')
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, window: int = 100, alpha: float = 0.125, samples: int = 1000, quantile_window: int = 1000):
+        self.window = max(1, int(window))
+        self.alpha = alpha
+        self.samples = max(0, int(samples))
+        self.rtts = array('d')
+        self.rtt_index = 0
+        self.rtt_sum = 0.0
+        self.losses = array('f')
+        self.loss_index = 0
+        self.loss_sum = 0.0
+        self.probes = 0
+        self.failures = 0
+        self.up = None
+        self.last_rtt = None
+        self.ewma = None
+        self.jitter = 0.0
+        self.quantiles = [self.sketches(), self.sketches()]
+        self.quantile_half = max(1, int(quantile_window) // 2) if quantile_window > 0 else 0
+        self.sample_rtts = array('f')
+        self.sample_sequences = array('I')
+        self.sample_index = 0
+        self.last_sample = None
+        self.replies = 0
+
+    def update(self, success: bool, response_time: Optional[float], packet_loss: float,
+               rtts: Optional[Sequence[float]] = None, sequences: Optional[Sequence[int]] = None):
+        """Add one probe result with the RTTs and sequence numbers of its replies"""
+        self.probes += 1
+        self.up = success
+        if not success:
+            self.failures += 1
+
+        # Loss ratio over the window (fraction of packets lost per probe)
+        loss = packet_loss / 100
+        if len(self.losses) < self.window:
+            self.losses.append(loss)
+        else:
+            self.loss_sum -= self.losses[self.loss_index]
+            self.losses[self.loss_index] = loss
+            self.loss_index = (self.loss_index + 1) % self.window
+        self.loss_sum += loss
+
+        if not success or response_time is None:
+            return
+
+        if len(self.rtts) < self.window:
+            self.rtts.append(response_time)
+        else:
+            self.rtt_sum -= self.rtts[self.rtt_index]
+            self.rtts[self.rtt_index] = response_time
+            self.rtt_index = (self.rtt_index + 1) % self.window
+        self.rtt_sum += response_time
+
+        if self.ewma is None:
+            self.ewma = response_time
+        else:
+            self.ewma += self.alpha * (response_time - self.ewma)
+        self.last_rtt = response_time
+
+        if not rtts:
+            rtts = (response_time,)
+            sequences = (0,)
+        elif not sequences:
+            sequences = range(len(rtts))
+        for rtt, sequence in zip(rtts, sequences):
+            self.add_sample(rtt, sequence)
+
+    @classmethod
+    def sketches(cls) -> List[P2Quantile]:
+        """Return a fresh set of percentile sketches"""
+        return [P2Quantile(q) for q in cls.QUANTILES]
+
+    def add_sample(self, rtt: float, sequence: int):
+        """Add the RTT of one reply"""
+        self.replies += 1
+        if self.last_sample is not None:
+            # RFC 3550 style interarrival jitter from successive RTTs
+            self.jitter += (abs(rtt - self.last_sample) - self.jitter) / 16
+        self.last_sample = rtt
+        for sketches in self.quantiles:
+            for sketch in sketches:
+                sketch.add(rtt)
+        if self.quantile_half and self.replies % self.quantile_half == 0:
+            # Restart the older set; on the first half window both are equal and the second one restarts
+            older = 0 if self.quantiles[0][0].count > self.quantiles[1][0].count else 1
+            self.quantiles[older] = self.sketches()
+
+        if len(self.sample_rtts) < self.samples:
+            self.sample_rtts.append(rtt)
+            self.sample_sequences.append(sequence)
+        elif self.samples:
+            self.sample_rtts[self.sample_index] = rtt
+            self.sample_sequences[self.sample_index] = sequence
+            self.sample_index = (self.sample_index + 1) % self.samples
+
+    def loss_ratio(self) -> float:
+        """Fraction of packets lost over the window"""
+        return self.loss_sum / len(self.losses) if self.losses else 0.0
+
+    def window_average(self) -> Optional[float]:
+        """Average RTT over the window"""
+        return self.rtt_sum / len(self.rtts) if self.rtts else None
+
+    def window_rtts(self) -> List[float]:
+        """RTTs in the window, oldest first"""
+        return list(self.rtts[self.rtt_index:]) + list(self.rtts[:self.rtt_index])
+
+    def window_samples(self) -> Tuple[array, array]:
+        """Per-packet RTTs and their sequence numbers, oldest first"""
+        index = self.sample_index
+        return (self.sample_rtts[index:] + self.sample_rtts[:index],
+                self.sample_sequences[index:] + self.sample_sequences[:index])
+
+    def snapshot(self) -> Dict:
+        """Return the current statistics as a dict"""
+        p50, p95, p99 = (sketch.value() for sketch in max(self.quantiles, key=lambda sketches: sketches[0].count))
+        return {
+            'probes': self.probes,
+            'failures': self.failures,
+            'replies': self.replies,
+            'up': self.up,
+            'loss_ratio': self.loss_ratio(),
+            'last_rtt': self.last_rtt,
+            'avg_rtt': self.window_average(),
+            'ewma_rtt': self.ewma,
+            'jitter': self.jitter,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99
+        }
+
+
+class StatsEngine:
+    """Per-host statistics keyed by IP address
+
+    A host name keeps one HostStats per address it resolved to, so a DNS
+    change starts fresh statistics for the new address without losing the
+    history of the old one; hosts maps the name to its current address's.
+    """
+
+    def __init__(self, window: int = 100, alpha: float = 0.125, samples: int = 1000, quantile_window: int = 1000):
+        self.window = window
+        self.alpha = alpha
+        self.samples = samples
+        self.quantile_window = quantile_window
+        self.hosts = {}
+        self.addresses = {}  # host name -> {address: HostStats}
+
+    def update(self, result: ProbeResult):
+        """Add a ping result"""
+        if result.address is not None:
+            by_address = self.addresses.get(result.ip)
+            if by_address is None:
+                by_address = self.addresses[result.ip] = {}
+            stats = by_address.get(result.address)
+            if stats is None:
+                stats = by_address[result.address] = self.new_stats()
+            self.hosts[result.ip] = stats
+        else:
+            stats = self.hosts.get(result.ip)
+            if stats is None:
+                stats = self.hosts[result.ip] = self.new_stats()
+        stats.update(result.success, result.response_time, result.packet_loss, result.rtts, result.sequences)
+
+    def new_stats(self) -> HostStats:
+        """Return empty statistics with the engine's settings"""
+        return HostStats(self.window, self.alpha, self.samples, self.quantile_window)
+
+    def get(self, ip_address: str) -> Optional[HostStats]:
+        """Return the statistics of one host, if it has any results"""
+        return self.hosts.get(ip_address)
+
+    def remove(self, ip_address: str):
+        """Forget a host's statistics, including those of every address a host name had"""
+        self.hosts.pop(ip_address, None)
+        self.addresses.pop(ip_address, None)
+
+    def snapshots(self) -> Iterator:
+        """Yield (ip, snapshot dict) for every host"""
+        for ip, stats in self.hosts.items():
+            yield ip, stats.snapshot()
+
+    def earlier_snapshots(self) -> Iterator:
+        """Yield (host name, address, snapshot dict) for addresses host names no longer resolve to"""
+        for hostname, by_address in self.addresses.items():
+            current = self.hosts.get(hostname)
+            for address, stats in by_address.items():
+                if stats is not current:
+                    yield hostname, address, stats.snapshot()
+
+
+def format_ms(value: Optional[float]) -> str:
+    """Format a millisecond value for summaries"""
+    return "n/a" if value is None else f"{value:.2f}ms"
+
+
+def format_summary(snapshot: Dict) -> str:
+    """Format a host snapshot as one summary line"""
+    return (
+        f"{snapshot['probes']} probes, loss {snapshot['loss_ratio'] * 100:.1f}%, "
+        f"last {format_ms(snapshot['last_rtt'])}, avg {format_ms(snapshot['avg_rtt'])}, "
+        f"ewma {format_ms(snapshot['ewma_rtt'])}, p50 {format_ms(snapshot['p50'])}, "
+        f"p95 {format_ms(snapshot['p95'])}, p99 {format_ms(snapshot['p99'])}, "
+        f"jitter {format_ms(snapshot['jitter'])}"
+    )
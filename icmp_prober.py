@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+ICMP Prober - sends ICMP echo requests directly from Python
+Avoids spawning a ping process per check and scraping its output
+"""
+
+import collections
+import heapq
+import itertools
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from probe_result import ProbeResult
+
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+ICMP_HEADER = struct.Struct("!BBHHH")
+
+# Identifiers for raw sockets, which see every ICMP reply on the host and
+# must filter by identifier (unprivileged datagram sockets are filtered by
+# the kernel, which assigns the identifier itself)
+_identifiers = itertools.count((os.getpid() * 7919) & 0xFFFF)
+_identifier_lock = threading.Lock()
+
+
+def next_identifier() -> int:
+    """Return a fresh 16-bit echo identifier"""
+    with _identifier_lock:
+        return next(_identifiers) & 0xFFFF
+
+
+def checksum(data: bytes) -> int:
+    """Compute the RFC 1071 internet checksum"""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def is_ipv6(ip_address: str) -> bool:
+    """Return True for IPv6 address literals"""
+    return ':' in ip_address
+
+
+def build_echo_request(identifier: int, sequence: int, payload: bytes = b"",
+                       ipv6: bool = False) -> bytes:
+    """Build an ICMP (or ICMPv6) echo request packet"""
+    icmp_type = ICMPV6_ECHO_REQUEST if ipv6 else ICMP_ECHO_REQUEST
+    header = ICMP_HEADER.pack(icmp_type, 0, 0, identifier, sequence)
+    if ipv6:
+        # The kernel fills in the ICMPv6 checksum (it covers a pseudo-header)
+        return header + payload
+    csum = checksum(header + payload)
+    return ICMP_HEADER.pack(icmp_type, 0, csum, identifier, sequence) + payload
+
+
+def parse_echo_reply(packet: bytes, raw: bool,
+                     ipv6: bool = False) -> Optional[Tuple[int, int]]:
+    """Return (identifier, sequence) for an echo reply, None for anything else"""
+    offset = 0
+    if raw and not ipv6:
+        # Raw IPv4 sockets deliver the IP header as well
+        offset = (packet[0] & 0x0F) * 4
+    if len(packet) < offset + ICMP_HEADER.size:
+        return None
+    icmp_type, _code, _csum, identifier, sequence = ICMP_HEADER.unpack_from(packet, offset)
+    if icmp_type != (ICMPV6_ECHO_REPLY if ipv6 else ICMP_ECHO_REPLY):
+        return None
+    return identifier, sequence
+
+
+def open_icmp_socket(ipv6: bool = False) -> Tuple[socket.socket, bool]:
+    """Open an ICMP socket, returning (socket, is_raw)
+
+    Tries an unprivileged Linux datagram socket first (allowed when the
+    user's group is inside net.ipv4.ping_group_range) and falls back to a
+    raw socket, which needs root or CAP_NET_RAW.
+    """
+    family = socket.AF_INET6 if ipv6 else socket.AF_INET
+    proto = socket.IPPROTO_ICMPV6 if ipv6 else socket.IPPROTO_ICMP
+    try:
+        return socket.socket(family, socket.SOCK_DGRAM, proto), False
+    except (PermissionError, OSError):
+        return socket.socket(family, socket.SOCK_RAW, proto), True
+
+
+def icmp_available() -> bool:
+    """Return True if this process may open ICMP sockets"""
+    try:
+        sock, _raw = open_icmp_socket()
+        sock.close()
+        return True
+    except OSError:
+        return False
+
+
+class IcmpProber:
+    """Ping hosts with ICMP echo over a socket owned by this process"""
+
+    name = "icmp"
+
+    def __init__(self, count: int = 4, timeout: float = 5, interval: float = 0.1,
+                 payload_size: int = 56):
+        self.count = max(1, int(count))
+        self.timeout = timeout
+        self.interval = interval
+        self.payload = bytes(i & 0xFF for i in range(payload_size))
+
+    def ping(self, ip_address: str, count: Optional[int] = None) -> ProbeResult:
+        """Ping a single host (count packets, default self.count) and return results"""
+        count = max(1, int(count)) if count else self.count
+        timestamp_ns = time.time_ns()
+
+        ipv6 = is_ipv6(ip_address)
+        try:
+            sock, raw = open_icmp_socket(ipv6)
+        except OSError as e:
+            return ProbeResult.failed(ip_address, f"Cannot open ICMP socket: {e}", timestamp_ns)
+
+        try:
+            rtts, sequences = self._exchange(sock, raw, ipv6, ip_address, count)
+        except OSError as e:
+            return ProbeResult.failed(ip_address, str(e), timestamp_ns)
+        finally:
+            sock.close()
+
+        return ProbeResult.from_replies(ip_address, timestamp_ns, count, rtts, sequences)
+
+    def _exchange(self, sock: socket.socket, raw: bool, ipv6: bool, ip_address: str, count: int) -> Tuple[list, list]:
+        """Send count echo requests and collect RTTs (ms) and sequence numbers of matching replies"""
+        identifier = next_identifier()
+        sent = {}
+        rtts = []
+        sequences = []
+        address = (ip_address, 0, 0, 0) if ipv6 else (ip_address, 0)
+        sock.setblocking(False)
+
+        sequence = 0
+        next_send = time.perf_counter()
+        deadline = next_send + self.timeout
+        while True:
+            now = time.perf_counter()
+            if sequence < count and now >= next_send:
+                packet = build_echo_request(identifier, sequence, self.payload, ipv6)
+                sent[sequence] = time.perf_counter_ns()
+                sock.sendto(packet, address)
+                sequence += 1
+                next_send = now + self.interval
+                # The timeout applies to the last packet sent
+                deadline = now + self.timeout
+
+            if sequence >= count and len(rtts) >= count:
+                break
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+
+            wait = deadline - now
+            if sequence < count:
+                wait = min(wait, max(0.0, next_send - now))
+            readable, _, _ = select.select([sock], [], [], wait)
+            if not readable:
+                continue
+
+            while True:
+                try:
+                    packet, source = sock.recvfrom(2048)
+                except BlockingIOError:
+                    break
+                received_ns = time.perf_counter_ns()
+                reply = parse_echo_reply(packet, raw, ipv6)
+                if reply is None:
+                    continue
+                reply_id, reply_seq = reply
+                # Datagram sockets get their identifier rewritten by the kernel
+                # and only see their own replies; raw sockets see everything
+                if raw and (reply_id != identifier or (not ipv6 and source[0] != ip_address)):
+                    continue
+                sent_ns = sent.pop(reply_seq, None)
+                if sent_ns is not None:
+                    rtts.append((received_ns - sent_ns) / 1e6)
+                    sequences.append(reply_seq)
+
+        return rtts, sequences
+
+
+class _Channel:
+    """One shared ICMP socket and its echo identifier/sequence space"""
+
+    def __init__(self, ipv6: bool):
+        self.ipv6 = ipv6
+        self.sock, self.raw = open_icmp_socket(ipv6)
+        self.sock.setblocking(False)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        except OSError:
+            pass
+        self.identifier = next_identifier()
+        self.sequence = 0
+
+    def next_key(self) -> Tuple[bool, int, int]:
+        """Allocate the (family, identifier, sequence) key for the next packet"""
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        if self.sequence == 0 and self.raw:
+            # Raw sockets choose their own identifier, so move to a fresh one
+            # rather than reusing sequence numbers that may still be pending
+            self.identifier = next_identifier()
+        return self.ipv6, self.identifier, self.sequence
+
+
+class _PendingPing:
+    """State of one multi-packet ping while its packets are outstanding"""
+
+    __slots__ = ('ip', 'ipv6', 'address', 'timestamp_ns', 'callback', 'count',
+                 'sent', 'lost', 'rtts', 'sequences', 'error')
+
+    def __init__(self, ip_address: str, callback: Callable[[ProbeResult], None], count: int):
+        self.ip = ip_address
+        self.ipv6 = is_ipv6(ip_address)
+        self.address = (ip_address, 0, 0, 0) if self.ipv6 else (ip_address, 0)
+        self.timestamp_ns = time.time_ns()
+        self.callback = callback
+        self.count = count
+        self.sent = 0
+        self.lost = 0
+        self.rtts = []
+        self.sequences = []  # packet number (0-based) of each reply in rtts
+        self.error = None
+
+
+class MultiplexIcmpProber:
+    """Ping any number of hosts through one shared ICMP socket per address family
+
+    A single reactor thread sends every echo request, matches replies back to
+    their probe through a (family, identifier, sequence) table and expires
+    lost packets from one shared timeout heap, so the cost per target is a
+    table entry rather than a socket, thread or task.
+    """
+
+    name = "multiplex"
+
+    def __init__(self, count: int = 4, timeout: float = 5, interval: float = 0.1,
+                 payload_size: int = 56, max_rate: int = 10000):
+        self.count = max(1, int(count))
+        self.timeout = timeout
+        self.interval = interval
+        self.payload = bytes(i & 0xFF for i in range(payload_size))
+        self.max_rate = max_rate
+
+        self._channels = {}
+        self._pending = {}
+        self._send_heap = []
+        self._timeout_heap = []
+        self._order = itertools.count()
+        self._incoming = collections.deque()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._closed = False
+        self._tokens = 0.0
+        self._last_refill = time.perf_counter()
+
+    def submit(self, ip_address: str, callback: Callable[[ProbeResult], None], count: Optional[int] = None):
+        """Start pinging a host; callback receives the result when done
+
+        count overrides the number of packets for this probe. The callback
+        runs on the reactor thread and should return quickly.
+        """
+        if self._closed:
+            raise RuntimeError("Prober is closed")
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="icmp-reactor",
+                                                    daemon=True)
+                    self._thread.start()
+        count = max(1, int(count)) if count else self.count
+        self._incoming.append(_PendingPing(ip_address, callback, count))
+        self._wake()
+
+    def ping(self, ip_address: str, count: Optional[int] = None) -> ProbeResult:
+        """Ping a single host and return results in the ping_host format"""
+        done = threading.Event()
+        holder = []
+
+        def on_result(result):
+            holder.append(result)
+            done.set()
+
+        self.submit(ip_address, on_result, count)
+        done.wait()
+        return holder[0]
+
+    def close(self):
+        """Stop the reactor thread and fail any probes still outstanding"""
+        self._closed = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join()
+        for channel in self._channels.values():
+            channel.sock.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+
+        unfinished = {entry[0] for entry in self._pending.values()}
+        unfinished.update(probe for _due, _order, probe in self._send_heap)
+        unfinished.update(self._incoming)
+        for probe in unfinished:
+            probe.error = probe.error or "Prober closed"
+            self._finish(probe)
+
+    def _wake(self):
+        """Interrupt the reactor's select() call"""
+        try:
+            self._wake_send.send(b"\x00")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _channel(self, ipv6: bool) -> _Channel:
+        """Return the shared socket for an address family, opening it on first use"""
+        channel = self._channels.get(ipv6)
+        if channel is None:
+            channel = _Channel(ipv6)
+            self._channels[ipv6] = channel
+        return channel
+
+    def _run(self):
+        """Reactor loop: send due packets, read replies, expire lost packets"""
+        while not self._closed:
+            now = time.perf_counter()
+            while self._incoming:
+                heapq.heappush(self._send_heap, (now, next(self._order), self._incoming.popleft()))
+            self._send_due(now)
+            self._expire(time.perf_counter())
+
+            wait = self._next_wakeup(time.perf_counter())
+            sockets = [self._wake_recv] + [channel.sock for channel in self._channels.values()]
+            readable, _, _ = select.select(sockets, [], [], wait)
+            for sock in readable:
+                if sock is self._wake_recv:
+                    try:
+                        while sock.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                else:
+                    self._receive(self._channels[sock.family == socket.AF_INET6])
+
+    def _next_wakeup(self, now: float) -> Optional[float]:
+        """Seconds until the next scheduled send or timeout (None = idle)"""
+        deadlines = []
+        if self._send_heap:
+            due = self._send_heap[0][0]
+            if self._tokens < 1:
+                due = max(due, now + (1 - self._tokens) / self.max_rate)
+            deadlines.append(due)
+        if self._timeout_heap:
+            deadlines.append(self._timeout_heap[0][0])
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+
+    def _send_due(self, now: float):
+        """Send every packet that is due, limited to max_rate packets/second"""
+        self._tokens = min(self.max_rate / 10, self._tokens + (now - self._last_refill) * self.max_rate)
+        self._last_refill = now
+        while self._send_heap and self._send_heap[0][0] <= now and self._tokens >= 1:
+            _due, _order, probe = heapq.heappop(self._send_heap)
+            try:
+                channel = self._channel(probe.ipv6)
+            except OSError as e:
+                probe.error = f"Cannot open ICMP socket: {e}"
+                probe.lost = probe.count
+                self._finish(probe)
+                continue
+
+            key = channel.next_key()
+            if key in self._pending:
+                # Sequence space wrapped onto a packet that is still pending
+                heapq.heappush(self._send_heap, (now + self.interval, next(self._order), probe))
+                continue
+
+            packet = build_echo_request(key[1], key[2], self.payload, probe.ipv6)
+            self._tokens -= 1
+            probe.sent += 1
+            try:
+                channel.sock.sendto(packet, probe.address)
+            except OSError as e:
+                probe.error = str(e)
+                probe.lost += 1
+            else:
+                self._pending[key] = (probe, probe.sent - 1, time.perf_counter_ns())
+                heapq.heappush(self._timeout_heap, (now + self.timeout, key))
+
+            if probe.sent < probe.count:
+                heapq.heappush(self._send_heap, (now + self.interval, next(self._order), probe))
+            elif probe.lost + len(probe.rtts) >= probe.count:
+                self._finish(probe)
+
+    def _receive(self, channel: _Channel):
+        """Match every queued reply on a socket back to its pending probe"""
+        while True:
+            try:
+                packet, source = channel.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            received_ns = time.perf_counter_ns()
+            reply = parse_echo_reply(packet, channel.raw, channel.ipv6)
+            if reply is None:
+                continue
+            identifier, sequence = reply
+            if not channel.raw:
+                # The kernel rewrites the identifier of datagram sockets
+                identifier = channel.identifier
+            key = (channel.ipv6, identifier, sequence)
+            entry = self._pending.get(key)
+            if entry is None:
+                continue
+            probe, number, sent_ns = entry
+            if channel.raw and not channel.ipv6 and source[0] != probe.ip:
+                continue
+            del self._pending[key]
+            probe.rtts.append((received_ns - sent_ns) / 1e6)
+            probe.sequences.append(number)
+            if probe.sent >= probe.count and probe.lost + len(probe.rtts) >= probe.count:
+                self._finish(probe)
+
+    def _expire(self, now: float):
+        """Count packets whose timeout has passed as lost"""
+        while self._timeout_heap and self._timeout_heap[0][0] <= now:
+            _deadline, key = heapq.heappop(self._timeout_heap)
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                continue  # Already answered
+            probe = entry[0]
+            probe.lost += 1
+            if probe.sent >= probe.count and probe.lost + len(probe.rtts) >= probe.count:
+                self._finish(probe)
+
+    def _finish(self, probe: _PendingPing):
+        """Build the result of a completed probe and hand it to its callback"""
+        result = ProbeResult.from_replies(probe.ip, probe.timestamp_ns, probe.count, probe.rtts,
+                                          probe.sequences, probe.error)
+        try:
+            probe.callback(result)
+        except Exception:
+            pass
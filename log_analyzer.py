@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Log Analyzer - per-host uptime, outages and latency from PingTest log files
+Streams plain (memory-mapped) or gzip-compressed logs line by line, so input
+size is bounded only by disk, and analyzes many files in a process pool
+"""
+
+import argparse
+import datetime
+import glob
+import gzip
+import json
+import mmap
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Result lines written by PingTest.log_ping_result, e.g.
+# "2024-01-15 14:30:25,123 - INFO - Ping to Google DNS (8.8.8.8): SUCCESS - Response time: 12.34ms, Packet loss: 0.0%"
+# "2024-01-15 14:30:30,456 - ERROR - Ping to 192.168.1.1: FAILED - Request timed out"
+# Lines are bytes; RESULT_MARKER is found first so other lines are skipped
+# without running the regex.
+RESULT_MARKER = b' - Ping to '
+RESULT_LINE = re.compile(
+    rb'Ping to (.+?): (?:SUCCESS - Response time: ([\d.]+)ms|FAILED - )'
+)
+# "2024-01-15 14:30:25,123" - fixed width, so timestamps compare as strings
+TIMESTAMP_LENGTH = 23
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+
+
+def iter_lines(path: str) -> Iterator[bytes]:
+    """Yield the lines of a log file without reading it all into memory"""
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rb') as f:
+            yield from f
+        return
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter(mapped.readline, b'')
+
+
+def iter_results(lines: Iterable[bytes]) -> Iterator[Tuple[str, str, Optional[float]]]:
+    """Yield (timestamp, host, response time or None if failed) for each result line"""
+    for line in lines:
+        marker = line.find(RESULT_MARKER, TIMESTAMP_LENGTH)
+        if marker < 0:
+            continue
+        match = RESULT_LINE.match(line, marker + 3)
+        if match is None:
+            continue
+        rtt = match.group(2)
+        yield (
+            line[:TIMESTAMP_LENGTH].decode('ascii', 'replace'),
+            match.group(1).decode('utf-8', 'replace'),
+            float(rtt) if rtt is not None else None
+        )
+
+
+def host_key(display_text: str) -> Tuple[str, str]:
+    """Split "name (ip)" into (ip, name); a bare IP has no name"""
+    if display_text.endswith(')') and ' (' in display_text:
+        name, ip = display_text[:-1].rsplit(' (', 1)
+        return ip, name
+    return display_text, ""
+
+
+def summarize(results: Iterable[Tuple[str, str, Optional[float]]]) -> Dict:
+    """Reduce a result stream to per-host counts, state changes and an RTT histogram
+
+    The summary only grows with the number of hosts, state changes and
+    distinct RTT values (logged with two decimals), not with the number of
+    lines, and summaries of different files can be merged.
+    """
+    hosts = {}
+    for timestamp, display_text, rtt in results:
+        host = hosts.get(display_text)
+        if host is None:
+            host = hosts[display_text] = {
+                'probes': 0,
+                'successes': 0,
+                'first': timestamp,
+                'last': timestamp,
+                'changes': [],
+                'rtts': Counter()
+            }
+        up = rtt is not None
+        host['probes'] += 1
+        host['last'] = timestamp
+        if up:
+            host['successes'] += 1
+            host['rtts'][rtt] += 1
+        changes = host['changes']
+        if not changes or changes[-1][1] != up:
+            changes.append((timestamp, up))
+    return hosts
+
+
+def analyze_file(path: str) -> Tuple[str, Dict]:
+    """Summarize one log file"""
+    return path, summarize(iter_results(iter_lines(path)))
+
+
+def expand_paths(paths: List[str]) -> List[str]:
+    """Expand directories and glob patterns to log files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "*.log")))
+            files.extend(glob.glob(os.path.join(path, "*.log.gz")))
+        elif any(char in path for char in '*?['):
+            files.extend(glob.glob(path))
+        else:
+            files.append(path)
+    return sorted(set(files))
+
+
+def analyze_files(paths: List[str], workers: int = 0) -> Dict:
+    """Summarize log files, in a process pool when there are several, and merge them"""
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if len(paths) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            summaries = list(pool.map(analyze_file, paths))
+    else:
+        summaries = [analyze_file(path) for path in paths]
+
+    # Merge in time order; each file is one session, in order of its first result
+    def first_timestamp(item):
+        return min((host['first'] for host in item[1].values()), default="")
+
+    merged = {}
+    for _, summary in sorted(summaries, key=first_timestamp):
+        for display_text, host in summary.items():
+            ip, name = host_key(display_text)
+            total = merged.get(ip)
+            if total is None:
+                merged[ip] = dict(host, name=name, changes=list(host['changes']))
+                continue
+            total['probes'] += host['probes']
+            total['successes'] += host['successes']
+            total['first'] = min(total['first'], host['first'])
+            total['last'] = max(total['last'], host['last'])
+            total['rtts'].update(host['rtts'])
+            total['name'] = name or total['name']
+            for change in host['changes']:
+                if total['changes'][-1][1] != change[1]:
+                    total['changes'].append(change)
+    return merged
+
+
+def parse_timestamp(timestamp: str) -> datetime.datetime:
+    """Parse a log timestamp"""
+    return datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+
+
+def outage_windows(host: Dict) -> List[Dict]:
+    """Return the periods between a failed result and the next successful one"""
+    outages = []
+    start = None
+    for timestamp, up in host['changes']:
+        if not up:
+            start = timestamp
+        elif start is not None:
+            outages.append({'start': start, 'end': timestamp, 'ongoing': False})
+            start = None
+    if start is not None:
+        outages.append({'start': start, 'end': host['last'], 'ongoing': True})
+    for outage in outages:
+        duration = parse_timestamp(outage['end']) - parse_timestamp(outage['start'])
+        outage['duration'] = duration.total_seconds()
+    return outages
+
+
+def percentiles(rtts: Counter, quantiles=(0.5, 0.95, 0.99)) -> List[Optional[float]]:
+    """Exact percentiles from an RTT histogram (nearest rank)"""
+    total = sum(rtts.values())
+    if total == 0:
+        return [None for _ in quantiles]
+    values = []
+    ordered = sorted(rtts.items())
+    for q in quantiles:
+        rank = max(1, int(q * total + 0.999999))
+        seen = 0
+        for rtt, count in ordered:
+            seen += count
+            if seen >= rank:
+                values.append(rtt)
+                break
+    return values
+
+
+def host_report(ip: str, host: Dict) -> Dict:
+    """Build the report entry for one host"""
+    p50, p95, p99 = percentiles(host['rtts'])
+    rtt_count = sum(host['rtts'].values())
+    outages = outage_windows(host)
+    return {
+        'ip': ip,
+        'name': host['name'],
+        'probes': host['probes'],
+        'successes': host['successes'],
+        'uptime': host['successes'] / host['probes'] * 100 if host['probes'] else 0.0,
+        'first': host['first'],
+        'last': host['last'],
+        'rtt_min': min(host['rtts']) if rtt_count else None,
+        'rtt_avg': sum(rtt * count for rtt, count in host['rtts'].items()) / rtt_count if rtt_count else None,
+        'rtt_max': max(host['rtts']) if rtt_count else None,
+        'p50': p50,
+        'p95': p95,
+        'p99': p99,
+        'outages': outages,
+        'downtime': sum(outage['duration'] for outage in outages)
+    }
+
+
+def format_ms(value: Optional[float]) -> str:
+    """Format a millisecond value for the report"""
+    return "n/a" if value is None else f"{value:.2f}ms"
+
+
+def print_report(reports: List[Dict], file_count: int, show_outages: bool = True):
+    """Print a human-readable report"""
+    print(f"Analyzed {file_count} log files, {sum(r['probes'] for r in reports)} results, {len(reports)} hosts")
+    for report in reports:
+        label = f"{report['name']} ({report['ip']})" if report['name'] else report['ip']
+        print("-" * 50)
+        print(f"{label}: {report['probes']} probes from {report['first']} to {report['last']}")
+        print(f"  Uptime: {report['uptime']:.3f}%, {len(report['outages'])} outages, "
+              f"{report['downtime']:.1f}s down")
+        print(f"  Latency: min {format_ms(report['rtt_min'])}, avg {format_ms(report['rtt_avg'])}, "
+              f"max {format_ms(report['rtt_max'])}, p50 {format_ms(report['p50'])}, "
+              f"p95 {format_ms(report['p95'])}, p99 {format_ms(report['p99'])}")
+        if show_outages:
+            for outage in report['outages']:
+                end = "ongoing at end of log" if outage['ongoing'] else outage['end']
+                print(f"  Outage: {outage['start']} - {end} ({outage['duration']:.1f}s)")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function"""
+    parser = argparse.ArgumentParser(prog='pingtest.py analyze',
+                                     description='Analyze PingTest log files')
+    parser.add_argument('paths', nargs='*', default=['.'],
+                        help='Log files, directories or glob patterns (default: current directory)')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='Worker processes for multiple files (default: CPU count)')
+    parser.add_argument('--host', help='Only report this IP address')
+    parser.add_argument('--no-outages', action='store_true', help='Do not list individual outages')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.paths)
+    if not paths:
+        print("No log files found")
+        sys.exit(1)
+
+    merged = analyze_files(paths, args.workers)
+    reports = [host_report(ip, host) for ip, host in sorted(merged.items())
+               if args.host is None or ip == args.host]
+
+    if args.json:
+        json.dump({'files': paths, 'hosts': reports}, sys.stdout, indent=4)
+        print()
+    else:
+        print_report(reports, len(paths), show_outages=not args.no_outages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Log Pipeline - non-blocking, batched log output for PingTest
+Records are queued by the probing code and written by a background thread,
+which flushes once per batch and rotates/compresses log segments
+"""
+
+import datetime
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from typing import List, Optional
+
+
+def timestamped_name(base_log_file: str, when: Optional[datetime.datetime] = None) -> str:
+    """Return base_log_file with a _YYYYMMDD_HHMMSS timestamp before its extension"""
+    timestamp = (when or datetime.datetime.now()).strftime("%Y%m%d_%H%M%S")
+    if '.' in base_log_file:
+        name_part, ext_part = base_log_file.rsplit('.', 1)
+        return f"{name_part}_{timestamp}.{ext_part}"
+    return f"{base_log_file}_{timestamp}"
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """Stream handler that leaves flushing to the batching listener"""
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class SegmentRotatingFileHandler(logging.FileHandler):
+    """File handler that starts a new timestamped segment by size or age
+
+    Closed segments are optionally gzip-compressed, and only the newest
+    backup_count closed segments of this session are kept, so indefinite
+    runs use bounded disk space. With prune_earlier the segments earlier
+    runs with the same base name left behind count towards backup_count
+    too and may be deleted at startup; it is off by default because those
+    are the user's old logs (and another instance may still be writing
+    one). Like BufferedStreamHandler it does not flush per record.
+    """
+
+    def __init__(self, base_log_file: str, max_bytes: int = 0, rotate_interval: float = 0,
+                 backup_count: int = 0, compress: bool = False, prune_earlier: bool = False):
+        self.base_log_file = base_log_file
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.closed_segments = self._existing_segments() if prune_earlier else []
+        self._prune()
+        self.current_file = self._new_segment_name()
+        self.bytes_written = 0
+        self.opened_at = time.monotonic()
+        super().__init__(self.current_file)
+
+    def _new_segment_name(self) -> str:
+        """Return an unused timestamped file name for a new segment"""
+        name = timestamped_name(self.base_log_file)
+        candidate, counter = name, 1
+        while os.path.exists(candidate) or os.path.exists(candidate + '.gz'):
+            root, ext = os.path.splitext(name)
+            candidate = f"{root}_{counter}{ext}"
+            counter += 1
+        return candidate
+
+    def _existing_segments(self) -> List[str]:
+        """Return the segments of earlier runs with the same base name, oldest first"""
+        template = timestamped_name(self.base_log_file, datetime.datetime(2000, 1, 1))
+        prefix, suffix = template.rsplit("20000101_000000", 1)
+        directory = os.path.dirname(prefix)
+        # name_YYYYMMDD_HHMMSS[_N].ext[.gz], see _new_segment_name and _compress
+        pattern = re.compile(re.escape(os.path.basename(prefix)) + r"(\d{8}_\d{6})(?:_(\d+))?"
+                             + re.escape(suffix) + r"(?:\.gz)?$")
+        try:
+            entries = os.listdir(directory or '.')
+        except OSError:
+            return []
+        segments = []
+        for entry in entries:
+            match = pattern.match(entry)
+            if match:
+                segments.append((match.group(1), int(match.group(2) or 0), os.path.join(directory, entry)))
+        return [path for _timestamp, _counter, path in sorted(segments)]
+
+    def should_rotate(self, size: int) -> bool:
+        """Return True if writing size more characters should start a new segment"""
+        if self.bytes_written == 0:
+            return False
+        if self.max_bytes and self.bytes_written + size > self.max_bytes:
+            return True
+        if self.rotate_interval and time.monotonic() - self.opened_at >= self.rotate_interval:
+            return True
+        return False
+
+    def rotate(self):
+        """Close the current segment and continue in a new one"""
+        closed = self.current_file
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        self.current_file = self._new_segment_name()
+        self.baseFilename = os.path.abspath(self.current_file)
+        self.stream = self._open()
+        self.bytes_written = 0
+        self.opened_at = time.monotonic()
+
+        if self.compress:
+            closed = self._compress(closed)
+        self.closed_segments.append(closed)
+        self._prune()
+
+    def _prune(self):
+        """Delete the oldest closed segments beyond backup_count"""
+        while self.backup_count and len(self.closed_segments) > self.backup_count:
+            try:
+                os.remove(self.closed_segments.pop(0))
+            except OSError:
+                pass
+
+    def _compress(self, path: str) -> str:
+        """Gzip a closed segment, returning the path that now holds it"""
+        try:
+            with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.remove(path)
+            return path + '.gz'
+        except OSError:
+            return path
+
+    def emit(self, record):
+        try:
+            message = self.format(record) + self.terminator
+            if self.should_rotate(len(message)):
+                self.rotate()
+            self.stream.write(message)
+            self.bytes_written += len(message)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingQueueListener:
+    """Background writer that drains a log queue in batches
+
+    Each batch of records is handed to every handler and then the handlers
+    are flushed once, instead of once per record.
+    """
+
+    _sentinel = None
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler],
+                 batch_size: int = 512):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self):
+        """Start the writer thread"""
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write out everything queued so far and stop the writer thread"""
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self):
+        """Writer loop"""
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for record in batch:
+                if record is self._sentinel:
+                    stopping = True
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+
+            for handler in self.handlers:
+                try:
+                    handler.flush()
+                except Exception:
+                    pass
+
+
+class LogPipeline:
+    """Queue-backed logging: callers only enqueue, a background thread writes"""
+
+    def __init__(self, handlers: List[logging.Handler], batch_size: int = 512):
+        self.queue = queue.Queue()
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        # The writer's handlers do the real formatting
+        self.queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        self.listener = BatchingQueueListener(self.queue, handlers, batch_size)
+
+    def start(self):
+        """Start writing queued records"""
+        self.listener.start()
+
+    def stop(self):
+        """Flush and close all handlers"""
+        self.listener.stop()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter - Prometheus endpoint for PingTest
+The exposition body is rendered once per cycle into a bytes buffer; scrapes
+only send the current buffer, so they cost the same however many hosts there are
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name -> (type, help text)
+METRICS = {
+    "pingtest_up": ("gauge", "Whether the last probe of the host succeeded (1) or failed (0)"),
+    "pingtest_rtt_seconds": ("gauge", "Response time of the last successful probe"),
+    "pingtest_rtt_average_seconds": ("gauge", "Average response time over the statistics window"),
+    "pingtest_rtt_ewma_seconds": ("gauge", "Exponentially weighted average response time"),
+    "pingtest_rtt_quantile_seconds": ("gauge", "Streaming percentile estimate of recent individual reply times"),
+    "pingtest_jitter_seconds": ("gauge", "Smoothed difference between the response times of successive replies"),
+    "pingtest_packet_loss_ratio": ("gauge", "Fraction of packets lost over the statistics window"),
+    "pingtest_probes_total": ("counter", "Probes completed"),
+    "pingtest_probe_failures_total": ("counter", "Probes that failed"),
+    "pingtest_replies_total": ("counter", "Individual replies received (response time samples)"),
+    "pingtest_overruns_total": ("counter", "Probes dropped because the previous probe was still running"),
+    "pingtest_skipped_total": ("counter", "Probe cycles skipped because the loop fell behind"),
+}
+
+# snapshot key -> quantile label
+QUANTILES = (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99"))
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def seconds(milliseconds: Optional[float]) -> Optional[float]:
+    """Convert milliseconds to seconds, keeping None"""
+    return None if milliseconds is None else milliseconds / 1000
+
+
+class MetricsExporter:
+    """Serves a pre-rendered Prometheus text exposition over HTTP"""
+
+    def __init__(self, port: int, address: str = "0.0.0.0"):
+        self.port = port
+        self.address = address
+        self.body = b""
+        self._labels = {}
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Start serving from a background thread"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = exporter.body  # one reference read; update() swaps the whole buffer
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # scrapes would flood the ping log
+
+        self._server = ThreadingHTTPServer((self.address, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def labels(self, ip_address: str, name: str, cached: Dict[Tuple[str, str], str]) -> str:
+        """Return the label set for a host, reusing the one rendered last time and keeping it for next time"""
+        key = (ip_address, name)
+        labels = cached.get(key)
+        if labels is None:
+            labels = f'ip="{escape_label(ip_address)}",name="{escape_label(name)}"'
+        self._labels[key] = labels
+        return labels
+
+    def update(self, snapshots: Iterable[Tuple[str, Dict]], names: Dict[str, str],
+               overruns: Optional[Dict[str, int]] = None, skipped: Optional[Dict[str, int]] = None):
+        """Render the exposition body from host snapshots and swap it in"""
+        overruns = overruns or {}
+        skipped = skipped or {}
+        samples = {name: [] for name in METRICS}
+        # Start an empty cache so removed or renamed hosts drop out of it
+        cached, self._labels = self._labels, {}
+        for ip, snapshot in snapshots:
+            labels = self.labels(ip, names.get(ip, ""), cached)
+            if snapshot['up'] is not None:
+                samples["pingtest_up"].append(f"pingtest_up{{{labels}}} {int(snapshot['up'])}")
+            for metric, value in (("pingtest_rtt_seconds", seconds(snapshot['last_rtt'])),
+                                  ("pingtest_rtt_average_seconds", seconds(snapshot['avg_rtt'])),
+                                  ("pingtest_rtt_ewma_seconds", seconds(snapshot['ewma_rtt'])),
+                                  ("pingtest_jitter_seconds", seconds(snapshot['jitter']))):
+                if value is not None:
+                    samples[metric].append(f"{metric}{{{labels}}} {value!r}")
+            for key, quantile in QUANTILES:
+                value = seconds(snapshot[key])
+                if value is not None:
+                    samples["pingtest_rtt_quantile_seconds"].append(
+                        f'pingtest_rtt_quantile_seconds{{{labels},quantile="{quantile}"}} {value!r}'
+                    )
+            samples["pingtest_packet_loss_ratio"].append(
+                f"pingtest_packet_loss_ratio{{{labels}}} {snapshot['loss_ratio']!r}"
+            )
+            samples["pingtest_probes_total"].append(f"pingtest_probes_total{{{labels}}} {snapshot['probes']}")
+            samples["pingtest_probe_failures_total"].append(
+                f"pingtest_probe_failures_total{{{labels}}} {snapshot['failures']}"
+            )
+            samples["pingtest_replies_total"].append(f"pingtest_replies_total{{{labels}}} {snapshot['replies']}")
+            samples["pingtest_overruns_total"].append(f"pingtest_overruns_total{{{labels}}} {overruns.get(ip, 0)}")
+            samples["pingtest_skipped_total"].append(f"pingtest_skipped_total{{{labels}}} {skipped.get(ip, 0)}")
+
+        lines = []
+        for metric, (metric_type, help_text) in METRICS.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            lines.extend(samples[metric])
+        self.body = ("\n".join(lines) + "\n").encode('utf-8')
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Ping Parser - extracts statistics from system ping command output
+Handles Linux (iputils), BusyBox, macOS/BSD and Windows ping formats
+"""
+
+import itertools
+import platform
+import re
+from typing import Dict
+
+
+# Detected once at import; ping_host uses it for the command line too
+IS_WINDOWS = platform.system().lower() == "windows"
+
+# Patterns start with literal text where possible so the regex engine can
+# skip ahead instead of attempting a match at every position.
+
+# Linux / BusyBox / macOS
+# "64 bytes from 8.8.8.8: icmp_seq=1 ttl=117 time=12.3 ms" (BusyBox: "seq=0")
+UNIX_REPLY = re.compile(r'seq=(\d+) [^\n]*?time[=<]([\d.]+) ?ms')
+# "2 packets transmitted, 2 received, ..." (BusyBox/macOS: "2 packets received"),
+# matched at the start of the line found by searching for UNIX_PACKETS_MARKER
+UNIX_PACKETS_MARKER = ' packets transmitted'
+UNIX_PACKETS = re.compile(r'(\d+) packets transmitted, (\d+) (?:packets )?received')
+# "rtt min/avg/max/mdev = 1/2/3/0.5 ms", "round-trip min/avg/max = 1/2/3 ms",
+# "round-trip min/avg/max/stddev = 1/2/3/0.5 ms"
+UNIX_SUMMARY = re.compile(
+    r'min/avg/max(?:/(?:mdev|stddev))? = '
+    r'([\d.]+)/([\d.]+)/([\d.]+)(?:/([\d.]+))? ?ms'
+)
+
+# Windows
+# "Reply from 8.8.8.8: bytes=32 time=12ms TTL=117" ("time<1ms" below 1 ms)
+WINDOWS_REPLY = re.compile(r'time([=<])(\d+)ms')
+# "Packets: Sent = 2, Received = 2, Lost = 0 (0% loss),"
+WINDOWS_PACKETS = re.compile(r'Sent\s*=\s*(\d+),\s*Received\s*=\s*(\d+)')
+# "Minimum = 12ms, Maximum = 13ms, Average = 12ms"
+WINDOWS_SUMMARY = re.compile(
+    r'Minimum\s*=\s*(\d+)ms,\s*Maximum\s*=\s*(\d+)ms,\s*Average\s*=\s*(\d+)ms'
+)
+
+
+def empty_stats() -> Dict:
+    """Return a statistics dict with nothing parsed"""
+    return {
+        'transmitted': None,
+        'received': None,
+        'packet_loss': None,
+        'rtt_min': None,
+        'rtt_avg': None,
+        'rtt_max': None,
+        'rtt_mdev': None,
+        'rtts': [],
+        'sequences': []
+    }
+
+
+def parse_unix(output: str) -> Dict:
+    """Parse Linux iputils, BusyBox or macOS/BSD ping output"""
+    stats = empty_stats()
+    for match in UNIX_REPLY.finditer(output):
+        stats['sequences'].append(int(match.group(1)))
+        stats['rtts'].append(float(match.group(2)))
+
+    marker = output.find(UNIX_PACKETS_MARKER)
+    if marker >= 0:
+        packets = UNIX_PACKETS.match(output, output.rfind('\n', 0, marker) + 1)
+        if packets:
+            _set_packets(stats, int(packets.group(1)), int(packets.group(2)))
+
+    summary = UNIX_SUMMARY.search(output)
+    if summary:
+        stats['rtt_min'] = float(summary.group(1))
+        stats['rtt_avg'] = float(summary.group(2))
+        stats['rtt_max'] = float(summary.group(3))
+        if summary.group(4) is not None:
+            stats['rtt_mdev'] = float(summary.group(4))
+
+    _fill_from_replies(stats)
+    return stats
+
+
+def parse_windows(output: str) -> Dict:
+    """Parse Windows ping output
+
+    Windows prints no sequence numbers, but every echo request gets one line
+    after the "Pinging ..." header - a reply or a failure such as "Request
+    timed out." or "Destination host unreachable." - up to the blank line
+    before the statistics, so a reply's sequence number is its line's position.
+    """
+    stats = empty_stats()
+    for sequence, line in enumerate(itertools.takewhile(str.strip, output.strip().splitlines()[1:])):
+        match = WINDOWS_REPLY.search(line)
+        if match:
+            stats['sequences'].append(sequence)
+            rtt = float(match.group(2))
+            # "time<1ms" is only an upper bound; take the middle of the range instead of the bound
+            stats['rtts'].append(rtt / 2 if match.group(1) == '<' else rtt)
+
+    packets = WINDOWS_PACKETS.search(output)
+    if packets:
+        _set_packets(stats, int(packets.group(1)), int(packets.group(2)))
+
+    # The summary rounds to whole milliseconds (a "time<1ms" host averages 0ms),
+    # so it is only used when no reply line could be read
+    summary = None if stats['rtts'] else WINDOWS_SUMMARY.search(output)
+    if summary:
+        stats['rtt_min'] = float(summary.group(1))
+        stats['rtt_max'] = float(summary.group(2))
+        stats['rtt_avg'] = float(summary.group(3))
+
+    _fill_from_replies(stats)
+    return stats
+
+
+def parse_ping_output(output: str, windows: bool = IS_WINDOWS) -> Dict:
+    """Parse ping output in this platform's format (or the one requested)"""
+    if windows:
+        return parse_windows(output)
+    return parse_unix(output)
+
+
+def _set_packets(stats: Dict, transmitted: int, received: int):
+    """Record packet counts and the resulting loss percentage"""
+    stats['transmitted'] = transmitted
+    stats['received'] = received
+    if transmitted > 0:
+        stats['packet_loss'] = ((transmitted - received) / transmitted) * 100
+
+
+def _fill_from_replies(stats: Dict):
+    """Derive missing summary values from the per-reply RTTs"""
+    rtts = stats['rtts']
+    if not rtts or stats['rtt_avg'] is not None:
+        return
+    average = sum(rtts) / len(rtts)
+    stats['rtt_min'] = min(rtts)
+    stats['rtt_avg'] = average
+    stats['rtt_max'] = max(rtts)
+    stats['rtt_mdev'] = (sum((rtt - average) ** 2 for rtt in rtts) / len(rtts)) ** 0.5
@@ -6,25 +6,186 @@ Sends pings to multiple IP addresses at set intervals and logs results
 
 import subprocess
 import time
+import atexit
 import datetime
+import itertools
 import logging
 import json
 import os
 import sys
-from typing import List, Dict, Optional
-import platform
+from typing import List, Dict, Optional, Callable, Iterable, Iterator, Tuple
+import queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from adaptive import AdaptiveController
+from collector import DEFAULT_PORT as DEFAULT_COLLECTOR_PORT, AgentShipper, CollectorServer, parse_address
+from config_watcher import ConfigWatcher
+from fping_prober import FpingProber
+from host_stats import StatsEngine, format_summary
+from host_state import DEGRADED, DOWN, UP, HostStateTracker, format_duration
+from icmp_prober import IcmpProber, MultiplexIcmpProber, icmp_available
+from log_pipeline import BufferedStreamHandler, LogPipeline, SegmentRotatingFileHandler
+from metrics_exporter import MetricsExporter
+from result_store import ResultStore
+from resolver import CacheEntry, Resolver
+from result_stream import DEFAULT_PORT as DEFAULT_STREAM_PORT, ResultPublisher
+from ping_parser import IS_WINDOWS, parse_ping_output
+from probe_result import STATUS_TIMEOUT, ProbeResult
+from profiler import ProfileCapture, StageTimers
+from scheduler import ProbeScheduler
+from service_prober import ServiceProber, ServiceTarget, parse_service
+from sharding import WorkerPool, from_record, shard_of, to_record
+from targets import TargetSet
+
+
+class SweepEngine:
+    """Bounded worker pool that probes many hosts concurrently
+    
+    Blocking probe functions run on a thread pool. Probers that multiplex
+    their own I/O pass a non-blocking submit(ip, callback) instead, and the
+    limit then caps pending probes rather than threads. Probers that handle
+    a whole batch of hosts in one go (one fping process) pass batch(ips).
+    """
+
+    def __init__(self, probe: Callable[[str], ProbeResult], max_in_flight: int = 64,
+                 submit: Optional[Callable[[str, Callable[[ProbeResult], None]], None]] = None,
+                 batch: Optional[Callable[[List[str]], Iterator[ProbeResult]]] = None):
+        self.probe = probe
+        self.submit = submit
+        self.batch = batch
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                           thread_name_prefix="probe")
+
+    def sweep(self, ip_addresses: Iterable[str],
+              on_submit: Optional[Callable[[str], None]] = None) -> Iterator[ProbeResult]:
+        """Probe every host concurrently, yielding results as they complete
+
+        At most max_in_flight probes are pending at any time, so the input
+        iterable is consumed lazily and the sweep takes roughly as long as
+        the slowest probe rather than the sum of all of them.
+        """
+        if self.submit is not None:
+            yield from self._sweep_submit(ip_addresses, on_submit)
+            return
+        if self.batch is not None:
+            # Batches of at most max_in_flight hosts, so large blocks are still generated lazily
+            addresses = iter(ip_addresses)
+            while True:
+                chunk = list(itertools.islice(addresses, self.max_in_flight))
+                if not chunk:
+                    return
+                if on_submit:
+                    for ip in chunk:
+                        on_submit(ip)
+                yield from self.batch(chunk)
+        
+        pending = set()
+        for ip in ip_addresses:
+            if len(pending) >= self.max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            if on_submit:
+                on_submit(ip)
+            pending.add(self.executor.submit(self.probe, ip))
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    def start(self, ip_address: str, callback: Callable[[ProbeResult], None]):
+        """Start probing one host without waiting; callback receives the result"""
+        if self.submit is not None:
+            self.submit(ip_address, callback)
+        else:
+            future = self.executor.submit(self.probe, ip_address)
+            future.add_done_callback(lambda f: callback(f.result()))
+
+    def start_many(self, ip_addresses: List[str], callback: Callable[[ProbeResult], None],
+                   on_submit: Optional[Callable[[str], None]] = None):
+        """Start probing several hosts without waiting (one job for batch probers)"""
+        if on_submit:
+            for ip in ip_addresses:
+                on_submit(ip)
+        if self.batch is not None:
+            if ip_addresses:
+                self.executor.submit(self._run_batch, list(ip_addresses), callback)
+            return
+        for ip in ip_addresses:
+            self.start(ip, callback)
+
+    def _run_batch(self, ip_addresses: List[str], callback: Callable[[ProbeResult], None]):
+        """Run one batch probe, handing each result to the callback as it arrives"""
+        for result in self.batch(ip_addresses):
+            callback(result)
+
+    def _sweep_submit(self, ip_addresses: Iterable[str],
+                      on_submit: Optional[Callable[[str], None]]) -> Iterator[ProbeResult]:
+        """Sweep through a non-blocking prober, collecting results from its callbacks"""
+        completed = queue.Queue()
+        in_flight = 0
+        for ip in ip_addresses:
+            while in_flight >= self.max_in_flight:
+                yield completed.get()
+                in_flight -= 1
+            if on_submit:
+                on_submit(ip)
+            self.submit(ip, completed.put)
+            in_flight += 1
+        
+        while in_flight:
+            yield completed.get()
+            in_flight -= 1
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self.executor.shutdown(wait=True)
 
 
 class PingTest:
-    def __init__(self, config_file: str = "config.json"):
-        """Initialize PingTest with configuration"""
+    # Settings a running ping test picks up when the config file changes
+    RELOADABLE = ("ip_addresses", "host_settings", "ping_interval", "ping_count", "timeout",
+                  "stagger", "text_results", "stats_summary", "log_transitions", "state_change_after",
+                  "degraded_loss", "degraded_rtt", "recovery_ratio")
+    
+    def __init__(self, config_file: str = "config.json", config: Optional[Dict] = None,
+                 shard: Optional[Tuple[int, int]] = None):
+        """Initialize PingTest with configuration
+        
+        Worker processes (--workers) pass the coordinator's config and their
+        shard (index, number of workers) and leave logging to the coordinator.
+        """
         self.config_file = config_file
-        self.config = self.load_config()
-        self.setup_logging()
+        self.shard = shard
+        self.config = config if config is not None else self.load_config()
+        self.overrides = set()  # config keys set on the command line; reloads leave them alone
+        if shard is None:
+            self.setup_logging()
+        else:
+            self.logger = logging.getLogger(__name__)
+        self.targets = self.load_targets()
+        self.prober = self.create_prober()
+        self.services = ServiceProber(self.config['ping_count'], self.config['timeout'])  # tcp/udp/http probes
+        self.resolver = Resolver(self.config['dns_ttl'], self.config['dns_negative_ttl'], self.config['timeout'])
+        self.resolved = {}   # host name target -> address of its latest result
+        self.engine = self.create_engine()
+        self.stats = StatsEngine(self.config['stats_window'], samples=self.config['stats_samples'],
+                                 quantile_window=self.config['stats_quantile_window'])
+        self.store = ResultStore(self.config['result_store']) if self.config['result_store'] else None
+        self.metrics = None
+        self.stream = None   # ResultPublisher when --stream is given
+        self.agent = None    # AgentShipper when --agent is given
+        self.timers = None   # StageTimers when --profile is given
+        self.capture = None  # ProfileCapture when --capture is given
+        self.adaptive = None # AdaptiveController while run_ping_test runs in adaptive mode
+        self.states = None   # HostStateTracker when log_transitions is set
+        self.setup_states()
         
-    def load_config(self) -> Dict:
-        """Load configuration from JSON file"""
-        default_config = {
+    def default_config(self) -> Dict:
+        """Return the default configuration"""
+        return {
             "ip_addresses": {
                 "8.8.8.8": "Google DNS",
                 "1.1.1.1": "Cloudflare DNS",
@@ -34,27 +195,46 @@ class PingTest:
             "ping_count": 4,      # number of pings per check
             "timeout": 5,         # timeout in seconds
             "log_file": "pingtest.log",
-            "total_runtime": 0    # total runtime in seconds (0 = run indefinitely)
+            "log_max_bytes": 10485760,     # start a new log segment after this many bytes (0 = no limit)
+            "log_rotate_interval": 86400,  # start a new log segment after this many seconds (0 = never)
+            "log_backup_count": 30,        # closed log segments to keep per session (0 = keep all)
+            "log_prune_earlier": False,    # count earlier runs' log segments towards log_backup_count (deletes them)
+            "log_compress": True,          # gzip closed log segments
+            "total_runtime": 0,   # total runtime in seconds (0 = run indefinitely)
+            "max_concurrent": 64, # maximum number of probes in flight at once
+            "backend": "auto",    # "icmp", "multiplex", "fping", "subprocess" or "auto" (icmp when permitted)
+            "fping_path": "fping",  # fping executable used by the fping backend
+            "ping_path": "ping",    # ping executable used by the subprocess backend
+            "stagger": True,      # spread probe times evenly across each interval
+            "host_settings": {},  # per-host overrides, e.g. {"192.168.1.1": {"interval": 5, "count": 2}}
+            "adaptive": False,    # adjust each host's interval and ping count from its recent results
+            "adaptive_min_interval": 5,    # shortest interval for degraded hosts (seconds)
+            "adaptive_max_interval": 600,  # longest backoff interval for down hosts (seconds)
+            "adaptive_max_count": 10,      # most pings per check for degraded hosts
+            "stats_window": 100,  # number of recent results per host for loss/average statistics
+            "stats_samples": 1000,  # number of recent per-packet RTTs kept per host (8 bytes each)
+            "stats_quantile_window": 1000,  # number of recent replies the p50/p95/p99 cover (0 = whole session)
+            "stats_summary": True,# log per-host statistics after each cycle and at exit
+            "result_store": "",   # directory for the binary result store ("" = disabled)
+            "text_results": True, # log every probe result as text (false = result store only)
+            "log_transitions": False,     # log only host state changes (UP/DEGRADED/DOWN) and a summary per cycle
+            "state_change_after": 2,      # consecutive results needed to change a host's state
+            "degraded_loss": 10,          # packet loss (%) at which a host is degraded (0 = ignore loss)
+            "degraded_rtt": 0,            # response time (ms) at which a host is degraded (0 = ignore response time)
+            "recovery_ratio": 0.5,        # degraded hosts are up again below this fraction of the thresholds
+            "dns_ttl": 300,               # seconds to cache a host name's address when its DNS TTL is unknown
+            "dns_negative_ttl": 30,       # seconds to cache a failed host name lookup
+            "config_reload": True,        # apply changes to the config file while running
+            "config_check_interval": 2    # seconds between checks of the config file for changes
         }
+    
+    def load_config(self) -> Dict:
+        """Load configuration from JSON file"""
+        default_config = self.default_config()
         
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    
-                    # Handle legacy config format (convert list of IPs to dict format)
-                    if "ip_addresses" in config and isinstance(config["ip_addresses"], list):
-                        # Convert old format to new format
-                        old_ips = config["ip_addresses"]
-                        config["ip_addresses"] = {}
-                        for ip in old_ips:
-                            config["ip_addresses"][ip] = ""
-                    
-                    # Merge with defaults for any missing keys
-                    for key, value in default_config.items():
-                        if key not in config:
-                            config[key] = value
-                    return config
+                return self.read_config(default_config)
             else:
                 # Create default config file
                 with open(self.config_file, 'w') as f:
@@ -64,179 +244,632 @@ class PingTest:
             print(f"Error loading config: {e}")
             return default_config
     
+    def read_config(self, default_config: Dict) -> Dict:
+        """Read the configuration file, filling in missing keys from default_config"""
+        with open(self.config_file, 'r') as f:
+            config = json.load(f)
+            
+            # Handle legacy config format (convert list of IPs to dict format)
+            if "ip_addresses" in config and isinstance(config["ip_addresses"], list):
+                # Convert old format to new format
+                old_ips = config["ip_addresses"]
+                config["ip_addresses"] = {}
+                for ip in old_ips:
+                    config["ip_addresses"][ip] = ""
+            
+            # Merge with defaults for any missing keys
+            for key, value in default_config.items():
+                if key not in config:
+                    config[key] = value
+            return config
+    
+    def load_targets(self) -> TargetSet:
+        """Parse the configured addresses, CIDR blocks and ranges (and check their probe types)"""
+        targets = TargetSet(self.config['ip_addresses'])
+        if self.shard is None:
+            for spec, error in targets.invalid:
+                self.logger.warning(f"Ignoring invalid IP address, block or range {spec}: {error}")
+        host_settings = self.config['host_settings']
+        for spec, settings in list(host_settings.items()):
+            try:
+                parse_service(settings)
+            except (TypeError, ValueError) as e:
+                if self.shard is None:
+                    self.logger.warning(f"Invalid probe settings for {spec}, using ping instead: {e}")
+                host_settings[spec] = {key: value for key, value in settings.items() if key != 'probe'}
+        return targets
+    
+    def own_targets(self) -> Iterator[str]:
+        """Yield the targets this process probes (a worker's shard of them with --workers)"""
+        if self.shard is None:
+            yield from self.targets
+            return
+        index, workers = self.shard
+        for ip in self.targets:
+            if shard_of(ip, workers) == index:
+                yield ip
+    
     def setup_logging(self):
         """Setup logging configuration"""
-        # Generate timestamped log filename
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Log files are timestamped per segment; a new segment is started
+        # when the current one reaches log_max_bytes or log_rotate_interval
         base_log_file = self.config['log_file']
-        
-        # Split filename and extension
-        if '.' in base_log_file:
-            name_part, ext_part = base_log_file.rsplit('.', 1)
-            timestamped_log_file = f"{name_part}_{timestamp}.{ext_part}"
-        else:
-            timestamped_log_file = f"{base_log_file}_{timestamp}"
+        file_handler = SegmentRotatingFileHandler(
+            base_log_file,
+            max_bytes=self.config['log_max_bytes'],
+            rotate_interval=self.config['log_rotate_interval'],
+            backup_count=self.config['log_backup_count'],
+            compress=self.config['log_compress'],
+            prune_earlier=self.config['log_prune_earlier']
+        )
+        timestamped_log_file = file_handler.current_file
         
         # Update config with timestamped filename
         self.config['log_file'] = timestamped_log_file
         
-        log_format = '%(asctime)s - %(levelname)s - %(message)s'
+        # Probing code only enqueues records; a background thread formats,
+        # writes and flushes them in batches
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        console_handler = BufferedStreamHandler(sys.stdout)
+        for handler in (file_handler, console_handler):
+            handler.setFormatter(formatter)
+        self.log_pipeline = LogPipeline([file_handler, console_handler])
+        self.log_pipeline.start()
+        atexit.register(self.log_pipeline.stop)
+        
         logging.basicConfig(
             level=logging.INFO,
-            format=log_format,
-            handlers=[
-                logging.FileHandler(timestamped_log_file),
-                logging.StreamHandler(sys.stdout)
-            ]
+            handlers=[self.log_pipeline.queue_handler]
         )
         self.logger = logging.getLogger(__name__)
         
         # Log the start of the session
         self.logger.info(f"PingTest session started - Log file: {timestamped_log_file}")
     
-    def ping_host(self, ip_address: str) -> Dict:
-        """Ping a single host and return results"""
-        result = {
-            'ip': ip_address,
-            'timestamp': datetime.datetime.now().isoformat(),
-            'success': False,
-            'response_time': None,
-            'packet_loss': 100,
-            'error': None
-        }
+    def create_prober(self):
+        """Create the prober for the configured backend (None = subprocess ping)"""
+        backend = self.config['backend']
+        if backend == "subprocess":
+            self.backend_description = "subprocess (system ping command)"
+            return None
+        if backend == "multiplex":
+            self.backend_description = "multiplex (one shared ICMP socket)"
+            return MultiplexIcmpProber(self.config['ping_count'], self.config['timeout'])
+        if backend == "fping":
+            self.backend_description = f"fping (one {self.config['fping_path']} process per batch)"
+            return FpingProber(self.config['ping_count'], self.config['timeout'],
+                               fping_path=self.config['fping_path'])
+        if backend == "icmp" or icmp_available():
+            self.backend_description = "icmp (native sockets)"
+            return IcmpProber(self.config['ping_count'], self.config['timeout'])
+        self.backend_description = "subprocess (ICMP sockets not permitted)"
+        return None
+    
+    def create_engine(self) -> SweepEngine:
+        """Create the sweep engine, using the prober's own multiplexing if it has any
+        
+        Hosts with a tcp/udp/http probe go to the service prober's reactor
+        when the engine submits probes; on the thread pool their probe waits
+        for the reactor's result.
+        """
+        submit = self.submit_probe if hasattr(self.prober, 'submit') else None
+        batch = self.ping_batch if hasattr(self.prober, 'ping_many') else None
+        return SweepEngine(self.ping_host, self.config['max_concurrent'], submit=submit, batch=batch)
+    
+    def replace_prober(self):
+        """Release the prober's sockets and create one for the current backend setting"""
+        if hasattr(self.prober, 'close'):
+            self.prober.close()
+        self.prober = self.create_prober()
+    
+    def replace_engine(self):
+        """Shut the sweep engine down and create one for the current prober and concurrency limit"""
+        self.engine.shutdown()
+        self.engine = self.create_engine()
+    
+    def shutdown(self):
+        """Stop the sweep engine, release the prober's sockets and close the result store"""
+        self.engine.shutdown()
+        if hasattr(self.prober, 'close'):
+            self.prober.close()
+        self.services.close()
+        self.resolver.close()
+        if self.store is not None:
+            self.store.close()
+        if self.metrics is not None:
+            self.metrics.stop()
+        if self.stream is not None:
+            self.stream.stop()
+        if self.agent is not None:
+            self.agent.stop()
+            if self.agent.backlog or self.agent.dropped:
+                self.logger.warning(
+                    f"Agent: {self.agent.backlog} batches not delivered to the collector, "
+                    f"{self.agent.dropped} results dropped"
+                )
+    
+    def start_metrics(self, port: int, address: str = "0.0.0.0"):
+        """Serve Prometheus metrics over HTTP"""
+        self.metrics = MetricsExporter(port, address)
+        self.metrics.start()
+        self.update_metrics()
+        self.logger.info(f"Prometheus metrics at http://{address}:{self.metrics.port}/metrics")
+    
+    def start_stream(self, port: int = DEFAULT_STREAM_PORT, address: str = "127.0.0.1"):
+        """Stream every result to live viewers such as the config editor's live view"""
+        self.stream = ResultPublisher(port, address)
+        self.stream.start()
+        self.logger.info(f"Streaming results on {address}:{self.stream.port}")
+    
+    def start_agent(self, collector: str, name: Optional[str] = None):
+        """Ship every result to a collector (pingtest.py collect) given as host[:port]"""
+        address, port = parse_address(collector, DEFAULT_COLLECTOR_PORT)
+        self.agent = AgentShipper(address, port, name)
+        self.agent.start()
+        self.logger.info(f"Sending results to collector {address}:{port} as agent {self.agent.name}")
+    
+    def update_metrics(self, scheduler: Optional[ProbeScheduler] = None):
+        """Re-render the metrics endpoint from the current statistics"""
+        if self.metrics is None:
+            return
+        self.metrics.update(
+            self.stats.snapshots(),
+            self.targets,
+            overruns=scheduler.overruns if scheduler else None,
+            skipped=scheduler.skipped if scheduler else None
+        )
+    
+    def ping_host(self, ip_address: str) -> ProbeResult:
+        """Ping a single host with the configured backend and return results
+        
+        The result also reads like a dict (result['success'] etc.).
+        """
+        timers = self.timers
+        start = time.perf_counter_ns() if timers else 0
+        if ip_address in self.targets.hostnames:
+            entry, resolve_time = self.resolver.resolve_wait(ip_address)
+            if entry.address is None:
+                result = self.unresolved_result(ip_address, entry, resolve_time)
+            else:
+                result = self.resolved_result(self.probe_address(ip_address, entry.address),
+                                              ip_address, entry.address, resolve_time)
+        else:
+            result = self.probe_address(ip_address, ip_address)
+        if timers:
+            timers.record('probe', time.perf_counter_ns() - start)
+        return result
+    
+    def probe_address(self, ip_address: str, address: str) -> ProbeResult:
+        """Probe address (a host name target's resolved address) with the settings of ip_address"""
+        service = self.service_target(ip_address)
+        if service is not None:
+            return self.services.ping(address, service, self.host_count(ip_address))
+        if self.prober is not None:
+            return self.prober.ping(address, self.host_count(ip_address))
+        return self.ping_host_subprocess(ip_address, address)
+    
+    def resolved_result(self, result: ProbeResult, hostname: str, address: str, resolve_time: Optional[float]) -> ProbeResult:
+        """Turn the result for a host name's address into the result for the host name"""
+        result.ip = hostname
+        result.address = address
+        result.resolve_time = resolve_time  # ms, None if the address came from the cache
+        return result
+    
+    def unresolved_result(self, hostname: str, entry: CacheEntry, resolve_time: Optional[float]) -> ProbeResult:
+        """Return the failed result for a host name that could not be resolved"""
+        return ProbeResult(hostname, error=f"Cannot resolve {hostname}: {entry.error}", resolve_time=resolve_time)
+    
+    def submit_probe(self, ip_address: str, callback: Callable[[ProbeResult], None]):
+        """Start a probe on a non-blocking prober with the host's ping count
+        
+        Host names are resolved first; a name that is not cached is probed
+        when its lookup completes, without holding up other probes.
+        """
+        timers = self.timers
+        if timers is not None:
+            start = time.perf_counter_ns()
+            deliver = callback
+        
+            def callback(result: ProbeResult):
+                timers.record('probe', time.perf_counter_ns() - start)
+                deliver(result)
+        
+        if ip_address not in self.targets.hostnames:
+            self.submit_address(ip_address, ip_address, callback)
+            return
+        
+        def on_answer(entry: CacheEntry, resolve_time: Optional[float]):
+            if entry.address is None:
+                callback(self.unresolved_result(ip_address, entry, resolve_time))
+                return
+            self.submit_address(ip_address, entry.address, lambda result: callback(
+                self.resolved_result(result, ip_address, entry.address, resolve_time)))
+        
+        self.resolver.resolve(ip_address, on_answer)
+    
+    def submit_address(self, ip_address: str, address: str, callback: Callable[[ProbeResult], None]):
+        """Start probing address with the settings of ip_address on a non-blocking prober"""
+        service = self.service_target(ip_address)
+        if service is not None:
+            self.services.submit(address, service, callback, self.host_count(ip_address))
+        else:
+            self.prober.submit(address, callback, self.host_count(ip_address))
+    
+    def ping_batch(self, ip_addresses: List[str]) -> Iterator[ProbeResult]:
+        """Ping hosts with a batch prober, one batch per distinct ping count
+        
+        Host names are resolved (all at once) before the batches start. Hosts
+        with a tcp/udp/http probe are started on the service prober first and
+        their results yielded after the batches. With --profile each result's
+        probe time runs from the start of the batch, less the time the
+        consumer spent on earlier results.
+        """
+        timers = self.timers
+        if timers is None:
+            yield from self.batch_results(ip_addresses)
+            return
+        start = time.perf_counter_ns()
+        paused = 0
+        for result in self.batch_results(ip_addresses):
+            now = time.perf_counter_ns()
+            timers.record('probe', now - start - paused)
+            yield result
+            paused += time.perf_counter_ns() - now
+    
+    def batch_results(self, ip_addresses: List[str]) -> Iterator[ProbeResult]:
+        """Yield the results of one ping_batch call"""
+        answers = queue.Queue()
+        hostnames = [ip for ip in ip_addresses if ip in self.targets.hostnames]
+        for hostname in hostnames:
+            self.resolver.resolve(hostname, lambda entry, resolve_time, hostname=hostname:
+                                  answers.put((hostname, entry, resolve_time)))
+        resolved = {}
+        for _ in hostnames:
+            hostname, entry, resolve_time = answers.get()
+            resolved[hostname] = (entry, resolve_time)
+        
+        groups = {}
+        owners = {}  # (count, address pinged) -> [(target, resolve time)]
+        services = queue.Queue()
+        pending = 0
+        for ip in ip_addresses:
+            address, resolve_time = ip, None
+            if ip in resolved:
+                entry, resolve_time = resolved[ip]
+                if entry.address is None:
+                    yield self.unresolved_result(ip, entry, resolve_time)
+                    continue
+                address = entry.address
+            service = self.service_target(ip)
+            count = self.host_count(ip)
+            if service is not None:
+                if ip in resolved:
+                    self.services.submit(address, service, lambda result, ip=ip, address=address, resolve_time=resolve_time:
+                                         services.put(self.resolved_result(result, ip, address, resolve_time)), count)
+                else:
+                    self.services.submit(ip, service, services.put, count)
+                pending += 1
+                continue
+            targets = owners.setdefault((count, address), [])
+            if not targets:
+                groups.setdefault(count, []).append(address)
+            targets.append((ip, resolve_time))
+        for count, group in groups.items():
+            for result in self.prober.ping_many(group, count):
+                address = result.ip
+                for ip, resolve_time in owners.get((count, address), [(address, None)]):
+                    yield result if ip == address else self.resolved_result(result.copy(), ip, address, resolve_time)
+        for _ in range(pending):
+            yield services.get()
+    
+    def ping_host_subprocess(self, ip_address: str, address: Optional[str] = None) -> ProbeResult:
+        """Ping a single host using the system ping command and return results
+        
+        address is what to ping when it differs from the target (a host
+        name's resolved address).
+        """
+        result = ProbeResult(ip_address)
         
         try:
             # Determine ping command based on OS
-            if platform.system().lower() == "windows":
-                cmd = ['ping', '-n', str(self.config['ping_count']), '-w', str(self.config['timeout'] * 1000), ip_address]
+            count = self.host_count(ip_address)
+            if IS_WINDOWS:
+                cmd = [self.config['ping_path'], '-n', str(count), '-w', str(self.config['timeout'] * 1000), address or ip_address]
             else:
-                cmd = ['ping', '-c', str(self.config['ping_count']), '-W', str(self.config['timeout']), ip_address]
+                cmd = [self.config['ping_path'], '-c', str(count), '-W', str(self.config['timeout']), address or ip_address]
             
-            # Execute ping command
-            process = subprocess.run(
+            # Execute ping command (spawn and wait are timed separately)
+            timers = self.timers
+            start = time.perf_counter_ns() if timers else 0
+            process = subprocess.Popen(
                 cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.config['timeout'] + 5
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
             )
+            if timers:
+                spawned = time.perf_counter_ns()
+                timers.record('spawn', spawned - start)
+            try:
+                # ping sends one packet per second, then waits up to timeout
+                stdout, stderr = process.communicate(timeout=self.config['timeout'] + count + 5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+            if timers:
+                waited = time.perf_counter_ns()
+                timers.record('wait', waited - spawned)
             
             if process.returncode == 0:
-                # Parse ping output
-                output = process.stdout
-                
-                # Extract response time (average) - this is required for success
-                response_time_extracted = False
-                if platform.system().lower() == "windows":
-                    # Windows ping output parsing
-                    lines = output.split('\n')
-                    for line in lines:
-                        if 'Average =' in line:
-                            try:
-                                # Handle different Windows ping output formats
-                                if 'Average =' in line:
-                                    avg_time = line.split('Average =')[1].split('ms')[0].strip()
-                                    result['response_time'] = float(avg_time)
-                                    response_time_extracted = True
-                                elif 'Average=' in line:  # No space after equals
-                                    avg_time = line.split('Average=')[1].split('ms')[0].strip()
-                                    result['response_time'] = float(avg_time)
-                                    response_time_extracted = True
-                            except (ValueError, IndexError):
-                                # Try alternative parsing if the first method fails
-                                try:
-                                    # Look for time pattern like "Average = 5.00ms"
-                                    import re
-                                    time_match = re.search(r'Average\s*=\s*(\d+\.?\d*)ms', line)
-                                    if time_match:
-                                        result['response_time'] = float(time_match.group(1))
-                                        response_time_extracted = True
-                                except:
-                                    pass
-                        elif 'Lost =' in line:
-                            try:
-                                lost_info = line.split('Lost =')[1].split('(')[0].strip()
-                                sent_info = line.split('Sent =')[1].split(',')[0].strip()
-                                lost = int(lost_info)
-                                sent = int(sent_info)
-                                if sent > 0:
-                                    result['packet_loss'] = (lost / sent) * 100
-                            except:
-                                pass
-                else:
-                    # Linux/Mac ping output parsing
-                    lines = output.split('\n')
-                    for line in lines:
-                        if 'rtt min/avg/max' in line:
-                            try:
-                                # Handle different Linux/Mac ping output formats
-                                if 'rtt min/avg/max' in line:
-                                    avg_time = line.split('avg/')[1].split('/')[0]
-                                    result['response_time'] = float(avg_time)
-                                    response_time_extracted = True
-                                elif 'round-trip' in line:  # Alternative format
-                                    import re
-                                    time_match = re.search(r'avg\s*=\s*(\d+\.?\d*)', line)
-                                    if time_match:
-                                        result['response_time'] = float(time_match.group(1))
-                                        response_time_extracted = True
-                            except (ValueError, IndexError):
-                                # Try alternative parsing if the first method fails
-                                try:
-                                    import re
-                                    time_match = re.search(r'avg\s*=\s*(\d+\.?\d*)', line)
-                                    if time_match:
-                                        result['response_time'] = float(time_match.group(1))
-                                        response_time_extracted = True
-                                except:
-                                    pass
-                        elif 'packets transmitted' in line:
-                            try:
-                                parts = line.split(',')
-                                transmitted = int(parts[0].split()[0])
-                                received = int(parts[1].split()[0])
-                                if transmitted > 0:
-                                    result['packet_loss'] = ((transmitted - received) / transmitted) * 100
-                            except:
-                                pass
+                stats = parse_ping_output(stdout)
+                if timers:
+                    timers.record('parse', time.perf_counter_ns() - waited)
+                if stats['packet_loss'] is not None:
+                    result.packet_loss = stats['packet_loss']
+                result.rtts = stats['rtts']
+                result.sequences = stats['sequences']
                 
                 # Only mark as successful if we actually got a response time
-                if response_time_extracted:
-                    result['success'] = True
+                if stats['rtt_avg'] is not None:
+                    result.response_time = stats['rtt_avg']
+                    result.success = True
                 else:
-                    result['error'] = "Failed to parse response time from ping output"
-                    result['success'] = False
+                    result.error = "Failed to parse response time from ping output"
             else:
-                result['error'] = f"Ping failed with return code: {process.returncode}"
-                if process.stderr:
-                    result['error'] += f" - {process.stderr.strip()}"
+                result.error = f"Ping failed with return code: {process.returncode}"
+                if stderr:
+                    result.error += f" - {stderr.strip()}"
                     
         except subprocess.TimeoutExpired:
-            result['error'] = "Ping command timed out"
+            result.error = "Ping command timed out"
+            result.status = STATUS_TIMEOUT
         except Exception as e:
-            result['error'] = str(e)
+            result.error = str(e)
         
         return result
     
-    def log_ping_result(self, result: Dict):
-        """Log ping result to file and console"""
-        # Get IP name if available
-        ip_name = self.config['ip_addresses'].get(result['ip'], "")
-        display_text = f"{ip_name} ({result['ip']})" if ip_name else result['ip']
+    def display_text(self, ip_address: str) -> str:
+        """Return "name (ip)" for named hosts, or the bare IP"""
+        ip_name = self.targets.get(ip_address, "")
+        return f"{ip_name} ({ip_address})" if ip_name else ip_address
+    
+    def host_settings(self, ip_address: str) -> Dict:
+        """Return the host_settings entry of a host, or of the block or range it is in"""
+        host_settings = self.config['host_settings']
+        if not host_settings:
+            return {}
+        settings = host_settings.get(ip_address)
+        if settings is None:
+            settings = host_settings.get(self.targets.spec(ip_address), {})
+        return settings
+    
+    def service_target(self, ip_address: str) -> Optional[ServiceTarget]:
+        """Return the tcp/udp/http probe configured for a host, None for ICMP ping"""
+        settings = self.host_settings(ip_address)
+        if 'probe' not in settings:
+            return None
+        # Host names are sent as the HTTP Host header and TLS server name
+        return parse_service(settings, ip_address if ip_address in self.targets.hostnames else None)
+    
+    def host_interval(self, ip_address: str) -> float:
+        """Return the probe interval for a host (per-host setting or ping_interval)"""
+        return self.host_settings(ip_address).get('interval', self.config['ping_interval'])
+    
+    def host_count(self, ip_address: str) -> int:
+        """Return the ping count for a host's next probe (adaptive, per-host setting or ping_count)"""
+        if self.adaptive is not None:
+            count = self.adaptive.count(ip_address)
+            if count is not None:
+                return count
+        return self.configured_count(ip_address)
+    
+    def configured_count(self, ip_address: str) -> int:
+        """Return the configured ping count for a host (per-host setting or ping_count)"""
+        return self.host_settings(ip_address).get('count', self.config['ping_count'])
+    
+    def create_adaptive(self, intervals: Dict[str, float]) -> AdaptiveController:
+        """Create the adaptive probing controller for the scheduled hosts"""
+        adaptive = AdaptiveController(
+            min_interval=self.config['adaptive_min_interval'],
+            max_interval=self.config['adaptive_max_interval'],
+            max_count=self.config['adaptive_max_count']
+        )
+        for ip, interval in intervals.items():
+            adaptive.add(ip, interval, self.configured_count(ip))
+        return adaptive
+    
+    def adapt(self, result: ProbeResult, scheduler: ProbeScheduler):
+        """Let adaptive probing react to a result, rescheduling the host if needed"""
+        ip = result.ip
+        change = self.adaptive.update(result, self.stats.get(ip))
+        if change is None:
+            return
+        scheduler.set_interval(ip, change.interval)
+        self.logger.info(
+            f"Adaptive probing: {self.display_text(ip)} is {change.state}, "
+            f"now every {change.interval:g}s with {change.count} pings"
+        )
+    
+    def setup_states(self):
+        """Create the host state tracker for log_transitions, keeping the hosts' current states"""
+        states = None
+        if self.config['log_transitions']:
+            states = HostStateTracker(
+                change_after=self.config['state_change_after'],
+                degraded_loss=self.config['degraded_loss'],
+                degraded_rtt=self.config['degraded_rtt'],
+                recovery_ratio=self.config['recovery_ratio']
+            )
+            if self.states is not None:
+                states.hosts = self.states.hosts
+        self.states = states
+    
+    def forget_host(self, ip_address: str):
+        """Drop the statistics, adaptive settings, state and kept-alive connections of a host that is no longer a target"""
+        self.stats.remove(ip_address)
+        if self.adaptive is not None:
+            self.adaptive.remove(ip_address)
+        if self.states is not None:
+            self.states.remove(ip_address)
+        self.services.forget(self.resolved.pop(ip_address, ip_address))
+    
+    def log_pinging(self, ip_address: str):
+        """Log that a probe to a host has been started"""
+        if self.config['text_results'] and self.states is None:
+            self.logger.info(f"Pinging {self.display_text(ip_address)}...")
+    
+    def run_sweep(self, ip_addresses: Iterable[str]) -> List[ProbeResult]:
+        """Probe all given hosts concurrently and log each result"""
+        results = []
+        for result in self.engine.sweep(ip_addresses, on_submit=self.log_pinging):
+            self.handle_result(result)
+            results.append(result)
+        return results
+    
+    def handle_result(self, result: ProbeResult):
+        """Process a completed probe result"""
+        if self.stream is not None:
+            self.stream.publish(result, self.targets.get(result.ip, ""))
+        if self.agent is not None:
+            self.agent.publish(result, self.targets.get(result.ip, ""))
+        if result.address is not None:
+            self.track_address(result.ip, result.address)
+        timers = self.timers
+        if timers is None:
+            self.stats.update(result)
+            self.log_ping_result(result)
+            return
+        start = time.perf_counter_ns()
+        self.stats.update(result)
+        updated = time.perf_counter_ns()
+        self.log_ping_result(result)
+        timers.record('stats', updated - start)
+        timers.record('log', time.perf_counter_ns() - updated)
+    
+    def track_address(self, hostname: str, address: str):
+        """Log when a host name starts resolving to a different address"""
+        previous = self.resolved.get(hostname)
+        if previous == address:
+            return
+        self.resolved[hostname] = address
+        if previous is not None:
+            self.logger.info(f"{self.display_text(hostname)} now resolves to {address} (was {previous})")
+    
+    def log_profile_report(self):
+        """Log the stage timings collected with --profile"""
+        if self.timers is None:
+            return
+        self.logger.info("Stage timings:")
+        for line in self.timers.report():
+            self.logger.info(f"  {line}")
+    
+    def start_capture(self):
+        """Start the cProfile/tracemalloc capture, if one was requested"""
+        if self.capture is None:
+            return
+        self.logger.info(f"Capturing cProfile and tracemalloc data for {self.capture.sweeps} sweeps")
+        self.engine.probe = self.capture.wrap(self.ping_host)
+        if self.engine.submit is not None:
+            self.engine.submit = self.capture.wrap_submit(self.submit_probe)
+        if self.engine.batch is not None:
+            self.engine.batch = self.capture.wrap_batch(self.ping_batch)
+        self.capture.start()
+    
+    def stop_capture(self):
+        """Stop a running capture and log its report"""
+        if self.capture is None or not self.capture.active:
+            return
+        self.engine.probe = self.ping_host
+        if self.engine.submit is not None:
+            self.engine.submit = self.submit_probe
+        if self.engine.batch is not None:
+            self.engine.batch = self.ping_batch
+        for line in self.capture.stop():
+            self.logger.info(line)
+    
+    def log_stats_summary(self):
+        """Log rolling statistics for every host that has results"""
+        if not self.config['stats_summary']:
+            return
+        for ip, snapshot in self.stats.snapshots():
+            self.logger.info(f"Stats for {self.display_text(ip)}: {format_summary(snapshot)}")
+        for hostname, address, snapshot in self.stats.earlier_snapshots():
+            self.logger.info(f"Stats for {self.display_text(hostname)} at earlier address {address}: "
+                             f"{format_summary(snapshot)}")
+    
+    def log_ping_result(self, result: ProbeResult):
+        """Log ping result to the result store and/or file and console"""
+        if self.store is not None:
+            self.store.append(result)
+        if self.states is not None:
+            self.log_state_change(result)
+            return
+        if not self.config['text_results']:
+            return
+        
+        display_text = self.display_text(result.ip)
         
-        if result['success']:
+        if result.success:
             self.logger.info(
                 f"Ping to {display_text}: SUCCESS - "
-                f"Response time: {result['response_time']:.2f}ms, "
-                f"Packet loss: {result['packet_loss']:.1f}%"
+                f"Response time: {result.response_time:.2f}ms, "
+                f"Packet loss: {result.packet_loss:.1f}%{self.resolution_text(result)}"
             )
         else:
             self.logger.error(
-                f"Ping to {display_text}: FAILED - {result['error']}"
+                f"Ping to {display_text}: FAILED - {result.error}"
             )
     
+    def resolution_text(self, result: ProbeResult) -> str:
+        """Return the address (and DNS lookup time) of a host name result for its log line"""
+        address = result.address
+        if address is None:
+            return ""
+        resolve_time = result.resolve_time
+        lookup = f", DNS lookup: {resolve_time:.2f}ms" if resolve_time is not None else ""
+        return f", Address: {address}{lookup}"
+    
+    def log_state_change(self, result: ProbeResult):
+        """Log a host's state when it changes (and initially, unless it is UP)"""
+        host = self.states.update(result)
+        if host is None or (host.previous is None and host.state == UP):
+            return
+        
+        display_text = self.display_text(result.ip)
+        if host.previous is None:
+            message = f"{display_text} is {host.state}"
+        else:
+            message = (f"{display_text} changed from {host.previous} to {host.state} "
+                       f"(was {host.previous} for {format_duration(host.duration)})")
+        
+        if host.state == DOWN:
+            self.logger.error(f"{message} - {result.error}")
+        elif host.state == DEGRADED:
+            self.logger.warning(
+                f"{message} - Response time: {result.response_time:.2f}ms, "
+                f"Packet loss: {result.packet_loss:.1f}%"
+            )
+        else:
+            self.logger.info(f"{message} - Response time: {result.response_time:.2f}ms")
+    
+    def log_state_summary(self, limit: int = 10):
+        """Log how many hosts are in each state and which hosts are not UP"""
+        counts = self.states.counts()
+        self.logger.info(
+            f"Host states: {counts[UP]} up, {counts[DEGRADED]} degraded, {counts[DOWN]} down"
+        )
+        for state in (DOWN, DEGRADED):
+            hosts = self.states.hosts_in(state)
+            if not hosts:
+                continue
+            shown = ", ".join(self.display_text(ip) for ip in hosts[:limit])
+            more = f" and {len(hosts) - limit} more" if len(hosts) > limit else ""
+            self.logger.info(f"{state.capitalize()}: {shown}{more}")
+    
     def run_ping_test(self):
         """Run ping test for all configured IP addresses"""
-        ip_addresses = self.config['ip_addresses']
+        ip_addresses = self.targets
         
         if not ip_addresses:
             self.logger.error("No IP addresses configured")
@@ -250,47 +883,339 @@ class PingTest:
             self.logger.info(f"Starting ping test for {len(ip_addresses)} IP addresses")
             self.logger.info(f"Ping interval: {self.config['ping_interval']} seconds")
             self.logger.info(f"Ping count per check: {self.config['ping_count']}")
+            self.logger.info(f"Max concurrent probes: {self.engine.max_in_flight}")
+            self.logger.info(f"Probe backend: {self.backend_description}")
             self.logger.info(f"Total runtime: {self.config['total_runtime']} seconds")
             self.logger.info(f"Application will stop at: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
         else:
             self.logger.info(f"Starting ping test for {len(ip_addresses)} IP addresses")
             self.logger.info(f"Ping interval: {self.config['ping_interval']} seconds")
             self.logger.info(f"Ping count per check: {self.config['ping_count']}")
+            self.logger.info(f"Max concurrent probes: {self.engine.max_in_flight}")
+            self.logger.info(f"Probe backend: {self.backend_description}")
             self.logger.info("Application will run indefinitely (press Ctrl+C to stop)")
         
+        # Every host gets its own fixed period on the monotonic clock
+        scheduler = ProbeScheduler()
+        intervals = {ip: self.host_interval(ip) for ip in self.own_targets()}
+        scheduler.schedule_all(intervals, stagger=self.config['stagger'])
+        custom = sum(1 for interval in intervals.values() if interval != self.config['ping_interval'])
+        if custom:
+            self.logger.info(f"Custom probe interval for {custom} IP addresses")
+        services = sum(1 for ip in intervals if self.service_target(ip) is not None)
+        if services:
+            self.logger.info(f"TCP/UDP/HTTP probes for {services} IP addresses")
+        if self.config['adaptive']:
+            self.adaptive = self.create_adaptive(intervals)
+            self.logger.info("Adaptive probing: down hosts back off, degraded hosts are probed more often")
+        if self.config['stagger']:
+            self.logger.info("Probe times are staggered across each interval")
+        watcher = None
+        if self.config['config_reload']:
+            watcher = ConfigWatcher(self.config_file, self.config['config_check_interval'], scheduler.clock)
+            self.logger.info(f"Watching {self.config_file} for changes")
+        
+        completed = queue.Queue()
+        cycle_length = self.config['ping_interval']
+        clock_start = scheduler.clock()
+        deadline = clock_start + self.config['total_runtime'] if end_time else None
+        next_cycle = clock_start + cycle_length
+        cycle_number = 1
+        cycle_results = {'succeeded': 0, 'failed': 0}
+        
+        self.start_capture()
         try:
+            self.logger.info("-" * 50)
+            self.logger.info(f"Ping cycle {cycle_number} started at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             while True:
+                now = scheduler.clock()
+                
                 # Check if we've reached the total runtime limit
-                if end_time and datetime.datetime.now() >= end_time:
+                if deadline is not None and now >= deadline:
                     elapsed_time = datetime.datetime.now() - start_time
                     self.logger.info("-" * 50)
                     self.logger.info(f"Total runtime limit reached: {elapsed_time.total_seconds():.1f} seconds")
                     self.logger.info("Stopping ping test application")
                     break
                 
-                self.logger.info("-" * 50)
-                self.logger.info(f"Ping test started at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                if now >= next_cycle:
+                    self.log_cycle_summary(cycle_number, scheduler.take_cycle_counts(), cycle_results)
+                    self.update_metrics(scheduler)
+                    self.log_profile_report()
+                    if self.capture is not None and self.capture.active and self.capture.sweep_done():
+                        self.stop_capture()
+                    cycle_results = {'succeeded': 0, 'failed': 0}
+                    cycle_number += 1
+                    next_cycle += cycle_length
+                    if next_cycle <= now:
+                        next_cycle = now + cycle_length
+                    self.logger.info("-" * 50)
+                    self.logger.info(f"Ping cycle {cycle_number} started at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                
+                if watcher is not None and watcher.check(now):
+                    self.reload_config(scheduler)
+                    cycle_length = self.config['ping_interval']
                 
-                for ip, display_name in ip_addresses.items():
-                    if display_name:
-                        self.logger.info(f"Pinging {display_name} ({ip})...")
-                    else:
-                        self.logger.info(f"Pinging {ip}...")
-                    result = self.ping_host(ip)
-                    self.log_ping_result(result)
-                    time.sleep(1)  # Small delay between pings
+                self.engine.start_many(scheduler.pop_due(now), completed.put, on_submit=self.log_pinging)
                 
-                self.logger.info(f"Ping test completed at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                # Wait for results until the next probe, cycle or deadline is due
+                wake_times = [t for t in (scheduler.next_due(), next_cycle, deadline,
+                                          watcher.next_check if watcher else None) if t is not None]
+                try:
+                    result = completed.get(timeout=max(0.0, min(wake_times) - scheduler.clock()))
+                except queue.Empty:
+                    continue
+                while True:
+                    scheduler.complete(result.ip)
+                    self.handle_result(result)
+                    if result.ip not in scheduler:
+                        self.forget_host(result.ip)  # removed by a config reload while in flight
+                    elif self.adaptive is not None:
+                        self.adapt(result, scheduler)
+                    cycle_results['succeeded' if result.success else 'failed'] += 1
+                    try:
+                        result = completed.get_nowait()
+                    except queue.Empty:
+                        break
+                
+        except KeyboardInterrupt:
+            elapsed_time = datetime.datetime.now() - start_time
+            self.logger.info(f"Ping test stopped by user after {elapsed_time.total_seconds():.1f} seconds")
+        except Exception as e:
+            elapsed_time = datetime.datetime.now() - start_time
+            self.logger.error(f"Unexpected error after {elapsed_time.total_seconds():.1f} seconds: {e}")
+        finally:
+            self.stop_capture()
+            self.shutdown()
+            self.log_stats_summary()
+            self.log_profile_report()
+    
+    def reload_config(self, scheduler: Optional[ProbeScheduler] = None) -> bool:
+        """Apply changes to the config file to a running ping test
+        
+        Added hosts are scheduled and removed hosts retired; hosts whose
+        interval changed are moved to the new interval. All other hosts keep
+        their statistics and their place in the schedule, and probes already
+        in flight are not interrupted. Without a scheduler (--workers) only
+        the settings are updated; the caller passes them on to the workers.
+        """
+        try:
+            config = self.read_config(self.default_config())
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not reload {self.config_file}, keeping the current configuration: {e}")
+            return False
+        
+        restart_needed = self.update_config(config)
+        if scheduler is not None:
+            added, removed, rescheduled = self.reschedule(scheduler)
+            self.logger.info(
+                f"Configuration reloaded: {added} hosts added, {removed} removed, "
+                f"{rescheduled} rescheduled, {len(scheduler)} hosts scheduled"
+            )
+        else:
+            self.logger.info(f"Configuration reloaded: {len(self.targets)} IP addresses")
+        if restart_needed:
+            self.logger.warning(f"Changes to {', '.join(restart_needed)} take effect after a restart")
+        return True
+    
+    def update_config(self, config: Dict) -> List[str]:
+        """Take over the reloadable settings of config; return the other changed settings"""
+        restart_needed = sorted(
+            key for key, value in config.items()
+            if key not in self.RELOADABLE and key not in self.overrides and key != 'log_file'
+            and value != self.config.get(key)
+        )
+        for key in self.RELOADABLE:
+            if key not in self.overrides:
+                self.config[key] = config[key]
+        if hasattr(self.prober, 'timeout'):
+            self.prober.timeout = self.config['timeout']
+        self.services.timeout = self.config['timeout']
+        self.resolver.timeout = self.config['timeout']
+        self.setup_states()
+        self.targets = self.load_targets()
+        return restart_needed
+    
+    def reschedule(self, scheduler: ProbeScheduler) -> Tuple[int, int, int]:
+        """Bring the scheduler in line with the targets; return (added, removed, rescheduled) counts"""
+        # Diff the expanded target set against the scheduled hosts
+        wanted = set()
+        added = []
+        for ip in self.own_targets():
+            wanted.add(ip)
+            if ip not in scheduler:
+                added.append(ip)
+        removed = [ip for ip in scheduler if ip not in wanted]
+        for ip in removed:
+            scheduler.remove(ip)
+            self.forget_host(ip)
+        
+        rescheduled = 0
+        for ip in scheduler:
+            interval = self.host_interval(ip)
+            if self.adaptive is not None:
+                host = self.adaptive.reconfigure(ip, interval, self.configured_count(ip))
+                if host is not None:
+                    interval = host.interval
+            if interval != scheduler.interval(ip):
+                scheduler.set_interval(ip, interval)
+                rescheduled += 1
+        
+        intervals = {ip: self.host_interval(ip) for ip in added}
+        scheduler.schedule_all(intervals, stagger=self.config['stagger'])
+        if self.adaptive is not None:
+            for ip, interval in intervals.items():
+                self.adaptive.add(ip, interval, self.configured_count(ip))
+        return len(added), len(removed), rescheduled
+    
+    def log_cycle_summary(self, cycle_number: int, counts: Tuple[int, int, int], cycle_results: Dict):
+        """Log probe, overrun and skipped-cycle counts for the cycle just ended"""
+        probes, overruns, skipped = counts
+        self.logger.info(
+            f"Ping cycle {cycle_number} completed at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: "
+            f"{probes} probes sent, {cycle_results['succeeded']} succeeded, {cycle_results['failed']} failed"
+        )
+        if overruns or skipped:
+            self.logger.warning(
+                f"Ping cycle {cycle_number}: {overruns} probes still running when due again (overruns), "
+                f"{skipped} probe cycles skipped"
+            )
+        dns = self.resolver.take_stats()
+        if dns['lookups']:
+            self.logger.info(
+                f"DNS: {dns['lookups']} lookups ({dns['failures']} failed, "
+                f"avg {dns['avg_ms']:.2f}ms, max {dns['max_ms']:.2f}ms), {dns['hits']} cache hits"
+            )
+        if self.states is not None:
+            self.log_state_summary()  # per-host statistics only at exit
+        else:
+            self.log_stats_summary()
+    
+    def worker_config(self) -> Dict:
+        """Return the configuration for worker processes (results are logged and stored here)"""
+        return dict(self.config, result_store="", text_results=False, stats_summary=False,
+                    log_transitions=False, config_reload=False)
+    
+    def run_worker(self, commands, results):
+        """Probe this worker's shard, sending batches of result records to the coordinator"""
+        scheduler = ProbeScheduler()
+        intervals = {ip: self.host_interval(ip) for ip in self.own_targets()}
+        scheduler.schedule_all(intervals, stagger=self.config['stagger'])
+        if self.config['adaptive']:
+            self.adaptive = self.create_adaptive(intervals)
+        
+        completed = queue.Queue()
+        try:
+            while True:
+                try:
+                    command, argument = commands.get_nowait()
+                except queue.Empty:
+                    command = None
+                if command == "stop":
+                    break
+                if command == "config":
+                    self.update_config(argument)
+                    self.reschedule(scheduler)
+                
+                self.engine.start_many(scheduler.pop_due(scheduler.clock()), completed.put)
+                
+                # Wait for results until the next probe is due (checking for commands regularly)
+                next_due = scheduler.next_due()
+                timeout = 0.2 if next_due is None else min(0.2, max(0.0, next_due - scheduler.clock()))
+                records = []
+                try:
+                    result = completed.get(timeout=timeout)
+                    while True:
+                        scheduler.complete(result.ip)
+                        if result.ip in scheduler:
+                            records.append(to_record(result))
+                            if self.adaptive is not None:
+                                self.stats.update(result)
+                                self.adapt(result, scheduler)
+                        result = completed.get_nowait()
+                except queue.Empty:
+                    pass
+                if records:
+                    results.put((records, scheduler.take_cycle_counts()))
+        finally:
+            self.shutdown()
+    
+    def run_workers(self, workers: int):
+        """Run the ping test with the targets sharded across worker processes"""
+        if not self.targets:
+            self.logger.error("No IP addresses configured")
+            return
+        
+        start_time = datetime.datetime.now()
+        self.logger.info(f"Starting ping test for {len(self.targets)} IP addresses on {workers} worker processes")
+        self.logger.info(f"Ping interval: {self.config['ping_interval']} seconds")
+        self.logger.info(f"Ping count per check: {self.config['ping_count']}")
+        self.logger.info(f"Max concurrent probes: {self.engine.max_in_flight} per worker")
+        self.logger.info(f"Probe backend: {self.backend_description}")
+        deadline = None
+        if self.config['total_runtime'] > 0:
+            deadline = time.monotonic() + self.config['total_runtime']
+            end_time = start_time + datetime.timedelta(seconds=self.config['total_runtime'])
+            self.logger.info(f"Total runtime: {self.config['total_runtime']} seconds")
+            self.logger.info(f"Application will stop at: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        else:
+            self.logger.info("Application will run indefinitely (press Ctrl+C to stop)")
+        
+        pool = WorkerPool(workers, self.worker_config())
+        pool.start()
+        watcher = None
+        if self.config['config_reload']:
+            watcher = ConfigWatcher(self.config_file, self.config['config_check_interval'])
+            self.logger.info(f"Watching {self.config_file} for changes")
+        
+        cycle_length = self.config['ping_interval']
+        next_cycle = time.monotonic() + cycle_length
+        cycle_number = 1
+        cycle_results = {'succeeded': 0, 'failed': 0}
+        try:
+            self.logger.info("-" * 50)
+            self.logger.info(f"Ping cycle {cycle_number} started at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            while True:
+                now = time.monotonic()
                 
-                # Check if we should continue or stop
-                if end_time and datetime.datetime.now() >= end_time:
+                if deadline is not None and now >= deadline:
                     elapsed_time = datetime.datetime.now() - start_time
+                    self.logger.info("-" * 50)
                     self.logger.info(f"Total runtime limit reached: {elapsed_time.total_seconds():.1f} seconds")
                     self.logger.info("Stopping ping test application")
                     break
                 
-                self.logger.info(f"Next test in {self.config['ping_interval']} seconds...")
-                time.sleep(self.config['ping_interval'])
+                if now >= next_cycle:
+                    self.log_cycle_summary(cycle_number, pool.take_cycle_counts(), cycle_results)
+                    self.update_metrics()
+                    self.log_profile_report()
+                    alive = pool.alive()
+                    if alive < workers:
+                        self.logger.error(f"{workers - alive} of {workers} worker processes have stopped")
+                        if not alive:
+                            break
+                    cycle_results = {'succeeded': 0, 'failed': 0}
+                    cycle_number += 1
+                    next_cycle += cycle_length
+                    if next_cycle <= now:
+                        next_cycle = now + cycle_length
+                    self.logger.info("-" * 50)
+                    self.logger.info(f"Ping cycle {cycle_number} started at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                
+                if watcher is not None and watcher.check(now) and self.reload_config():
+                    pool.send_config(self.worker_config())
+                    for ip in [ip for ip in self.stats.hosts if self.targets.spec(ip) is None]:
+                        self.forget_host(ip)  # no longer a target
+                    cycle_length = self.config['ping_interval']
+                
+                wake_times = [t for t in (next_cycle, deadline, watcher.next_check if watcher else None) if t is not None]
+                records = pool.receive(max(0.0, min(wake_times) - time.monotonic()))
+                if records is None:
+                    continue
+                for record in records:
+                    result = from_record(record)
+                    self.handle_result(result)
+                    cycle_results['succeeded' if result.success else 'failed'] += 1
                 
         except KeyboardInterrupt:
             elapsed_time = datetime.datetime.now() - start_time
@@ -298,36 +1223,183 @@ class PingTest:
         except Exception as e:
             elapsed_time = datetime.datetime.now() - start_time
             self.logger.error(f"Unexpected error after {elapsed_time.total_seconds():.1f} seconds: {e}")
+        finally:
+            for record in pool.stop():
+                self.handle_result(from_record(record))
+            self.shutdown()
+            self.log_stats_summary()
+            self.log_profile_report()
+    
+    def run_collector(self, port: int = DEFAULT_COLLECTOR_PORT, address: str = "127.0.0.1"):
+        """Log, store and aggregate the results sent by agents (pingtest.py --agent)
+        
+        Remote hosts are keyed "agent/ip", so the same address monitored from
+        two sites keeps separate statistics and stored series.
+        """
+        server = CollectorServer(port, address, logger=self.logger)
+        server.start()
+        start_time = datetime.datetime.now()
+        self.logger.info(f"Collecting results from agents on {address}:{server.port}")
+        deadline = None
+        if self.config['total_runtime'] > 0:
+            deadline = time.monotonic() + self.config['total_runtime']
+            self.logger.info(f"Total runtime: {self.config['total_runtime']} seconds")
+        else:
+            self.logger.info("Application will run indefinitely (press Ctrl+C to stop)")
+        
+        cycle_length = self.config['ping_interval']
+        next_cycle = time.monotonic() + cycle_length
+        cycle_number = 1
+        cycle_results = {'succeeded': 0, 'failed': 0}
+        try:
+            while True:
+                now = time.monotonic()
+                
+                if deadline is not None and now >= deadline:
+                    elapsed_time = datetime.datetime.now() - start_time
+                    self.logger.info("-" * 50)
+                    self.logger.info(f"Total runtime limit reached: {elapsed_time.total_seconds():.1f} seconds")
+                    self.logger.info("Stopping collector")
+                    break
+                
+                if now >= next_cycle:
+                    self.logger.info("-" * 50)
+                    self.logger.info(
+                        f"Collector cycle {cycle_number} completed at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: "
+                        f"{len(server.agents)} agents connected, "
+                        f"{cycle_results['succeeded']} results succeeded, {cycle_results['failed']} failed"
+                    )
+                    if self.states is not None:
+                        self.log_state_summary()
+                    else:
+                        self.log_stats_summary()
+                    self.update_metrics()
+                    cycle_results = {'succeeded': 0, 'failed': 0}
+                    cycle_number += 1
+                    next_cycle += cycle_length
+                    if next_cycle <= now:
+                        next_cycle = now + cycle_length
+                
+                wake_times = [t for t in (next_cycle, deadline) if t is not None]
+                batch = server.receive(max(0.0, min(wake_times) - time.monotonic()))
+                if batch is None:
+                    continue
+                agent, records = batch
+                for record in records:
+                    try:
+                        result = from_record(record[:-1])
+                        result.ip = f"{agent}/{result.ip}"
+                        self.targets.add(result.ip, record[-1])
+                        self.handle_result(result)
+                    except (TypeError, ValueError) as e:
+                        self.logger.warning(f"Dropped a record from agent {agent}: {e}")
+                        continue
+                    cycle_results['succeeded' if result.success else 'failed'] += 1
+                
+        except KeyboardInterrupt:
+            elapsed_time = datetime.datetime.now() - start_time
+            self.logger.info(f"Collector stopped by user after {elapsed_time.total_seconds():.1f} seconds")
+        finally:
+            server.stop()
+            self.shutdown()
+            self.log_stats_summary()
     
     def run_single_test(self):
         """Run a single ping test and exit"""
-        ip_addresses = self.config['ip_addresses']
+        ip_addresses = self.targets
         
         if not ip_addresses:
             self.logger.error("No IP addresses configured")
             return
         
         self.logger.info(f"Running single ping test for {len(ip_addresses)} IP addresses")
+        self.logger.info(f"Probe backend: {self.backend_description}")
         
-        for ip, display_name in ip_addresses.items():
-            if display_name:
-                self.logger.info(f"Pinging {display_name} ({ip})...")
-            else:
-                self.logger.info(f"Pinging {ip}...")
-            result = self.ping_host(ip)
-            self.log_ping_result(result)
-            time.sleep(1)
+        self.start_capture()
+        try:
+            self.run_sweep(ip_addresses)
+            self.update_metrics()
+        finally:
+            self.stop_capture()
+            self.shutdown()
+        self.log_stats_summary()
+        self.log_profile_report()
+    
+    def run_discovery(self, specs: List[str], output_file: Optional[str] = None) -> Dict[str, str]:
+        """Find the live hosts among addresses, blocks and ranges with one ping each
+        
+        Addresses are generated as they are probed, so large blocks are never
+        held in memory. The live hosts are written to output_file in config
+        file format, ready to be used as or merged into ip_addresses.
+        """
+        targets = TargetSet(dict.fromkeys(specs, ""))
+        for spec, error in targets.invalid:
+            self.logger.error(f"Invalid IP address, block or range {spec}: {error}")
+        if not targets:
+            return {}
+        self.targets = targets  # the probe paths look host names and settings up in the swept set
+        
+        self.config['ping_count'] = 1
+        self.config['text_results'] = False
+        self.logger.info(f"Discovering live hosts among {len(targets)} addresses")
+        self.logger.info(f"Probe backend: {self.backend_description}")
+        
+        start = time.perf_counter()
+        found = {}
+        try:
+            for result in self.engine.sweep(targets):
+                if result.success:
+                    found[result.ip] = ""
+                    self.logger.info(f"Found {result.ip} ({result.response_time:.2f}ms)")
+        finally:
+            self.shutdown()
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            f"Discovery finished in {elapsed:.1f} seconds: {len(found)} of {len(targets)} addresses replied"
+        )
+        
+        if output_file:
+            with open(output_file, 'w') as f:
+                json.dump({"ip_addresses": found}, f, indent=4)
+            self.logger.info(f"Live hosts written to {output_file}")
+        return found
 
 
 def main():
     """Main function"""
     import argparse
     
+    # "pingtest.py analyze ..." analyzes existing log files instead of pinging
+    if len(sys.argv) > 1 and sys.argv[1] == 'analyze':
+        import log_analyzer
+        log_analyzer.main(sys.argv[2:])
+        return
+    
+    # "pingtest.py collect ..." receives results from agents at other sites
+    if len(sys.argv) > 1 and sys.argv[1] == 'collect':
+        import collector
+        collector.main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(description='PingTest - Network ping monitoring application')
     parser.add_argument('--config', '-c', default='config.json', help='Configuration file path')
     parser.add_argument('--single', '-s', action='store_true', help='Run single test and exit')
     parser.add_argument('--interval', '-i', type=int, help='Override ping interval from config')
     parser.add_argument('--runtime', '-r', type=int, help='Override total runtime from config (in seconds)')
+    parser.add_argument('--max-concurrent', '-m', type=int, help='Override maximum number of probes in flight')
+    parser.add_argument('--backend', '-b', choices=['auto', 'icmp', 'multiplex', 'fping', 'subprocess'], help='Override probe backend from config')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on this port')
+    parser.add_argument('--metrics-address', default='0.0.0.0', help='Address for the metrics endpoint (default: all interfaces)')
+    parser.add_argument('--workers', '-w', type=int, metavar='N', help='Spread the IP addresses across N worker processes (continuous monitoring)')
+    parser.add_argument('--stream', nargs='?', type=int, const=DEFAULT_STREAM_PORT, metavar='PORT', help=f'Stream results to the config editor live view on this local port (default: {DEFAULT_STREAM_PORT})')
+    parser.add_argument('--stream-address', default='127.0.0.1', help='Address the result stream listens on (default: 127.0.0.1)')
+    parser.add_argument('--agent', metavar='HOST[:PORT]', help=f'Send results to a collector (pingtest.py collect) at this address (default port: {DEFAULT_COLLECTOR_PORT})')
+    parser.add_argument('--agent-name', help='Name this agent reports to the collector (default: host name)')
+    parser.add_argument('--discover', '-d', nargs='+', metavar='TARGET', help='Find live hosts in these addresses, CIDR blocks or ranges and exit')
+    parser.add_argument('--discover-output', metavar='FILE', help='Write the hosts found by --discover to this file (config file format)')
+    parser.add_argument('--profile', '-p', action='store_true', help='Time each probing stage (every backend) and report the timings')
+    parser.add_argument('--capture', type=int, metavar='SWEEPS', help='Record cProfile and tracemalloc data for this many sweeps (reactor I/O loops excluded)')
+    parser.add_argument('--capture-file', default='pingtest_profile.prof', help='Output file for --capture (default: pingtest_profile.prof)')
     
     args = parser.parse_args()
     
@@ -337,13 +1409,48 @@ def main():
         # Override interval if specified
         if args.interval:
             pingtest.config['ping_interval'] = args.interval
+            pingtest.overrides.add('ping_interval')
         
         # Override runtime if specified
         if args.runtime:
             pingtest.config['total_runtime'] = args.runtime
+            pingtest.overrides.add('total_runtime')
+        
+        # Override probe backend if specified
+        if args.backend:
+            pingtest.config['backend'] = args.backend
+            pingtest.overrides.add('backend')
+            pingtest.replace_prober()
+        
+        # Override concurrency limit if specified
+        if args.max_concurrent:
+            pingtest.config['max_concurrent'] = args.max_concurrent
+            pingtest.overrides.add('max_concurrent')
+        
+        if args.backend or args.max_concurrent:
+            pingtest.replace_engine()
+        
+        if args.profile:
+            pingtest.timers = StageTimers()
+        
+        if args.capture:
+            pingtest.capture = ProfileCapture(args.capture, args.capture_file)
+        
+        if args.metrics_port is not None:
+            pingtest.start_metrics(args.metrics_port, args.metrics_address)
+        
+        if args.stream is not None:
+            pingtest.start_stream(args.stream, args.stream_address)
+        
+        if args.agent:
+            pingtest.start_agent(args.agent, args.agent_name)
         
-        if args.single:
+        if args.discover:
+            pingtest.run_discovery(args.discover, args.discover_output)
+        elif args.single:
             pingtest.run_single_test()
+        elif args.workers and args.workers > 1:
+            pingtest.run_workers(args.workers)
         else:
             pingtest.run_ping_test()
             
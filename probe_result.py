@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Probe Result - the compact result type every prober returns
+One slotted object per probe with an integer nanosecond timestamp and a status code;
+text such as the ISO timestamp is only produced when a sink formats the result
+"""
+
+import datetime
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+STATUS_OK = 0
+STATUS_TIMEOUT = 1
+STATUS_ERROR = 2
+STATUS_NAMES = {STATUS_OK: "ok", STATUS_TIMEOUT: "timeout", STATUS_ERROR: "error"}
+
+# Keys of the dict view, in the order of the former result dicts
+FIELDS = ('ip', 'timestamp', 'success', 'response_time', 'packet_loss', 'error',
+          'rtts', 'sequences', 'address', 'resolve_time')
+_FIELD_SET = frozenset(FIELDS)
+
+
+def error_status(error: Optional[str]) -> int:
+    """Return the status code of a failed probe from its error message"""
+    text = (error or "").lower()
+    if "timed out" in text or "timeout" in text:
+        return STATUS_TIMEOUT
+    return STATUS_ERROR
+
+
+def format_timestamp(timestamp_ns: int) -> str:
+    """Format a nanosecond epoch timestamp as local ISO 8601 text"""
+    return datetime.datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+
+class ProbeResult:
+    """Result of one probe of a host
+
+    The fields are plain attributes; success and timestamp are derived from
+    status and timestamp_ns when asked for. For callers written against the
+    result dicts, result['key'], get(), `in`, keys()/items() and dict(result)
+    work with the keys in FIELDS.
+    """
+
+    # Constructor argument order, also the order of sharding records
+    __slots__ = ('ip', 'timestamp_ns', 'status', 'response_time', 'packet_loss', 'error',
+                 'rtts', 'sequences', 'address', 'resolve_time')
+
+    def __init__(self, ip: str, timestamp_ns: Optional[int] = None, status: int = STATUS_ERROR,
+                 response_time: Optional[float] = None, packet_loss: float = 100.0, error: Optional[str] = None,
+                 rtts: Optional[List[float]] = None, sequences: Optional[List[int]] = None,
+                 address: Optional[str] = None, resolve_time: Optional[float] = None):
+        self.ip = ip
+        self.timestamp_ns = time.time_ns() if timestamp_ns is None else timestamp_ns
+        self.status = status
+        self.response_time = response_time  # ms, average of the replies
+        self.packet_loss = packet_loss      # %
+        self.error = error
+        self.rtts = [] if rtts is None else rtts                 # ms, one per reply
+        self.sequences = [] if sequences is None else sequences  # sequence number of each reply
+        self.address = address              # address probed for a host name target
+        self.resolve_time = resolve_time    # ms the host name lookup took, None if cached
+
+    @classmethod
+    def from_replies(cls, ip: str, timestamp_ns: int, count: int, rtts: List[float], sequences: List[int],
+                     error: Optional[str] = None) -> 'ProbeResult':
+        """Build the result of a probe of count packets from the RTTs of its replies
+
+        error explains why there were no replies (default: "Request timed out").
+        """
+        received = len(rtts)
+        if not received:
+            error = error or "Request timed out"
+            return cls(ip, timestamp_ns, error_status(error), None, 100.0, error, rtts, sequences)
+        return cls(ip, timestamp_ns, STATUS_OK, sum(rtts) / received, ((count - received) / count) * 100,
+                   None, rtts, sequences)
+
+    @classmethod
+    def failed(cls, ip: str, error: str, timestamp_ns: Optional[int] = None) -> 'ProbeResult':
+        """Build the result of a probe that could not be carried out"""
+        return cls(ip, timestamp_ns, error_status(error), error=error)
+
+    @classmethod
+    def from_dict(cls, result: Dict) -> 'ProbeResult':
+        """Build a result from a result dict (timestamp as ISO text)"""
+        timestamp = result.get('timestamp')
+        timestamp_ns = None
+        if isinstance(timestamp, str):
+            timestamp_ns = int(datetime.datetime.fromisoformat(timestamp).timestamp() * 1e9)
+        status = STATUS_OK if result['success'] else error_status(result.get('error'))
+        return cls(result['ip'], timestamp_ns, status, result.get('response_time'), result.get('packet_loss', 100.0),
+                   result.get('error'), result.get('rtts'), result.get('sequences'), result.get('address'),
+                   result.get('resolve_time'))
+
+    @property
+    def success(self) -> bool:
+        """Whether the host replied"""
+        return self.status == STATUS_OK
+
+    @success.setter
+    def success(self, value: bool):
+        if value:
+            self.status = STATUS_OK
+        elif self.status == STATUS_OK:
+            self.status = error_status(self.error)
+
+    @property
+    def timestamp(self) -> str:
+        """Start of the probe as local ISO 8601 text"""
+        return format_timestamp(self.timestamp_ns)
+
+    @timestamp.setter
+    def timestamp(self, value: str):
+        self.timestamp_ns = int(datetime.datetime.fromisoformat(value).timestamp() * 1e9)
+
+    def copy(self) -> 'ProbeResult':
+        """Return a shallow copy"""
+        return ProbeResult(self.ip, self.timestamp_ns, self.status, self.response_time, self.packet_loss,
+                           self.error, self.rtts, self.sequences, self.address, self.resolve_time)
+
+    def to_dict(self) -> Dict:
+        """Return the result as a dict with the keys in FIELDS"""
+        return {key: getattr(self, key) for key in FIELDS}
+
+    def __getitem__(self, key: str):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELD_SET
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def get(self, key: str, default=None):
+        """Return the value of a dict view key, or default"""
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def keys(self) -> Tuple[str, ...]:
+        """Keys of the dict view"""
+        return FIELDS
+
+    def items(self) -> Iterator[Tuple[str, object]]:
+        """(key, value) pairs of the dict view"""
+        return ((key, getattr(self, key)) for key in FIELDS)
+
+    def __repr__(self) -> str:
+        return (f"ProbeResult({self.ip!r}, status={STATUS_NAMES.get(self.status, self.status)}, "
+                f"response_time={self.response_time!r}, packet_loss={self.packet_loss!r}, error={self.error!r})")
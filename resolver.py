@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Resolver - resolves host name targets off the probing path with a TTL cache
+Lookups run on a small thread pool; answers are cached for their DNS TTL (when dnspython
+is installed) and failures for a short negative TTL, so probes rarely wait for DNS
+"""
+
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import dns.exception
+    import dns.resolver
+except ImportError:  # dnspython is optional; without it answers are cached for a fixed time
+    dns = None
+
+
+def lookup(name: str, timeout: float = 5.0) -> Tuple[str, Optional[float]]:
+    """Resolve a host name to one address; return (address, TTL in seconds or None if unknown)
+
+    Raises OSError if the name cannot be resolved.
+    """
+    if dns is not None:
+        for record_type in ('A', 'AAAA'):
+            try:
+                answer = dns.resolver.resolve(name, record_type, lifetime=timeout)
+                return answer[0].address, answer.rrset.ttl
+            except dns.exception.DNSException:
+                continue
+        # Not in DNS: fall through to the system resolver (hosts file, mDNS)
+    infos = socket.getaddrinfo(name, None, type=socket.SOCK_STREAM)
+    return infos[0][4][0], None
+
+
+class CacheEntry:
+    """A cached answer: an address, or the error of a failed lookup"""
+
+    __slots__ = ('address', 'error', 'expires', 'resolve_time')
+
+    def __init__(self, address: Optional[str], error: Optional[str], expires: float, resolve_time: float):
+        self.address = address
+        self.error = error
+        self.expires = expires
+        self.resolve_time = resolve_time  # ms the lookup took
+
+
+class Resolver:
+    """Resolves host names on a thread pool and caches the answers
+
+    resolve() hands the callback a cached answer at once. A name that is not
+    cached (or whose failure has expired) is looked up on the pool and every
+    callback waiting for it runs on the pool thread when the answer arrives;
+    a single lookup serves all of them. An expired address is still handed
+    out while it is refreshed in the background, so DNS latency only delays
+    the very first probe of a host.
+    """
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 30, timeout: float = 5.0,
+                 max_workers: int = 4, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl                    # cache time when the TTL is unknown
+        self.negative_ttl = negative_ttl  # cache time of failed lookups
+        self.timeout = timeout
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resolver")
+        self._cache = {}
+        self._waiting = {}  # name -> callbacks waiting for its lookup
+        self._lock = threading.Lock()
+        self._closed = False
+        self._counts = [0, 0, 0, 0.0, 0.0]  # cache hits, lookups, failures, total ms, max ms
+
+    def resolve(self, name: str, callback: Callable[[CacheEntry, Optional[float]], None]):
+        """Call callback(entry, resolve_time) with the answer for name
+
+        resolve_time is the lookup time in ms if this answer was just looked
+        up, None if it came from the cache.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None and (entry.expires > now or entry.address is not None):
+                self._counts[0] += 1
+                if entry.expires <= now and name not in self._waiting:
+                    self._waiting[name] = []
+                    self.executor.submit(self._lookup, name)
+            else:
+                entry = None
+                callbacks = self._waiting.get(name)
+                if callbacks is None:
+                    self._waiting[name] = callbacks = []
+                    self.executor.submit(self._lookup, name)
+                callbacks.append(callback)
+        if entry is not None:
+            callback(entry, None)
+
+    def resolve_wait(self, name: str) -> Tuple[CacheEntry, Optional[float]]:
+        """Return (entry, resolve_time) for name, waiting for the lookup if needed"""
+        done = threading.Event()
+        holder = []
+
+        def on_answer(entry, resolve_time):
+            holder.append((entry, resolve_time))
+            done.set()
+
+        self.resolve(name, on_answer)
+        done.wait()
+        return holder[0]
+
+    def _lookup(self, name: str):
+        """Look up a name, cache the answer and hand it to the waiting callbacks"""
+        start = time.perf_counter()
+        try:
+            if self._closed:
+                raise OSError("Resolver closed")
+            address, ttl = lookup(name, self.timeout)
+            error = None
+            ttl = self.ttl if ttl is None else max(1, ttl)
+        except (OSError, UnicodeError) as e:
+            address = None
+            error = e.strerror if isinstance(e, OSError) and e.strerror else str(e)
+            ttl = self.negative_ttl
+        resolve_time = (time.perf_counter() - start) * 1000
+        entry = CacheEntry(address, error, self.clock() + ttl, resolve_time)
+        with self._lock:
+            self._cache[name] = entry
+            callbacks = self._waiting.pop(name, [])
+            counts = self._counts
+            counts[1] += 1
+            if error is not None:
+                counts[2] += 1
+            counts[3] += resolve_time
+            counts[4] = max(counts[4], resolve_time)
+        for callback in callbacks:
+            try:
+                callback(entry, resolve_time)
+            except Exception:
+                pass
+
+    def forget(self, name: str):
+        """Drop a name from the cache"""
+        with self._lock:
+            self._cache.pop(name, None)
+
+    def take_stats(self) -> Dict:
+        """Return cache hits, lookups, failures and lookup times since the previous call"""
+        with self._lock:
+            hits, lookups, failures, total, longest = self._counts
+            self._counts = [0, 0, 0, 0.0, 0.0]
+        return {
+            'hits': hits,
+            'lookups': lookups,
+            'failures': failures,
+            'avg_ms': total / lookups if lookups else None,
+            'max_ms': longest if lookups else None
+        }
+
+    def close(self):
+        """Stop the lookup threads, dropping lookups not yet started"""
+        self._closed = True
+        self.executor.shutdown(wait=True)
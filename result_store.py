@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Result Store - append-only binary storage for ping results
+Fixed-width records in segment files (one per probe, plus one per reply RTT),
+host names interned in a sidecar index, and memory-mapped, zero-copy reads
+"""
+
+import datetime
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# The status codes are part of the record format, so readers get them from here too
+from probe_result import STATUS_ERROR, STATUS_NAMES, STATUS_OK, STATUS_TIMEOUT, ProbeResult  # noqa: F401
+
+try:
+    import numpy
+except ImportError:  # numpy is optional; only ResultReader.arrays() needs it
+    numpy = None
+
+
+# timestamp (int64 ns since the epoch), host index (uint32), RTT ms (float32,
+# NaN when there was no reply), packet loss % (float32), status (uint8), padding
+RECORD = struct.Struct("<qIffB3x")
+RECORD_DTYPE = [('timestamp', '<i8'), ('host', '<u4'), ('rtt', '<f4'),
+                ('loss', '<f4'), ('status', 'u1'), ('pad', 'V3')]
+# timestamp of the probe (int64 ns), host index (uint32), reply sequence
+# number (uint32), RTT ms (float32)
+SAMPLE = struct.Struct("<qIIf")
+SAMPLE_DTYPE = [('timestamp', '<i8'), ('host', '<u4'), ('sequence', '<u4'), ('rtt', '<f4')]
+# Version 1: probe records only; version 2 added the sample segments
+FORMAT_VERSION = 2
+SAMPLES_FORMAT = 2
+
+SEGMENT_PATTERN = "segment_*.bin"
+SAMPLE_PATTERN = "samples_*.bin"
+HOST_INDEX = "hosts.txt"
+METADATA = "store.json"
+
+
+def read_metadata(directory: str) -> Optional[Dict]:
+    """Return the store.json metadata of a store, None if it has none
+
+    Raises ValueError if the store was written in a newer format or with
+    different record layouts than this version reads.
+    """
+    try:
+        with open(os.path.join(directory, METADATA), 'r') as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        return None
+    version = metadata.get('format')
+    if not isinstance(version, int) or version > FORMAT_VERSION:
+        raise ValueError(f"Result store {directory} has format {version!r}; this version reads up to {FORMAT_VERSION}")
+    if metadata.get('record') != RECORD.format:
+        raise ValueError(f"Result store {directory} has an unknown record layout {metadata.get('record')!r}")
+    if (version >= SAMPLES_FORMAT or 'sample' in metadata) and metadata.get('sample') != SAMPLE.format:
+        raise ValueError(f"Result store {directory} has an unknown sample layout {metadata.get('sample')!r}")
+    return metadata
+
+
+class _SegmentWriter:
+    """Buffered appends to one series of fixed-width record segments"""
+
+    def __init__(self, directory: str, prefix: str, record: struct.Struct, segment_records: int):
+        self.directory = directory
+        self.prefix = prefix
+        self.record = record
+        self.segment_records = segment_records
+        self.buffer = bytearray()
+        self.buffered = 0
+        self._segment = None
+        self._segment_count = 0
+
+    def append(self, timestamp: int, *fields):
+        """Buffer one record, opening a segment named after its timestamp if needed"""
+        self.buffer += self.record.pack(timestamp, *fields)
+        self.buffered += 1
+        if self._segment is None:
+            path = os.path.join(self.directory, f"{self.prefix}_{timestamp:020d}.bin")
+            self._segment = open(path, 'ab')
+            self._segment_count = os.path.getsize(path) // self.record.size
+
+    def flush(self):
+        """Write buffered records to the current segment"""
+        if not self.buffered:
+            return
+        self._segment.write(self.buffer)
+        self._segment.flush()
+        self._segment_count += self.buffered
+        self.buffer = bytearray()
+        self.buffered = 0
+        if self._segment_count >= self.segment_records:
+            self._segment.close()
+            self._segment = None
+
+    def close(self):
+        """Flush and close the current segment"""
+        self.flush()
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+
+class ResultStore:
+    """Appends results to fixed-width record segments in a directory
+
+    Each result becomes one probe record, and the RTT of each of its
+    replies one sample record in the separate samples_*.bin segments.
+    """
+
+    def __init__(self, directory: str, segment_records: int = 1000000, buffer_records: int = 4096,
+                 flush_interval: float = 1.0):
+        self.directory = directory
+        self.segment_records = max(1, int(segment_records))
+        os.makedirs(directory, exist_ok=True)
+
+        # Stores from older versions are upgraded in place: version 1 records are
+        # unchanged, and sample segments are added from now on
+        metadata = read_metadata(directory)
+        if metadata is None or metadata['format'] < FORMAT_VERSION:
+            metadata = dict(metadata or {}, format=FORMAT_VERSION, record=RECORD.format, sample=SAMPLE.format)
+            metadata_path = os.path.join(directory, METADATA)
+            with open(metadata_path + '.tmp', 'w') as f:
+                json.dump(metadata, f, indent=4)
+            os.replace(metadata_path + '.tmp', metadata_path)
+
+        # Host names are interned: line N of hosts.txt is host index N
+        self.hosts = {}
+        index_path = os.path.join(directory, HOST_INDEX)
+        if os.path.exists(index_path):
+            with open(index_path, 'r') as f:
+                for line in f:
+                    self.hosts.setdefault(line.rstrip('\n'), len(self.hosts))
+        self._host_index_file = open(index_path, 'a')
+
+        self._records = _SegmentWriter(directory, "segment", RECORD, self.segment_records)
+        self._samples = _SegmentWriter(directory, "samples", SAMPLE, self.segment_records)
+        self._buffer_records = buffer_records
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def host_index(self, host: str) -> int:
+        """Return the index of a host name, adding it to the sidecar index if new"""
+        index = self.hosts.get(host)
+        if index is None:
+            index = self.hosts[host] = len(self.hosts)
+            self._host_index_file.write(host + '\n')
+            self._host_index_file.flush()
+        return index
+
+    def append(self, result: ProbeResult):
+        """Append one result and the RTTs of its replies"""
+        rtt = result.response_time
+        timestamp = result.timestamp_ns
+        host_index = self.host_index(result.ip)
+        samples = self._samples
+        for sample_rtt, sequence in zip(result.rtts, result.sequences):
+            samples.append(timestamp, host_index, sequence, sample_rtt)
+        self.append_record(
+            timestamp,
+            host_index,
+            math.nan if rtt is None else rtt,
+            result.packet_loss,
+            result.status
+        )
+
+    def append_record(self, timestamp: int, host_index: int, rtt: float, loss: float, status: int):
+        """Append one record from its raw fields"""
+        self._records.append(timestamp, host_index, rtt, loss, status)
+        if (self._records.buffered + self._samples.buffered >= self._buffer_records
+                or time.monotonic() - self._last_flush >= self._flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the current segments"""
+        self._last_flush = time.monotonic()
+        self._records.flush()
+        self._samples.flush()
+
+    def close(self):
+        """Flush and close the store"""
+        self._records.close()
+        self._samples.close()
+        self._host_index_file.close()
+
+
+class ResultReader:
+    """Memory-mapped reader over a result store directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        metadata = read_metadata(directory)
+        self.format = FORMAT_VERSION if metadata is None else metadata['format']
+        # Sample segments arrived with format 2 (some version 1 stores carry them already)
+        self.has_samples = metadata is None or 'sample' in metadata
+        self.hosts = []
+        index_path = os.path.join(directory, HOST_INDEX)
+        if os.path.exists(index_path):
+            with open(index_path, 'r') as f:
+                self.hosts = [line.rstrip('\n') for line in f]
+        self.host_lookup = {host: index for index, host in enumerate(self.hosts)}
+
+    def segment_paths(self, pattern: str = SEGMENT_PATTERN) -> List[str]:
+        """Return segment (or with SAMPLE_PATTERN, sample segment) files, oldest first"""
+        if pattern == SAMPLE_PATTERN and not self.has_samples:
+            return []
+        return sorted(glob.glob(os.path.join(self.directory, pattern)))
+
+    def _map(self, path: str, record: struct.Struct = RECORD) -> Tuple[Optional[mmap.mmap], int]:
+        """Memory-map a segment, returning (map, complete record count)"""
+        size = os.path.getsize(path)
+        count = size // record.size  # ignore a partially written record
+        if count == 0:
+            return None, 0
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), count
+
+    def segments(self, samples: bool = False) -> Iterator[memoryview]:
+        """Yield a zero-copy view of the complete records (or samples) in each segment
+
+        Each view is released when the next segment is requested.
+        """
+        pattern, record = (SAMPLE_PATTERN, SAMPLE) if samples else (SEGMENT_PATTERN, RECORD)
+        for path in self.segment_paths(pattern):
+            mapped, count = self._map(path, record)
+            if mapped is None:
+                continue
+            view = memoryview(mapped)[:count * record.size]
+            try:
+                yield view
+            finally:
+                view.release()
+                mapped.close()
+
+    def records(self, host: Optional[str] = None, start_ns: Optional[int] = None,
+                end_ns: Optional[int] = None) -> Iterator[Tuple]:
+        """Yield (timestamp_ns, host, rtt, loss, status) tuples, optionally filtered"""
+        host_index = None
+        if host is not None:
+            host_index = self.host_lookup.get(host)
+            if host_index is None:
+                return
+        for view in self.segments():
+            for timestamp, index, rtt, loss, status in RECORD.iter_unpack(view):
+                if host_index is not None and index != host_index:
+                    continue
+                if start_ns is not None and timestamp < start_ns:
+                    continue
+                if end_ns is not None and timestamp >= end_ns:
+                    continue
+                yield timestamp, self.hosts[index], rtt, loss, status
+
+    def samples(self, host: Optional[str] = None, start_ns: Optional[int] = None,
+                end_ns: Optional[int] = None) -> Iterator[Tuple]:
+        """Yield (timestamp_ns, host, sequence, rtt) tuples of individual replies, optionally filtered"""
+        host_index = None
+        if host is not None:
+            host_index = self.host_lookup.get(host)
+            if host_index is None:
+                return
+        for view in self.segments(samples=True):
+            for timestamp, index, sequence, rtt in SAMPLE.iter_unpack(view):
+                if host_index is not None and index != host_index:
+                    continue
+                if start_ns is not None and timestamp < start_ns:
+                    continue
+                if end_ns is not None and timestamp >= end_ns:
+                    continue
+                yield timestamp, self.hosts[index], sequence, rtt
+
+    def arrays(self, samples: bool = False) -> Iterator:
+        """Yield a numpy structured array per segment (zero-copy over the mmap)"""
+        if numpy is None:
+            raise RuntimeError("numpy is required for vectorized reads")
+        pattern, record, dtype = ((SAMPLE_PATTERN, SAMPLE, SAMPLE_DTYPE) if samples
+                                  else (SEGMENT_PATTERN, RECORD, RECORD_DTYPE))
+        dtype = numpy.dtype(dtype)
+        for path in self.segment_paths(pattern):
+            mapped, count = self._map(path, record)
+            if mapped is not None:
+                # The array keeps the map open for as long as it is in use
+                yield numpy.frombuffer(mapped, dtype=dtype, count=count)
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='PingTest result store reader')
+    parser.add_argument('directory', help='Result store directory')
+    parser.add_argument('--host', help='Only show results for this host')
+    parser.add_argument('--samples', action='store_true', help='Show the RTT of every reply instead of one line per probe')
+    args = parser.parse_args()
+
+    try:
+        reader = ResultReader(args.directory)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    if args.samples:
+        for timestamp, host, sequence, rtt in reader.samples(host=args.host):
+            when = datetime.datetime.fromtimestamp(timestamp / 1e9).isoformat(timespec='milliseconds')
+            print(f"{when},{host},{sequence},{rtt:.3f}")
+        return
+    for timestamp, host, rtt, loss, status in reader.records(host=args.host):
+        when = datetime.datetime.fromtimestamp(timestamp / 1e9).isoformat(timespec='milliseconds')
+        rtt_text = "" if math.isnan(rtt) else f"{rtt:.3f}"
+        print(f"{when},{host},{rtt_text},{loss:.1f},{STATUS_NAMES.get(status, status)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Result Stream - live probe results from PingTest to local subscribers
+Results are sent as JSON lines over TCP; the config editor's live view subscribes
+"""
+
+import collections
+import json
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from probe_result import ProbeResult
+
+
+DEFAULT_PORT = 9102
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+class ResultPublisher:
+    """Sends every probe result to all connected subscribers
+
+    publish() only appends to a bounded queue; a background thread encodes
+    the queued results and writes them to the subscribers in one batch. A
+    new subscriber first receives the latest result of every host. A
+    subscriber that cannot keep up (send blocks for more than send_timeout
+    seconds) is disconnected, and the queue drops the oldest results rather
+    than grow when nobody reads them.
+    """
+
+    def __init__(self, port: int = DEFAULT_PORT, address: str = "127.0.0.1",
+                 max_pending: int = 100000, send_timeout: float = 1.0):
+        self.port = port
+        self.address = address
+        self.send_timeout = send_timeout
+        self._pending = collections.deque(maxlen=max_pending)
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._latest = {}    # ip -> encoded line of its latest result
+        self._clients = []
+        self._server = None
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        """Start listening for subscribers"""
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.address, self.port))
+        self._server.listen(8)
+        self._server.settimeout(0.5)
+        self.port = self._server.getsockname()[1]
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._accept_loop, name="stream-accept", daemon=True),
+            threading.Thread(target=self._send_loop, name="stream-send", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop the stream and disconnect all subscribers"""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._server.close()
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients = []
+
+    def publish(self, result: ProbeResult, name: str = ""):
+        """Queue a result for the subscribers"""
+        self._pending.append((result, name))
+        self._wakeup.set()
+
+    @property
+    def subscribers(self) -> int:
+        """Number of connected subscribers"""
+        return len(self._clients)
+
+    def _accept_loop(self):
+        """Accept subscribers and send each one the current state"""
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            client.settimeout(self.send_timeout)
+            with self._lock:
+                try:
+                    client.sendall(b"".join(self._latest.values()))
+                except OSError:
+                    client.close()
+                    continue
+                self._clients.append(client)
+
+    def _send_loop(self):
+        """Encode queued results and send them to every subscriber"""
+        pending = self._pending
+        running = True
+        while running:
+            self._wakeup.wait(0.5)
+            self._wakeup.clear()
+            running = self._running  # results queued before stop() are still sent
+            lines = {}
+            data = []
+            while pending:
+                result, name = pending.popleft()
+                line = (json.dumps(dict(result.to_dict(), name=name), separators=(',', ':')) + "\n").encode()
+                lines[result.ip] = line
+                data.append(line)
+            if not data:
+                continue
+            data = b"".join(data)
+            with self._lock:
+                self._latest.update(lines)
+                for client in list(self._clients):
+                    try:
+                        client.sendall(data)
+                    except OSError:
+                        client.close()
+                        self._clients.remove(client)
+
+
+class ResultSubscriber:
+    """Receives streamed results on a background thread
+
+    on_result is called on that thread for every result. When the
+    connection fails or PingTest stops, the subscriber reconnects every
+    retry_interval seconds until stop() is called.
+    """
+
+    def __init__(self, on_result: Callable[[Dict], None], address: str = "127.0.0.1",
+                 port: int = DEFAULT_PORT, retry_interval: float = 2.0):
+        self.on_result = on_result
+        self.address = address
+        self.port = port
+        self.retry_interval = retry_interval
+        self.connected = False
+        self.error = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start receiving"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="stream-subscriber", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop receiving; the thread exits on its own, so this never blocks a GUI"""
+        self._running = False
+
+    def _run(self):
+        """Connect, read lines and reconnect after failures"""
+        while self._running:
+            try:
+                with socket.create_connection((self.address, self.port), timeout=self.retry_interval) as sock:
+                    sock.settimeout(0.5)
+                    self.connected = True
+                    self.error = None
+                    self._read(sock)
+            except OSError as e:
+                self.error = str(e)
+            self.connected = False
+            deadline = time.monotonic() + self.retry_interval
+            while self._running and time.monotonic() < deadline:
+                time.sleep(0.1)
+
+    def _read(self, sock: socket.socket):
+        """Read results until the connection closes or stop() is called"""
+        buffer = b""
+        while self._running:
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                self.error = "PingTest stopped streaming"
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue
+                self.on_result(result)
+
+
+def sparkline(values: Iterable[Optional[float]]) -> str:
+    """Draw response times as block characters, scaled to their range; None (failed) as ×"""
+    values = list(values)
+    rtts = [value for value in values if value is not None]
+    if not rtts:
+        return "×" * len(values)
+    low = min(rtts)
+    span = max(rtts) - low
+    top = len(SPARK_CHARS) - 1
+    return "".join(
+        "×" if value is None else SPARK_CHARS[round((value - low) / span * top) if span else 0]
+        for value in values
+    )
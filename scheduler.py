@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Probe Scheduler - drift-free per-host probe timing for PingTest
+Keeps every host on its own fixed period using the monotonic clock
+"""
+
+import heapq
+import itertools
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class ProbeScheduler:
+    """Heap of next probe times, one entry per host
+
+    Each host is rescheduled from its previous due time rather than from
+    when its probe finished, so the period never stretches. A host that is
+    still being probed when it comes due again counts as an overrun, and
+    periods that pass entirely while the loop was blocked count as skipped
+    cycles; neither delays the following cycles.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._order = itertools.count()
+        self._entries = {}      # ip -> order of its live heap entry
+        self._due = {}          # ip -> due time of its live heap entry
+        self._intervals = {}    # ip -> probe interval in seconds
+        self._in_flight = set()
+
+        self.overruns = Counter()
+        self.skipped = Counter()
+        self.probes = 0
+        self._cycle = [0, 0, 0]  # probes, overruns, skipped since last take_cycle_counts()
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, ip_address: str) -> bool:
+        return ip_address in self._intervals
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._intervals))
+
+    def add(self, ip_address: str, interval: float, offset: float = 0.0):
+        """Schedule a host every interval seconds, first due offset seconds from now"""
+        interval = float(interval)
+        if interval <= 0:
+            raise ValueError(f"Probe interval for {ip_address} must be positive")
+        self._intervals[ip_address] = interval
+        self._push(ip_address, self.clock() + offset)
+
+    def schedule_all(self, intervals: Dict[str, float], stagger: bool = True):
+        """Add many hosts, spreading hosts that share an interval evenly across it"""
+        groups = {}
+        for ip, interval in intervals.items():
+            groups.setdefault(float(interval), []).append(ip)
+        for interval, ips in groups.items():
+            step = interval / len(ips) if stagger else 0.0
+            for index, ip in enumerate(ips):
+                self.add(ip, interval, index * step)
+
+    def remove(self, ip_address: str):
+        """Stop scheduling a host (its heap entry is discarded lazily)"""
+        self._intervals.pop(ip_address, None)
+        self._entries.pop(ip_address, None)
+        self._due.pop(ip_address, None)
+        self._in_flight.discard(ip_address)
+
+    def set_interval(self, ip_address: str, interval: float):
+        """Change a host's interval; its next probe moves to one new interval after the last"""
+        interval = float(interval)
+        if interval <= 0:
+            raise ValueError(f"Probe interval for {ip_address} must be positive")
+        previous = self._intervals.get(ip_address)
+        if previous is None or previous == interval:
+            return
+        self._intervals[ip_address] = interval
+        last_due = self._due[ip_address] - previous
+        self._push(ip_address, max(self.clock(), last_due + interval))
+
+    def interval(self, ip_address: str) -> Optional[float]:
+        """Return a host's probe interval, or None if it is not scheduled"""
+        return self._intervals.get(ip_address)
+
+    def next_due(self) -> Optional[float]:
+        """Return the clock time of the earliest scheduled probe"""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Return hosts whose probe is due now and schedule their next one
+
+        Returned hosts are marked in flight until complete() is called.
+        """
+        if now is None:
+            now = self.clock()
+        due_hosts = []
+        while self._heap and self._heap[0][0] <= now:
+            due, order, ip = heapq.heappop(self._heap)
+            if self._entries.get(ip) != order:
+                continue  # Removed or rescheduled since this entry was pushed
+            interval = self._intervals[ip]
+
+            # Advance to the next slot after now, counting whole periods missed
+            next_due = due + interval
+            if next_due <= now:
+                missed = int((now - due) // interval)
+                self.skipped[ip] += missed
+                self._cycle[2] += missed
+                next_due = due + (missed + 1) * interval
+            self._push(ip, next_due)
+
+            if ip in self._in_flight:
+                self.overruns[ip] += 1
+                self._cycle[1] += 1
+                continue
+            self._in_flight.add(ip)
+            self.probes += 1
+            self._cycle[0] += 1
+            due_hosts.append(ip)
+        return due_hosts
+
+    def complete(self, ip_address: str):
+        """Mark a host's probe as finished"""
+        self._in_flight.discard(ip_address)
+
+    def take_cycle_counts(self) -> Tuple[int, int, int]:
+        """Return (probes, overruns, skipped) since the previous call and reset them"""
+        counts = tuple(self._cycle)
+        self._cycle = [0, 0, 0]
+        return counts
+
+    def _push(self, ip_address: str, due: float):
+        """Push a heap entry for a host, superseding any earlier one"""
+        order = next(self._order)
+        self._entries[ip_address] = order
+        self._due[ip_address] = due
+        heapq.heappush(self._heap, (due, order, ip_address))
+
+    def _discard_stale(self):
+        """Drop superseded entries from the top of the heap"""
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Service Prober - TCP connect, UDP echo and HTTP(S) HEAD probes for hosts that block ICMP
+One reactor thread drives every probe with non-blocking sockets, and HTTP connections
+are kept alive between probes so repeated probes measure the service, not the handshake
+"""
+
+import collections
+import errno
+import heapq
+import itertools
+import os
+import selectors
+import socket
+import ssl
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from probe_result import ProbeResult
+
+from icmp_prober import is_ipv6
+
+
+TCP = "tcp"
+UDP = "udp"
+HTTP = "http"
+HTTPS = "https"
+
+PROBE_TYPES = ("icmp", TCP, UDP, HTTP, HTTPS)
+DEFAULT_PORTS = {HTTP: 80, HTTPS: 443}
+
+# HTTP responses with a status at or above this count as failed probes
+HTTP_FAILURE_STATUS = 500
+MAX_HEADER_BYTES = 65536
+
+
+class ServiceTarget:
+    """How to probe one host, from its host_settings entry"""
+
+    __slots__ = ('kind', 'port', 'path', 'host', 'payload', 'verify')
+
+    def __init__(self, kind: str, port: int, path: str = "/", host: Optional[str] = None,
+                 payload: bytes = b"pingtest", verify: bool = True):
+        self.kind = kind
+        self.port = port
+        self.path = path
+        self.host = host        # HTTP Host header and TLS server name (default: the address)
+        self.payload = payload  # UDP datagram, expected back unchanged
+        self.verify = verify    # check the HTTPS certificate
+
+
+def parse_service(settings: Dict, hostname: Optional[str] = None) -> Optional[ServiceTarget]:
+    """Return the service probe of a host_settings entry, None for ICMP (the default)
+
+    hostname is the default Host header and TLS server name (a host name
+    target's name). Raises ValueError for an unknown probe type or a
+    missing port.
+    """
+    kind = settings.get('probe', 'icmp')
+    if kind == 'icmp':
+        return None
+    if kind not in PROBE_TYPES:
+        raise ValueError(f"Unknown probe type {kind!r} (expected one of {', '.join(PROBE_TYPES)})")
+    port = settings.get('port', DEFAULT_PORTS.get(kind))
+    if port is None:
+        raise ValueError(f"{kind} probe needs a port")
+    return ServiceTarget(
+        kind, int(port),
+        path=settings.get('path', '/'),
+        host=settings.get('host', hostname),
+        payload=settings.get('payload', 'pingtest').encode(),
+        verify=settings.get('verify', True)
+    )
+
+
+class _Probe:
+    """State of one multi-attempt service probe"""
+
+    __slots__ = ('ip', 'target', 'callback', 'count', 'timestamp_ns', 'started', 'last_start',
+                 'lost', 'rtts', 'sequences', 'error')
+
+    def __init__(self, ip_address: str, target: ServiceTarget, callback: Callable[[ProbeResult], None], count: int):
+        self.ip = ip_address
+        self.target = target
+        self.callback = callback
+        self.count = count
+        self.timestamp_ns = time.time_ns()
+        self.started = 0      # attempts started
+        self.last_start = 0.0
+        self.lost = 0
+        self.rtts = []
+        self.sequences = []  # attempt number (0-based) of each success in rtts
+        self.error = None
+
+
+class _Attempt:
+    """One connect, datagram or request of a probe while it is outstanding"""
+
+    __slots__ = ('probe', 'number', 'sock', 'step', 'started_ns', 'outgoing', 'buffer', 'reused', 'done')
+
+    def __init__(self, probe: _Probe):
+        self.probe = probe
+        self.number = probe.started - 1
+        self.sock = None
+        self.step = None
+        self.started_ns = 0
+        self.outgoing = b""
+        self.buffer = b""
+        self.reused = False  # sent on a kept-alive HTTP connection
+        self.done = False
+
+
+class ServiceProber:
+    """Probe TCP ports, UDP echo services and HTTP(S) servers from one reactor thread
+
+    Probes have the same submit()/ping() interface and result format as
+    the ICMP probers; count is the number of connects, datagrams or
+    requests. TCP and UDP attempts are started interval seconds apart and
+    each has its own timeout. HTTP requests are sent one after another on
+    a connection that is kept open for the host's next probe (and closed
+    if it stays unused for idle_timeout seconds, or by forget()); response
+    times cover the request only, not connecting or the TLS handshake. An
+    HTTP host that cannot be connected to fails its remaining requests at
+    once, so a down web server costs one timeout, not one per request.
+    """
+
+    name = "service"
+
+    def __init__(self, count: int = 4, timeout: float = 5, interval: float = 0.1, idle_timeout: float = 60):
+        self.count = max(1, int(count))
+        self.timeout = timeout
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+
+        self._selector = selectors.DefaultSelector()
+        self._timers = []            # (due, order, callable, argument)
+        self._order = itertools.count()
+        self._incoming = collections.deque()
+        self._forgotten = collections.deque()  # addresses whose kept-alive sockets should be closed
+        self._attempts = set()
+        self._idle = {}              # (ip, port, tls) -> kept-alive HTTP socket
+        self._contexts = {}          # verify -> ssl.SSLContext
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._selector.register(self._wake_recv, selectors.EVENT_READ, None)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, ip_address: str, target: ServiceTarget, callback: Callable[[ProbeResult], None],
+               count: Optional[int] = None):
+        """Start probing a host; callback receives the result dict on the reactor thread"""
+        if self._closed:
+            raise RuntimeError("Prober is closed")
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="service-reactor", daemon=True)
+                    self._thread.start()
+        count = max(1, int(count)) if count else self.count
+        self._incoming.append(_Probe(ip_address, target, callback, count))
+        self._wake()
+
+    def ping(self, ip_address: str, target: ServiceTarget, count: Optional[int] = None) -> ProbeResult:
+        """Probe a single host and return results in the ping_host format"""
+        done = threading.Event()
+        holder = []
+
+        def on_result(result):
+            holder.append(result)
+            done.set()
+
+        self.submit(ip_address, target, on_result, count)
+        done.wait()
+        return holder[0]
+
+    def forget(self, ip_address: str):
+        """Close the kept-alive connections to a host that is no longer probed"""
+        if self._closed or self._thread is None:
+            return
+        self._forgotten.append(ip_address)
+        self._wake()
+
+    def close(self):
+        """Stop the reactor thread, fail outstanding probes and close kept-alive connections"""
+        self._closed = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join()
+        probes = {attempt.probe for attempt in self._attempts}
+        probes.update(argument for _due, _order, action, argument in self._timers
+                      if action == self._start_attempt)
+        probes.update(self._incoming)
+        for attempt in list(self._attempts):
+            self._close_attempt(attempt)
+        for sock in self._idle.values():
+            sock.close()
+        self._idle.clear()
+        self._selector.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+        for probe in probes:
+            probe.error = probe.error or "Prober closed"
+            probe.lost = probe.count - len(probe.rtts)
+            self._finish(probe)
+
+    def _wake(self):
+        """Interrupt the reactor's select() call"""
+        try:
+            self._wake_send.send(b"\x00")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _schedule(self, due: float, action: Callable, argument):
+        """Run action(argument) on the reactor thread at due (perf_counter time)"""
+        heapq.heappush(self._timers, (due, next(self._order), action, argument))
+
+    def _run(self):
+        """Reactor loop: start due attempts, expire late ones, advance ready sockets"""
+        while not self._closed:
+            now = time.perf_counter()
+            while self._incoming:
+                self._schedule(now, self._start_attempt, self._incoming.popleft())
+            while self._forgotten:
+                ip_address = self._forgotten.popleft()
+                for key in [key for key in self._idle if key[0] == ip_address]:
+                    self._idle.pop(key).close()
+            while self._timers and self._timers[0][0] <= now:
+                _due, _order, action, argument = heapq.heappop(self._timers)
+                action(argument)
+
+            wait = max(0.0, self._timers[0][0] - time.perf_counter()) if self._timers else None
+            for key, mask in self._selector.select(wait):
+                if key.data is None:
+                    try:
+                        while self._wake_recv.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                else:
+                    self._advance(key.data)
+
+    def _start_attempt(self, probe: _Probe):
+        """Open the next attempt of a probe and, for TCP and UDP, schedule the one after it"""
+        now = time.perf_counter()
+        probe.started += 1
+        probe.last_start = now
+        target = probe.target
+        if target.kind in (TCP, UDP) and probe.started < probe.count:
+            self._schedule(now + self.interval, self._start_attempt, probe)
+
+        attempt = _Attempt(probe)
+        self._attempts.add(attempt)
+        self._schedule(now + self.timeout, self._expire, attempt)
+        try:
+            if target.kind == UDP:
+                attempt.sock = self._socket(probe.ip, socket.SOCK_DGRAM)
+                attempt.sock.connect((probe.ip, target.port))
+                attempt.outgoing = target.payload
+                attempt.step = 'send'
+            else:
+                sock = self._idle.pop((probe.ip, target.port, target.kind == HTTPS), None)
+                if sock is not None:
+                    attempt.sock = sock
+                    attempt.reused = True
+                    self._begin_request(attempt)
+                else:
+                    self._connect(attempt)
+            self._selector.register(attempt.sock, selectors.EVENT_WRITE, attempt)
+        except OSError as e:
+            self._fail(attempt, self._describe(e))
+            return
+        self._advance(attempt)
+
+    def _socket(self, ip_address: str, kind: int) -> socket.socket:
+        """Open a non-blocking socket for the address family of ip_address"""
+        sock = socket.socket(socket.AF_INET6 if is_ipv6(ip_address) else socket.AF_INET, kind)
+        sock.setblocking(False)
+        return sock
+
+    def _connect(self, attempt: _Attempt):
+        """Start a non-blocking TCP connect for an attempt"""
+        probe = attempt.probe
+        attempt.sock = self._socket(probe.ip, socket.SOCK_STREAM)
+        attempt.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        attempt.started_ns = time.perf_counter_ns()
+        code = attempt.sock.connect_ex((probe.ip, probe.target.port))
+        if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+            raise OSError(code, os.strerror(code))
+        attempt.step = 'connect'
+
+    def _begin_request(self, attempt: _Attempt):
+        """Queue the HEAD request of an HTTP attempt; its response time starts now"""
+        probe = attempt.probe
+        target = probe.target
+        host = target.host or (f"[{probe.ip}]" if is_ipv6(probe.ip) else probe.ip)
+        if target.port != DEFAULT_PORTS[target.kind]:
+            host = f"{host}:{target.port}"
+        attempt.outgoing = (
+            f"HEAD {target.path} HTTP/1.1\r\nHost: {host}\r\n"
+            f"User-Agent: PingTest\r\nConnection: keep-alive\r\n\r\n"
+        ).encode()
+        attempt.buffer = b""
+        attempt.step = 'send'
+        attempt.started_ns = time.perf_counter_ns()
+
+    def _advance(self, attempt: _Attempt):
+        """Move an attempt through its steps for as long as its socket is ready"""
+        probe = attempt.probe
+        target = probe.target
+        try:
+            while not attempt.done:
+                step = attempt.step
+                if step == 'connect':
+                    code = attempt.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if code:
+                        raise OSError(code, os.strerror(code))
+                    try:
+                        attempt.sock.getpeername()
+                    except OSError:
+                        return  # still connecting
+                    if target.kind == TCP:
+                        self._succeed(attempt)
+                    elif target.kind == HTTPS:
+                        self._selector.unregister(attempt.sock)
+                        attempt.sock = self._context(target.verify).wrap_socket(
+                            attempt.sock, server_hostname=target.host or probe.ip,
+                            do_handshake_on_connect=False)
+                        self._selector.register(attempt.sock, selectors.EVENT_WRITE, attempt)
+                        attempt.step = 'handshake'
+                    else:
+                        self._begin_request(attempt)
+
+                elif step == 'handshake':
+                    attempt.sock.do_handshake()
+                    self._begin_request(attempt)
+
+                elif step == 'send':
+                    if target.kind == UDP and not attempt.started_ns:
+                        attempt.started_ns = time.perf_counter_ns()
+                    sent = attempt.sock.send(attempt.outgoing)
+                    attempt.outgoing = attempt.outgoing[sent:]
+                    if attempt.outgoing:
+                        self._selector.modify(attempt.sock, selectors.EVENT_WRITE, attempt)
+                        return
+                    attempt.step = 'recv'
+                    self._selector.modify(attempt.sock, selectors.EVENT_READ, attempt)
+
+                elif target.kind == UDP:
+                    if attempt.sock.recv(65536) == target.payload:
+                        self._succeed(attempt)
+
+                else:
+                    data = attempt.sock.recv(65536)
+                    if not data:
+                        raise ConnectionResetError(errno.ECONNRESET, "Connection closed by server")
+                    attempt.buffer += data
+                    if b"\r\n\r\n" in attempt.buffer:
+                        self._response(attempt)
+                    elif len(attempt.buffer) > MAX_HEADER_BYTES:
+                        raise OSError(errno.EMSGSIZE, "HTTP response header too large")
+        except ssl.SSLWantReadError:
+            self._selector.modify(attempt.sock, selectors.EVENT_READ, attempt)
+        except ssl.SSLWantWriteError:
+            self._selector.modify(attempt.sock, selectors.EVENT_WRITE, attempt)
+        except (BlockingIOError, InterruptedError):
+            pass
+        except (OSError, ValueError) as e:
+            if attempt.reused and not attempt.buffer:
+                # Any error before the first byte of the response on a kept-alive connection
+                # (closed, ECONNRESET, EPIPE, ...) means the server dropped it while it was idle
+                self._reconnect(attempt)
+            else:
+                self._fail(attempt, self._describe(e))
+
+    def _reconnect(self, attempt: _Attempt):
+        """Retry an attempt once on a new connection in place of a stale kept-alive one"""
+        self._selector.unregister(attempt.sock)
+        attempt.sock.close()
+        attempt.reused = False
+        try:
+            self._connect(attempt)
+            self._selector.register(attempt.sock, selectors.EVENT_WRITE, attempt)
+        except OSError as e:
+            self._fail(attempt, self._describe(e))
+            return
+        self._advance(attempt)
+
+    def _response(self, attempt: _Attempt):
+        """Complete an HTTP attempt from its response header"""
+        header, _, rest = attempt.buffer.partition(b"\r\n\r\n")
+        lines = header.decode('latin-1').split("\r\n")
+        version, status, *reason = lines[0].split(" ", 2)
+        status = int(status)
+        connection = ""
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "connection":
+                connection = value.strip().lower()
+        keep = not rest and (connection == "keep-alive" if version == "HTTP/1.0" else connection != "close")
+        if status >= HTTP_FAILURE_STATUS:
+            self._fail(attempt, f"HTTP {status} {' '.join(reason)}".rstrip(), keep=keep)
+        else:
+            self._succeed(attempt, keep=keep)
+
+    def _succeed(self, attempt: _Attempt, keep: bool = False):
+        """Record the response time of a completed attempt"""
+        attempt.probe.rtts.append((time.perf_counter_ns() - attempt.started_ns) / 1e6)
+        attempt.probe.sequences.append(attempt.number)
+        self._end_attempt(attempt, keep)
+
+    def _fail(self, attempt: _Attempt, error: str, keep: bool = False):
+        """Count an attempt as lost; an HTTP connection failure also fails the requests still to come"""
+        probe = attempt.probe
+        probe.lost += 1
+        probe.error = error
+        if probe.target.kind in (HTTP, HTTPS) and attempt.step in ('connect', 'handshake'):
+            probe.lost += probe.count - probe.started
+            probe.started = probe.count
+        self._end_attempt(attempt, keep)
+
+    def _expire(self, attempt: _Attempt):
+        """Fail an attempt that is still outstanding after the timeout"""
+        if not attempt.done:
+            messages = {'connect': "Connection timed out", 'handshake': "TLS handshake timed out"}
+            self._fail(attempt, messages.get(attempt.step, "Request timed out"))
+
+    def _expire_idle(self, idle: Tuple[Tuple, socket.socket]):
+        """Close a kept-alive socket that has not been reused since it was kept"""
+        key, sock = idle
+        if self._idle.get(key) is sock:
+            del self._idle[key]
+            sock.close()
+
+    def _end_attempt(self, attempt: _Attempt, keep: bool):
+        """Release an attempt's socket (keeping HTTP connections for the next probe) and move its probe on"""
+        probe = attempt.probe
+        if keep:
+            self._selector.unregister(attempt.sock)
+            self._attempts.discard(attempt)
+            attempt.done = True
+            key = (probe.ip, probe.target.port, probe.target.kind == HTTPS)
+            previous = self._idle.pop(key, None)
+            if previous is not None:
+                previous.close()
+            self._idle[key] = attempt.sock
+            self._schedule(time.perf_counter() + self.idle_timeout, self._expire_idle, (key, attempt.sock))
+        else:
+            self._close_attempt(attempt)
+
+        if len(probe.rtts) + probe.lost >= probe.count:
+            self._finish(probe)
+        elif probe.target.kind in (HTTP, HTTPS) and probe.started < probe.count:
+            self._schedule(max(time.perf_counter(), probe.last_start + self.interval), self._start_attempt, probe)
+
+    def _close_attempt(self, attempt: _Attempt):
+        """Unregister and close an attempt's socket"""
+        attempt.done = True
+        self._attempts.discard(attempt)
+        if attempt.sock is not None:
+            try:
+                self._selector.unregister(attempt.sock)
+            except (KeyError, ValueError):
+                pass
+            attempt.sock.close()
+
+    def _context(self, verify: bool) -> ssl.SSLContext:
+        """Return the TLS context for HTTPS probes, with or without certificate checks"""
+        context = self._contexts.get(verify)
+        if context is None:
+            context = ssl.create_default_context()
+            if not verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self._contexts[verify] = context
+        return context
+
+    @staticmethod
+    def _describe(error: Exception) -> str:
+        """Return a short error message without the errno prefix"""
+        if isinstance(error, OSError) and error.strerror and not isinstance(error, ssl.SSLError):
+            return error.strerror
+        return str(error)
+
+    def _finish(self, probe: _Probe):
+        """Build the result of a completed probe and hand it to its callback"""
+        result = ProbeResult.from_replies(probe.ip, probe.timestamp_ns, probe.count, probe.rtts,
+                                          probe.sequences, probe.error)
+        try:
+            probe.callback(result)
+        except Exception:
+            pass
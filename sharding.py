@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Sharding - spreads PingTest's targets across worker processes (--workers)
+Each worker probes the hosts that hash to it and streams compact result records
+back to the coordinator, which logs and aggregates them
+"""
+
+import logging
+import multiprocessing
+import operator
+import queue
+import signal
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from probe_result import ProbeResult
+
+
+# ProbeResult attributes in the order they are packed into a record tuple
+# (its constructor's argument order)
+RECORD_FIELDS = ProbeResult.__slots__
+_pack = operator.attrgetter(*RECORD_FIELDS)
+
+
+def shard_of(ip_address: str, workers: int) -> int:
+    """Return the worker a host belongs to (stable across processes and runs)"""
+    return zlib.crc32(ip_address.encode()) % workers
+
+
+def to_record(result: ProbeResult) -> tuple:
+    """Pack a result into a tuple for sending between processes"""
+    return _pack(result)
+
+
+def from_record(record: tuple) -> ProbeResult:
+    """Unpack a record tuple into a result"""
+    return ProbeResult(*record)
+
+
+def worker_main(index: int, workers: int, config: Dict, commands, results):
+    """Entry point of a worker process: probe this worker's shard until told to stop"""
+    # Ctrl+C reaches every process in the group; the coordinator stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO,
+                        format=f"%(asctime)s - %(levelname)s - [worker {index}] %(message)s")
+    from pingtest import PingTest
+    pingtest = PingTest(config=config, shard=(index, workers))
+    pingtest.run_worker(commands, results)
+
+
+class WorkerPool:
+    """Worker processes, their command queues and the shared result queue
+
+    Hosts are assigned with shard_of(), so when the target list changes
+    only added and removed hosts move: every worker receives the new
+    configuration and schedules or retires just the hosts of its own shard
+    that changed.
+    """
+
+    def __init__(self, workers: int, config: Dict):
+        self.workers = workers
+        # spawn rather than fork: the coordinator already runs threads
+        # (log writer, metrics, result stream) that must not be copied
+        context = multiprocessing.get_context("spawn")
+        self.results = context.Queue()
+        self.commands = [context.Queue() for _ in range(workers)]
+        self.processes = [
+            context.Process(target=worker_main, args=(index, workers, config, self.commands[index], self.results),
+                            name=f"pingtest-worker-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        self._cycle = [0, 0, 0]  # probes, overruns, skipped reported since last take_cycle_counts()
+
+    def start(self):
+        """Start the worker processes"""
+        for process in self.processes:
+            process.start()
+
+    def send_config(self, config: Dict):
+        """Hand a changed configuration to every worker"""
+        for commands in self.commands:
+            commands.put(("config", config))
+
+    def receive(self, timeout: float) -> Optional[List[tuple]]:
+        """Return the next batch of result records, or None if none arrived within timeout"""
+        try:
+            records, counts = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        for position, count in enumerate(counts):
+            self._cycle[position] += count
+        return records
+
+    def take_cycle_counts(self) -> Tuple[int, int, int]:
+        """Return (probes, overruns, skipped) reported by all workers since the previous call"""
+        counts = tuple(self._cycle)
+        self._cycle = [0, 0, 0]
+        return counts
+
+    def alive(self) -> int:
+        """Number of worker processes still running"""
+        return sum(1 for process in self.processes if process.is_alive())
+
+    def stop(self, timeout: float = 5.0) -> List[tuple]:
+        """Stop the workers and return the records they sent while stopping
+
+        Workers that have not exited within timeout are terminated.
+        """
+        for commands in self.commands:
+            commands.put(("stop", None))
+        # Keep reading, a worker cannot exit while its results are unread
+        records = []
+        deadline = time.monotonic() + timeout
+        while self.alive() and time.monotonic() < deadline:
+            batch = self.receive(0.1)
+            if batch:
+                records.extend(batch)
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        return records
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Targets - single addresses, host names, CIDR blocks and address ranges for PingTest
+Blocks and ranges are kept as (first, last) integer bounds and expanded lazily,
+so a /16 costs one entry until its addresses are actually probed
+"""
+
+import ipaddress
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Largest block or range accepted as a target
+MAX_BLOCK_SIZE = 1 << 20
+
+ADDRESS_CLASSES = {4: ipaddress.IPv4Address, 6: ipaddress.IPv6Address}
+
+# RFC 1123 host name label; the last label of a name must not be all digits
+HOSTNAME_LABEL = re.compile(r'^(?!-)[a-z0-9-]{1,63}(?<!-)$', re.IGNORECASE)
+
+# Specs made of digits, dots and dashes only are meant as IPv4 addresses or ranges
+NUMERIC_SPEC = re.compile(r'^[\d.\-\s]+$')
+
+
+class TargetBlock:
+    """A contiguous run of addresses from a CIDR block or range"""
+
+    __slots__ = ('spec', 'name', 'version', 'first', 'last')
+
+    def __init__(self, spec: str, name: str, version: int, first: int, last: int):
+        self.spec = spec
+        self.name = name
+        self.version = version
+        self.first = first
+        self.last = last
+
+    def __len__(self) -> int:
+        return self.last - self.first + 1
+
+    def __iter__(self) -> Iterator[str]:
+        address_class = ADDRESS_CLASSES[self.version]
+        for value in range(self.first, self.last + 1):
+            yield str(address_class(value))
+
+    def __contains__(self, address) -> bool:
+        return address.version == self.version and self.first <= int(address) <= self.last
+
+
+def parse_target(spec: str) -> Tuple[int, int, int]:
+    """Parse a target into (IP version, first address, last address) as integers
+
+    Accepts a single IPv4/IPv6 address, a CIDR block ("192.168.1.0/24",
+    usable host addresses only) or a range ("192.168.1.10-192.168.1.20" or
+    "192.168.1.10-20"). Raises ValueError for anything else.
+    """
+    spec = spec.strip()
+    if '/' in spec:
+        network = ipaddress.ip_network(spec, strict=False)
+        first, last = int(network.network_address), int(network.broadcast_address)
+        # Same addresses as network.hosts(): no network/broadcast address for
+        # IPv4, no subnet-router anycast address for IPv6
+        if network.version == 4 and network.prefixlen < 31:
+            first, last = first + 1, last - 1
+        elif network.version == 6 and network.prefixlen < 127:
+            first += 1
+        version = network.version
+    elif '-' in spec:
+        start_text, end_text = (part.strip() for part in spec.split('-', 1))
+        start = ipaddress.ip_address(start_text)
+        if start.version == 4 and end_text.isdigit():
+            # Short form: "192.168.1.10-20" replaces the last octet
+            end_text = start_text.rsplit('.', 1)[0] + '.' + end_text
+        end = ipaddress.ip_address(end_text)
+        if end.version != start.version:
+            raise ValueError(f"Range {spec} mixes IPv4 and IPv6")
+        first, last, version = int(start), int(end), start.version
+        if last < first:
+            raise ValueError(f"Range {spec} ends before it starts")
+    else:
+        address = ipaddress.ip_address(spec)
+        return address.version, int(address), int(address)
+
+    if last - first + 1 > MAX_BLOCK_SIZE:
+        raise ValueError(f"{spec} has more than {MAX_BLOCK_SIZE} addresses")
+    return version, first, last
+
+
+def is_hostname(spec: str) -> bool:
+    """Return True if spec is a syntactically valid host name (not an address)"""
+    name = spec.strip().rstrip('.')
+    if not name or len(name) > 253:
+        return False
+    labels = name.split('.')
+    return not labels[-1].isdigit() and all(HOSTNAME_LABEL.match(label) for label in labels)
+
+
+def looks_like_address(spec: str) -> bool:
+    """Return True if spec is written as an address, CIDR block or range rather than a host name"""
+    spec = spec.strip()
+    if '/' in spec or ':' in spec or NUMERIC_SPEC.match(spec):
+        return True
+    if '-' in spec:
+        try:
+            ipaddress.ip_address(spec.split('-', 1)[0].strip())
+            return True
+        except ValueError:
+            pass
+    return False
+
+
+def target_error(spec: str) -> Optional[str]:
+    """Return why spec is not a valid address, host name, CIDR block or range (None if it is one)"""
+    try:
+        parse_target(spec)
+        return None
+    except ValueError as e:
+        if looks_like_address(spec):
+            return str(e)
+    return None if is_hostname(spec) else f"{spec!r} is not an IP address, host name, CIDR block or range"
+
+
+def is_valid_target(spec: str) -> bool:
+    """Return True if spec is a valid address, host name, CIDR block or range"""
+    return target_error(spec) is None
+
+
+def is_block(spec: str) -> bool:
+    """Return True if spec names more than a single address"""
+    return '/' in spec or '-' in spec
+
+
+class TargetSet:
+    """The configured targets, with blocks and ranges expanded on demand
+
+    Iterating yields every address to probe once; single addresses and host
+    names come first, in configuration order, followed by the addresses of
+    each block that no single address or earlier block already covers.
+    Host names are resolved when they are probed.
+    """
+
+    def __init__(self, ip_addresses: Dict[str, str]):
+        self.addresses = {}     # single address or host name -> name
+        self.blocks = []        # TargetBlock per CIDR block or range
+        self.hostnames = set()  # the host names among the addresses
+        self.invalid = []       # (spec, reason) for specs that could not be parsed
+        for spec, name in ip_addresses.items():
+            try:
+                version, first, last = parse_target(spec)
+            except ValueError:
+                error = target_error(spec)
+                if error is None:  # a host name
+                    self.addresses[spec] = name
+                    self.hostnames.add(spec)
+                else:
+                    self.invalid.append((spec, error))
+                continue
+            if is_block(spec):
+                self.blocks.append(TargetBlock(spec, name, version, first, last))
+            else:
+                self.addresses[str(ADDRESS_CLASSES[version](first))] = name
+
+        # Runs of block addresses not covered by an earlier block, and the
+        # number of single addresses that fall inside them
+        self._spans = []
+        for index, block in enumerate(self.blocks):
+            earlier = [(other.first, other.last) for other in self.blocks[:index] if other.version == block.version]
+            self._spans.extend((block, first, last) for first, last in subtract_spans(block.first, block.last, earlier))
+        self._span_size = sum(last - first + 1 for _block, first, last in self._spans)
+        self._overlap = sum(1 for ip in self.addresses if self._in_spans(ip))
+
+    def __len__(self) -> int:
+        return len(self.addresses) + self._span_size - self._overlap
+
+    def __bool__(self) -> bool:
+        return bool(self.addresses or self.blocks)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.addresses
+        addresses = self.addresses
+        for block, first, last in self._spans:
+            address_class = ADDRESS_CLASSES[block.version]
+            for value in range(first, last + 1):
+                ip = str(address_class(value))
+                if ip not in addresses:
+                    yield ip
+
+    def _in_spans(self, ip_address: str) -> bool:
+        """Return True if a single address is also a member of a block"""
+        if not self.blocks or ip_address in self.hostnames:
+            return False
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return False
+        return any(address in block for block in self.blocks)
+
+    def block_of(self, ip_address: str) -> Optional[TargetBlock]:
+        """Return the block or range an address belongs to"""
+        if not self.blocks or ip_address in self.addresses:
+            return None
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return None
+        for block in self.blocks:
+            if address in block:
+                return block
+        return None
+
+    def get(self, ip_address: str, default: str = "") -> str:
+        """Return the configured name of an address (its block's name for block members)"""
+        name = self.addresses.get(ip_address)
+        if name is not None:
+            return name
+        block = self.block_of(ip_address)
+        return block.name if block is not None else default
+
+    def add(self, ip_address: str, name: str = ""):
+        """Add or rename a single target (the collector adds the hosts its agents report)"""
+        if ip_address not in self.addresses and self._in_spans(ip_address):
+            self._overlap += 1
+        self.addresses[ip_address] = name
+
+    def spec(self, ip_address: str) -> Optional[str]:
+        """Return the configuration entry an address comes from"""
+        if ip_address in self.addresses:
+            return ip_address
+        block = self.block_of(ip_address)
+        return block.spec if block is not None else None
+
+
+def subtract_spans(first: int, last: int, taken: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Return the parts of first..last (inclusive) outside every (first, last) span in taken, in order"""
+    pieces = [(first, last)]
+    for low, high in taken:
+        remaining = []
+        for start, end in pieces:
+            if high < start or low > end:
+                remaining.append((start, end))
+                continue
+            if start < low:
+                remaining.append((start, low - 1))
+            if end > high:
+                remaining.append((high + 1, end))
+        pieces = remaining
+    return pieces
+
+
+def expand_targets(specs: List[str]) -> Iterator[str]:
+    """Lazily yield every address of the given targets"""
+    return iter(TargetSet(dict.fromkeys(specs, "")))
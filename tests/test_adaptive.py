@@ -0,0 +1,47 @@
+"""Tests for adaptive probe intervals and ping counts"""
+
+from adaptive import DOWN, AdaptiveController
+from probe_result import ProbeResult
+
+
+def failed(ip: str = "192.0.2.1") -> ProbeResult:
+    """Return a failed probe result"""
+    return ProbeResult.failed(ip, "Request timed out")
+
+
+def test_backoff_doubles_up_to_max_interval():
+    """Down hosts back off exponentially and stop at max_interval"""
+    controller = AdaptiveController(max_interval=600, down_after=2)
+    controller.add("192.0.2.1", 20, 2)
+    intervals = []
+    for _ in range(10):
+        controller.update(failed())
+        intervals.append(controller.get("192.0.2.1").interval)
+    # The first failure only raises the smoothed loss (degraded), then the host is down
+    assert intervals[1:7] == [40, 80, 160, 320, 600, 600]
+    assert controller.get("192.0.2.1").state == DOWN
+    assert controller.get("192.0.2.1").count == 1
+
+
+def test_thousands_of_failures_do_not_overflow():
+    """A host that stays down for a long time keeps its interval at max_interval"""
+    controller = AdaptiveController(max_interval=600, backoff_factor=2.0)
+    controller.add("192.0.2.1", 20, 2)
+    for _ in range(5000):
+        controller.update(failed())
+    host = controller.get("192.0.2.1")
+    assert host.failures == 5000
+    assert host.interval == 600
+
+
+def test_recovery_ends_backoff():
+    """The first successful probe after a long outage ends the backoff"""
+    controller = AdaptiveController()
+    controller.add("192.0.2.1", 20, 2)
+    for _ in range(3000):
+        controller.update(failed())
+    controller.update(ProbeResult.from_replies("192.0.2.1", 0, 2, [1.0, 1.1], [0, 1]))
+    host = controller.get("192.0.2.1")
+    assert host.state != DOWN
+    assert host.interval <= 20
+    assert host.count >= 2
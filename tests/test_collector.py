@@ -0,0 +1,169 @@
+"""Tests for the agent/collector transport on localhost"""
+
+import json
+import socket
+import time
+
+import pytest
+
+from collector import AgentShipper, CollectorServer, encode, record_error
+from probe_result import STATUS_OK, ProbeResult
+from sharding import to_record
+
+
+def result(ip: str) -> ProbeResult:
+    """Return a successful one-packet result"""
+    return ProbeResult(ip, 1700000000000000000, STATUS_OK, 2.0, 0.0, None, [2.0], [0])
+
+
+def record(ip: str, name: str = "") -> list:
+    """Return a record as an agent sends it (after a JSON round trip)"""
+    return json.loads(json.dumps(list(to_record(result(ip)) + (name,))))
+
+
+def received(server: CollectorServer, count: int, timeout: float = 5.0) -> list:
+    """Collect the records of batches until count records arrived"""
+    records = []
+    deadline = time.monotonic() + timeout
+    while len(records) < count and time.monotonic() < deadline:
+        batch = server.receive(0.1)
+        if batch is not None:
+            records.extend(batch[1])
+    return records
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """Poll until condition() is true or timeout expires"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+class RawAgent:
+    """Speaks the agent protocol directly over one connection"""
+
+    def __init__(self, port: int, name: str = "site", session: str = "s1"):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.file = self.sock.makefile('rb')
+        self.sock.sendall(encode({'hello': name, 'session': session}))
+
+    def send(self, seq: int, records: list) -> int:
+        """Send a batch and return the acknowledged sequence number"""
+        self.sock.sendall(encode({'seq': seq, 'records': records}))
+        return json.loads(self.file.readline())['ack']
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+@pytest.fixture
+def server():
+    collector = CollectorServer(0)
+    collector.start()
+    yield collector
+    collector.stop()
+
+
+def test_listens_on_localhost_by_default(server):
+    assert server.address == "127.0.0.1"
+
+
+def test_agent_batches_are_acknowledged(server):
+    """Records published by an agent arrive once and are acknowledged"""
+    agent = AgentShipper("127.0.0.1", server.port, name="site", batch_interval=0.05, retry_interval=0.1)
+    agent.start()
+    try:
+        for i in range(5):
+            agent.publish(result(f"192.0.2.{i}"), "host")
+        records = received(server, 5)
+        assert [record[0] for record in records] == [f"192.0.2.{i}" for i in range(5)]
+        assert wait_for(lambda: agent.acked == 5)
+        assert agent.backlog == 0
+    finally:
+        agent.stop(1)
+
+
+def test_unacknowledged_batches_are_replayed_after_reconnect():
+    """A batch the collector never acknowledged is sent again on the next connection"""
+    listener = socket.create_server(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    agent = AgentShipper("127.0.0.1", port, name="site", batch_interval=0.05, retry_interval=0.1)
+    agent.start()
+    collector = None
+    try:
+        agent.publish(result("192.0.2.1"))
+        # A collector that reads the batch and goes away without acknowledging it
+        conn, _ = listener.accept()
+        conn.settimeout(5)
+        data = b""
+        while data.count(b"\n") < 2:
+            data += conn.recv(65536)
+        conn.close()
+        listener.close()
+
+        collector = CollectorServer(port)
+        collector.start()
+        records = received(collector, 1)
+        assert [record[0] for record in records] == ["192.0.2.1"]
+        assert wait_for(lambda: agent.acked == 1)
+    finally:
+        agent.stop(1)
+        if collector is not None:
+            collector.stop()
+
+
+def test_replayed_batches_are_not_queued_twice(server):
+    """A batch resent on an overlapping connection of the same session is acknowledged but dropped"""
+    first = RawAgent(server.port)
+    second = RawAgent(server.port)
+    try:
+        assert first.send(1, [record("192.0.2.1")]) == 1
+        assert second.send(1, [record("192.0.2.1")]) == 1
+        assert second.send(2, [record("192.0.2.2")]) == 2
+        assert first.send(2, [record("192.0.2.2")]) == 2
+    finally:
+        first.close()
+        second.close()
+    assert [record[0] for record in received(server, 3, timeout=0.5)] == ["192.0.2.1", "192.0.2.2"]
+
+
+def test_malformed_records_are_dropped_one_at_a_time(server):
+    """Bad records are counted and dropped; good ones in the same batch still arrive"""
+    agent = RawAgent(server.port)
+    short = record("192.0.2.9")[:-2]
+    text_loss = record("192.0.2.9")
+    text_loss[4] = "lots"
+    try:
+        assert agent.send(1, [short, record("192.0.2.1"), text_loss, "junk"]) == 1
+        assert agent.send(2, [record("192.0.2.2")]) == 2
+    finally:
+        agent.close()
+    assert [record[0] for record in received(server, 2)] == ["192.0.2.1", "192.0.2.2"]
+    assert server.rejected == 3
+
+
+def test_malformed_batch_ends_only_that_connection(server):
+    """A message that is not a batch closes its connection; other agents carry on"""
+    bad = RawAgent(server.port, name="bad")
+    bad.sock.sendall(b'["not", "a", "batch"]\n')
+    assert bad.file.readline() == b""
+    bad.close()
+    good = RawAgent(server.port, name="good")
+    try:
+        assert good.send(1, [record("192.0.2.1")]) == 1
+    finally:
+        good.close()
+    assert len(received(server, 1)) == 1
+
+
+def test_record_error():
+    assert record_error(record("192.0.2.1")) is None
+    assert record_error(record("192.0.2.1")[:-1]) is not None
+    bad_status = record("192.0.2.1")
+    bad_status[2] = 7
+    assert record_error(bad_status) == "invalid status 7"
+    bad_rtts = record("192.0.2.1")
+    bad_rtts[6] = ["fast"]
+    assert record_error(bad_rtts) == "invalid rtts"
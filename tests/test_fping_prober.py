@@ -0,0 +1,123 @@
+"""Tests for the fping backend, run against bench/fake_fping.py"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fping_prober
+from fping_prober import FpingProber
+from probe_result import STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT
+
+FAKE_FPING = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fake_fping.py")
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="fake_fping.py is run through its shebang")
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """Count the processes the prober starts"""
+    calls = []
+    popen = subprocess.Popen
+
+    def counting_popen(*args, **kwargs):
+        calls.append(args[0])
+        return popen(*args, **kwargs)
+
+    monkeypatch.setattr(fping_prober.subprocess, "Popen", counting_popen)
+    for name in ("FAKE_PING_RTT", "FAKE_PING_LOSS", "FAKE_PING_DOWN", "FAKE_PING_SLEEP"):
+        monkeypatch.delenv(name, raising=False)
+    return calls
+
+
+def prober(**kwargs) -> FpingProber:
+    """Return an fping prober that runs the fake fping"""
+    return FpingProber(fping_path=FAKE_FPING, **dict({'count': 3, 'timeout': 1}, **kwargs))
+
+
+def test_all_replies(spawned, monkeypatch):
+    """Every host answers every packet"""
+    monkeypatch.setenv("FAKE_PING_RTT", "2.0")
+    hosts = ["192.0.2.1", "192.0.2.2", "192.0.2.3"]
+    results = {result.ip: result for result in prober().ping_many(hosts)}
+    assert sorted(results) == hosts
+    for result in results.values():
+        assert result.status == STATUS_OK
+        assert result.success
+        assert result.packet_loss == 0
+        assert result.sequences == [0, 1, 2]
+        assert len(result.rtts) == 3
+        assert result.response_time == pytest.approx(sum(result.rtts) / 3)
+        assert result.error is None
+    assert len(spawned) == 1
+
+
+def test_partial_loss(spawned, monkeypatch):
+    """Lost packets count towards loss and leave gaps in the sequence numbers"""
+    monkeypatch.setenv("FAKE_PING_LOSS", "0.5")
+    results = list(prober(count=10).ping_many(["192.0.2.1", "192.0.2.2"]))
+    assert len(results) == 2
+    for result in results:
+        received = len(result.rtts)
+        assert 0 < received < 10
+        assert len(result.sequences) == received
+        assert all(0 <= sequence < 10 for sequence in result.sequences)
+        assert result.packet_loss == pytest.approx((10 - received) * 10)
+        assert result.success
+    assert len(spawned) == 1
+
+
+def test_down_host_times_out(spawned, monkeypatch):
+    """A host that never replies fails with a timeout while the others succeed"""
+    monkeypatch.setenv("FAKE_PING_DOWN", "192.0.2.2")
+    results = {result.ip: result for result in prober().ping_many(["192.0.2.1", "192.0.2.2"])}
+    assert results["192.0.2.1"].success
+    down = results["192.0.2.2"]
+    assert not down.success
+    assert down.status == STATUS_TIMEOUT
+    assert down.packet_loss == 100
+    assert down.rtts == []
+    assert len(spawned) == 1
+
+
+def test_unknown_host_error_on_stderr(spawned):
+    """An fping error line for one target fails only that target"""
+    results = {result.ip: result for result in prober().ping_many(["192.0.2.1", "no-such-host"])}
+    assert results["192.0.2.1"].success
+    unknown = results["no-such-host"]
+    assert unknown.status == STATUS_ERROR
+    assert unknown.error == "Name or service not known"
+    assert len(spawned) == 1
+
+
+def test_one_process_per_batch(spawned):
+    """Each ping_many call starts exactly one fping process, whatever the batch size"""
+    fping = prober(count=1)
+    hosts = [f"198.51.100.{i}" for i in range(1, 201)]
+    assert len(list(fping.ping_many(hosts))) == 200
+    assert len(list(fping.ping_many(hosts[:5]))) == 5
+    assert len(spawned) == 2
+
+
+def test_watchdog_kills_hung_fping(spawned, tmp_path):
+    """fping running past its budget is killed and every host fails"""
+    hung = tmp_path / "hung_fping.py"
+    hung.write_text("#!/usr/bin/env python3\nimport time\ntime.sleep(60)\n")
+    hung.chmod(0o755)
+    fping = FpingProber(count=1, timeout=0.2, interval=0.1, fping_path=str(hung))
+    fping.watchdog_slack = 0.5
+    results = list(fping.ping_many(["192.0.2.1", "192.0.2.2"]))
+    assert [result.ip for result in results] == ["192.0.2.1", "192.0.2.2"]
+    for result in results:
+        assert not result.success
+        assert result.error == "fping timed out"
+        assert result.status == STATUS_TIMEOUT
+    assert len(spawned) == 1
+
+
+def test_missing_fping(spawned):
+    """A missing fping executable fails the batch without raising"""
+    results = list(FpingProber(fping_path="/nonexistent/fping").ping_many(["192.0.2.1"]))
+    assert len(results) == 1
+    assert results[0].error.startswith("Cannot run fping")
@@ -0,0 +1,42 @@
+"""Tests for the rolling per-host statistics"""
+
+import pytest
+
+from host_stats import HostStats
+
+
+def replies(stats: HostStats, rtt: float, count: int):
+    """Add count replies of the same RTT"""
+    for sequence in range(count):
+        stats.add_sample(rtt, sequence)
+
+
+def test_percentiles_follow_the_window():
+    """Percentiles forget replies older than the quantile window"""
+    stats = HostStats(quantile_window=200)
+    replies(stats, 1.0, 5000)
+    replies(stats, 50.0, 200)
+    snapshot = stats.snapshot()
+    assert snapshot['p50'] == pytest.approx(50.0)
+    assert snapshot['p99'] == pytest.approx(50.0)
+
+
+def test_percentiles_cover_at_least_half_a_window():
+    """Right after a restart the older sketches are reported"""
+    stats = HostStats(quantile_window=200)
+    replies(stats, 1.0, 150)
+    replies(stats, 50.0, 50)
+    # The reported sketches saw replies 101-200, half of them slow
+    snapshot = stats.snapshot()
+    assert snapshot['p99'] == pytest.approx(50.0)
+    assert snapshot['p50'] < 50.0
+
+
+def test_whole_session_percentiles():
+    """A quantile window of 0 keeps the session-wide estimate"""
+    stats = HostStats(quantile_window=0)
+    replies(stats, 1.0, 5000)
+    replies(stats, 50.0, 200)
+    snapshot = stats.snapshot()
+    assert snapshot['p50'] < 2.0
+    assert snapshot['p99'] == pytest.approx(50.0, abs=1.0)
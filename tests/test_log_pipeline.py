@@ -0,0 +1,64 @@
+"""Tests for log segment rotation"""
+
+import logging
+import os
+
+from log_pipeline import SegmentRotatingFileHandler
+
+
+def record(message: str) -> logging.LogRecord:
+    """Return an INFO record"""
+    return logging.LogRecord("pingtest", logging.INFO, __file__, 0, message, None, None)
+
+
+def test_prune_earlier_includes_earlier_runs(tmp_path):
+    """With prune_earlier, segments left by earlier runs count towards backup_count, oldest deleted first"""
+    earlier = ["ping_20250101_000000.log.gz", "ping_20250102_000000.log", "ping_20250102_000000_1.log.gz",
+               "ping_20250103_000000.log.gz"]
+    for name in earlier + ["other_20250101_000000.log", "ping.log", "ping_notes.log"]:
+        (tmp_path / name).write_text("old\n")
+
+    handler = SegmentRotatingFileHandler(str(tmp_path / "ping.log"), backup_count=2, prune_earlier=True)
+    try:
+        remaining = set(os.listdir(tmp_path))
+        assert "ping_20250101_000000.log.gz" not in remaining
+        assert "ping_20250102_000000.log" not in remaining
+        assert {"ping_20250102_000000_1.log.gz", "ping_20250103_000000.log.gz"} <= remaining
+        assert {"other_20250101_000000.log", "ping.log", "ping_notes.log"} <= remaining
+
+        handler.emit(record("first"))
+        handler.rotate()
+        remaining = set(os.listdir(tmp_path))
+        assert "ping_20250102_000000_1.log.gz" not in remaining
+        assert "ping_20250103_000000.log.gz" in remaining
+        assert os.path.basename(handler.closed_segments[-1]) in remaining
+        assert len(handler.closed_segments) == 2
+    finally:
+        handler.close()
+
+
+def test_earlier_logs_survive_by_default(tmp_path):
+    """By default only segments closed by this handler are pruned"""
+    earlier = [f"ping_202501{day:02d}_000000.log.gz" for day in range(1, 6)]
+    for name in earlier:
+        (tmp_path / name).write_text("old\n")
+
+    handler = SegmentRotatingFileHandler(str(tmp_path / "ping.log"), backup_count=2)
+    try:
+        for message in ("first", "second", "third", "fourth"):
+            handler.emit(record(message))
+            handler.rotate()
+        remaining = set(os.listdir(tmp_path))
+        assert set(earlier) <= remaining
+        assert len(handler.closed_segments) == 2
+        assert len(remaining) == len(earlier) + 3  # two kept segments and the open one
+    finally:
+        handler.close()
+
+
+def test_backup_count_zero_keeps_everything(tmp_path):
+    """With backup_count 0 no earlier segment is deleted, even with prune_earlier"""
+    (tmp_path / "ping_20250101_000000.log").write_text("old\n")
+    handler = SegmentRotatingFileHandler(str(tmp_path / "ping.log"), prune_earlier=True)
+    handler.close()
+    assert (tmp_path / "ping_20250101_000000.log").exists()
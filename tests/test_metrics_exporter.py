@@ -0,0 +1,25 @@
+"""Tests for the Prometheus metrics rendering"""
+
+from host_stats import HostStats
+from metrics_exporter import MetricsExporter
+
+
+def snapshot() -> dict:
+    """Return the snapshot of a host with one reply"""
+    stats = HostStats()
+    stats.update(True, 2.0, 0.0, [2.0], [0])
+    return stats.snapshot()
+
+
+def test_label_cache_follows_the_targets():
+    """Hosts that are removed or renamed leave the label cache at the next update"""
+    exporter = MetricsExporter(0)
+    exporter.update([("192.0.2.1", snapshot()), ("192.0.2.2", snapshot())], {"192.0.2.1": "router"})
+    assert set(exporter._labels) == {("192.0.2.1", "router"), ("192.0.2.2", "")}
+
+    exporter.update([("192.0.2.1", snapshot())], {"192.0.2.1": "gateway"})
+    assert set(exporter._labels) == {("192.0.2.1", "gateway")}
+    body = exporter.body.decode()
+    assert 'pingtest_up{ip="192.0.2.1",name="gateway"} 1' in body
+    assert "192.0.2.2" not in body
+    assert 'name="router"' not in body
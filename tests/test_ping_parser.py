@@ -0,0 +1,79 @@
+"""Tests for the ping output parsers"""
+
+from ping_parser import parse_unix, parse_windows
+
+WINDOWS_OUTPUT = """
+Pinging 192.0.2.1 with 32 bytes of data:
+Reply from 192.0.2.1: bytes=32 time=12ms TTL=117
+Request timed out.
+Reply from 192.0.2.254: Destination host unreachable.
+Reply from 192.0.2.1: bytes=32 time<1ms TTL=117
+General failure.
+Reply from 192.0.2.1: bytes=32 time=14ms TTL=117
+
+Ping statistics for 192.0.2.1:
+    Packets: Sent = 6, Received = 4, Lost = 2 (33% loss),
+Approximate round trip times in milli-seconds:
+    Minimum = 0ms, Maximum = 14ms, Average = 8ms
+"""
+
+UNIX_OUTPUT = """PING 192.0.2.1 (192.0.2.1) 56(84) bytes of data.
+64 bytes from 192.0.2.1: icmp_seq=1 ttl=64 time=1.10 ms
+64 bytes from 192.0.2.1: icmp_seq=3 ttl=64 time=1.30 ms
+
+--- 192.0.2.1 ping statistics ---
+3 packets transmitted, 2 received, 33.3333% packet loss, time 2003ms
+rtt min/avg/max/mdev = 1.100/1.200/1.300/0.100 ms
+"""
+
+
+def test_windows_sequences_count_failed_requests():
+    """Timeouts and errors take up a sequence number, so gaps show where replies were lost"""
+    stats = parse_windows(WINDOWS_OUTPUT)
+    assert stats['sequences'] == [0, 3, 5]
+    assert stats['rtts'] == [12.0, 0.5, 14.0]
+    assert stats['transmitted'] == 6
+    assert stats['received'] == 4
+    assert stats['rtt_avg'] == (12.0 + 0.5 + 14.0) / 3
+    assert stats['rtt_min'] == 0.5
+
+
+def test_windows_sub_millisecond_replies():
+    """Replies faster than 1 ms are recorded below 1 ms, not as 1 ms"""
+    output = ("Pinging 192.0.2.1 with 32 bytes of data:\n"
+              "Reply from 192.0.2.1: bytes=32 time<1ms TTL=128\n"
+              "Reply from 192.0.2.1: bytes=32 time<1ms TTL=128\n"
+              "Reply from 192.0.2.1: bytes=32 time=1ms TTL=128\n")
+    stats = parse_windows(output)
+    assert stats['rtts'] == [0.5, 0.5, 1.0]
+    assert stats['rtt_min'] == 0.5
+    assert stats['rtt_avg'] == 2 / 3
+
+
+def test_windows_summary_without_reply_lines():
+    """The summary line still gives the response time when the reply lines are missing"""
+    stats = parse_windows(WINDOWS_OUTPUT.split("Ping statistics")[1])
+    assert stats['rtts'] == []
+    assert stats['rtt_avg'] == 8.0
+    assert stats['rtt_min'] == 0.0
+
+
+def test_windows_crlf_output():
+    """Output read with Windows line endings parses the same"""
+    stats = parse_windows(WINDOWS_OUTPUT.replace("\n", "\r\n"))
+    assert stats['sequences'] == [0, 3, 5]
+
+
+def test_windows_unknown_host():
+    """Output without any echo lines has no replies"""
+    stats = parse_windows("Ping request could not find host nosuchhost. Please check the name and try again.\n")
+    assert stats['rtts'] == []
+    assert stats['sequences'] == []
+
+
+def test_unix_sequences():
+    """Unix ping prints its own sequence numbers"""
+    stats = parse_unix(UNIX_OUTPUT)
+    assert stats['sequences'] == [1, 3]
+    assert stats['rtts'] == [1.1, 1.3]
+    assert stats['packet_loss'] == (1 / 3) * 100
@@ -0,0 +1,73 @@
+"""Tests for the profile capture wrappers"""
+
+import threading
+
+from profiler import ProfileCapture
+
+
+def busy(n: int) -> int:
+    return sum(range(n))
+
+
+def profiled_functions(capture: ProfileCapture) -> set:
+    """Return the names of the functions the thread profiles saw"""
+    names = set()
+    for profile in capture._thread_profiles:
+        profile.create_stats()
+        names.update(function for _file, _line, function in profile.stats)
+    return names
+
+
+def run_on_thread(function, *args):
+    thread = threading.Thread(target=function, args=args)
+    thread.start()
+    thread.join()
+
+
+def test_wrap_batch_profiles_each_step_on_the_worker_thread(tmp_path):
+    capture = ProfileCapture(1, str(tmp_path / "profile.prof"))
+    capture.start()
+
+    def batch(ips):
+        for ip in ips:
+            yield busy(1000)
+
+    results = []
+    run_on_thread(lambda: results.extend(capture.wrap_batch(batch)(["a", "b"])))
+    capture.stop()
+    assert results == [busy(1000)] * 2
+    assert "busy" in profiled_functions(capture)
+
+
+def test_wrap_submit_profiles_callbacks_on_the_reactor_thread(tmp_path):
+    capture = ProfileCapture(1, str(tmp_path / "profile.prof"))
+    capture.start()
+    done = threading.Event()
+    results = []
+
+    def submit(ip, callback):
+        # Results arrive on another thread, like a reactor's
+        threading.Thread(target=callback, args=(ip,)).start()
+
+    def on_result(result):
+        results.append((result, busy(1000)))
+        done.set()
+
+    capture.wrap_submit(submit)("192.0.2.1", on_result)
+    assert done.wait(5)
+    capture.stop()
+    assert results == [("192.0.2.1", busy(1000))]
+    assert "busy" in profiled_functions(capture)
+
+
+def test_nested_calls_keep_the_profile_on(tmp_path):
+    capture = ProfileCapture(1, str(tmp_path / "profile.prof"))
+    capture.start()
+
+    def submit(ip, callback):
+        callback(ip)  # a prober may fail a probe synchronously
+        busy(1000)
+
+    run_on_thread(capture.wrap_submit(submit), "192.0.2.1", lambda result: None)
+    capture.stop()
+    assert "busy" in profiled_functions(capture)
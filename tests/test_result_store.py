@@ -0,0 +1,58 @@
+"""Tests for the result store format versioning"""
+
+import json
+
+import pytest
+
+from probe_result import STATUS_OK, ProbeResult
+from result_store import FORMAT_VERSION, METADATA, RECORD, SAMPLE, ResultReader, ResultStore
+
+
+def write_metadata(directory, metadata: dict):
+    """Write store.json as some other version would have"""
+    (directory / METADATA).write_text(json.dumps(metadata))
+
+
+def test_new_store_records_current_format(tmp_path):
+    """A new store writes the current format and both record layouts"""
+    ResultStore(str(tmp_path)).close()
+    metadata = json.loads((tmp_path / METADATA).read_text())
+    assert metadata == {"format": FORMAT_VERSION, "record": RECORD.format, "sample": SAMPLE.format}
+    assert ResultReader(str(tmp_path)).format == FORMAT_VERSION
+
+
+def test_version_1_store_is_upgraded(tmp_path):
+    """Opening a version 1 store rewrites its metadata, keeping its records and other keys"""
+    (tmp_path / "hosts.txt").write_text("10.0.0.1\n")
+    (tmp_path / "segment_00000000000000001000.bin").write_bytes(RECORD.pack(1000, 0, 2.5, 0.0, STATUS_OK))
+    write_metadata(tmp_path, {"format": 1, "record": RECORD.format, "note": "kept"})
+    assert list(ResultReader(str(tmp_path)).samples()) == []
+
+    store = ResultStore(str(tmp_path))
+    store.append(ProbeResult("10.0.0.1", timestamp_ns=2000, status=STATUS_OK, response_time=3.0,
+                             packet_loss=0.0, rtts=[3.0], sequences=[1]))
+    store.close()
+
+    metadata = json.loads((tmp_path / METADATA).read_text())
+    assert metadata["format"] == FORMAT_VERSION
+    assert metadata["sample"] == SAMPLE.format
+    assert metadata["note"] == "kept"
+    reader = ResultReader(str(tmp_path))
+    assert [record[0] for record in reader.records()] == [1000, 2000]
+    assert list(reader.samples()) == [(2000, "10.0.0.1", 1, 3.0)]
+
+
+@pytest.mark.parametrize("metadata", [
+    {"format": FORMAT_VERSION + 1, "record": RECORD.format, "sample": SAMPLE.format},
+    {"format": FORMAT_VERSION, "record": "<qIdfB3x", "sample": SAMPLE.format},
+    {"format": FORMAT_VERSION, "record": RECORD.format, "sample": "<qIId"},
+    {"record": RECORD.format},
+])
+def test_unknown_format_is_rejected(tmp_path, metadata):
+    """Stores from newer versions or with other layouts are neither read nor appended to"""
+    write_metadata(tmp_path, metadata)
+    with pytest.raises(ValueError):
+        ResultReader(str(tmp_path))
+    with pytest.raises(ValueError):
+        ResultStore(str(tmp_path))
+    assert json.loads((tmp_path / METADATA).read_text()) == metadata
@@ -0,0 +1,149 @@
+"""Tests for the TCP/UDP/HTTP service prober against local servers"""
+
+import socket
+import struct
+import threading
+
+import pytest
+
+from service_prober import HTTP, ServiceProber, ServiceTarget
+
+RESPONSE = b"HTTP/1.1 204 No Content\r\nConnection: keep-alive\r\n\r\n"
+
+
+class OneRequestServer:
+    """HTTP server that answers one request per connection, then drops the connection"""
+
+    def __init__(self, reset: bool):
+        self.reset = reset  # drop with an RST instead of a FIN
+        self.connections = 0
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            self.connections += 1
+            with conn:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+                conn.sendall(RESPONSE)
+                if self.reset:
+                    conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+
+    def close(self):
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR)  # wakes the accept() and stops listening
+        except OSError:
+            pass
+        self.listener.close()
+        self.thread.join(2)
+
+
+@pytest.mark.parametrize("reset", [False, True], ids=["closed", "reset"])
+def test_stale_keep_alive_connection_is_retried(reset):
+    """A kept-alive connection the server dropped while idle is replaced without failing the request"""
+    server = OneRequestServer(reset)
+    prober = ServiceProber(count=1, timeout=2)
+    target = ServiceTarget(HTTP, server.port)
+    try:
+        for _ in range(3):
+            result = prober.ping("127.0.0.1", target)
+            assert result.success, result.error
+            assert result.packet_loss == 0
+    finally:
+        prober.close()
+        server.close()
+    assert server.connections == 3
+
+
+def test_refused_reconnect_fails_the_request():
+    """When the retry cannot connect either, the request fails with the connect error"""
+    server = OneRequestServer(reset=True)
+    prober = ServiceProber(count=1, timeout=2)
+    target = ServiceTarget(HTTP, server.port)
+    try:
+        assert prober.ping("127.0.0.1", target).success
+        server.close()
+        result = prober.ping("127.0.0.1", target)
+    finally:
+        prober.close()
+    assert not result.success
+    assert result.error
+
+
+class KeepAliveServer:
+    """HTTP server that answers requests on one connection until the client closes it"""
+
+    def __init__(self):
+        self.connections = 0
+        self.closed = threading.Event()  # set when the client closed its connection
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        try:
+            conn, _ = self.listener.accept()
+        except OSError:
+            return
+        self.connections += 1
+        with conn:
+            data = b""
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    self.closed.set()
+                    return
+                data += chunk
+                while b"\r\n\r\n" in data:
+                    _request, data = data.split(b"\r\n\r\n", 1)
+                    conn.sendall(RESPONSE)
+
+    def close(self):
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.listener.close()
+
+
+def test_forget_closes_kept_alive_connection():
+    """Connections to a host are reused between probes until the host is forgotten"""
+    server = KeepAliveServer()
+    prober = ServiceProber(count=2, timeout=2)
+    target = ServiceTarget(HTTP, server.port)
+    try:
+        assert prober.ping("127.0.0.1", target).success
+        assert prober.ping("127.0.0.1", target).success
+        assert server.connections == 1
+        assert not server.closed.wait(0.2)
+        prober.forget("127.0.0.2")
+        assert not server.closed.wait(0.2)
+        prober.forget("127.0.0.1")
+        assert server.closed.wait(2)
+    finally:
+        prober.close()
+        server.close()
+
+
+def test_idle_connection_expires():
+    """A kept-alive connection unused for idle_timeout seconds is closed"""
+    server = KeepAliveServer()
+    prober = ServiceProber(count=1, timeout=2, idle_timeout=0.2)
+    try:
+        assert prober.ping("127.0.0.1", ServiceTarget(HTTP, server.port)).success
+        assert server.closed.wait(2)
+    finally:
+        prober.close()
+        server.close()
@@ -0,0 +1,42 @@
+"""Tests for the per-host statistics engine"""
+
+from host_stats import StatsEngine
+from probe_result import STATUS_OK, ProbeResult
+
+
+def reply(host: str, rtt: float, address: str = None) -> ProbeResult:
+    """Return a successful one-packet result"""
+    return ProbeResult(host, status=STATUS_OK, response_time=rtt, packet_loss=0.0, rtts=[rtt], sequences=[0],
+                       address=address)
+
+
+def test_address_change_keeps_history():
+    """A host name that resolves to a new address starts fresh stats without losing the old ones"""
+    engine = StatsEngine()
+    for _ in range(3):
+        engine.update(reply("example.test", 5.0, "192.0.2.1"))
+    engine.update(reply("example.test", 40.0, "192.0.2.2"))
+
+    current = engine.get("example.test")
+    assert current.probes == 1
+    assert current.last_rtt == 40.0
+    earlier = list(engine.earlier_snapshots())
+    assert [(host, address) for host, address, _ in earlier] == [("example.test", "192.0.2.1")]
+    assert earlier[0][2]['probes'] == 3
+
+    # Back on the first address, its history continues
+    engine.update(reply("example.test", 6.0, "192.0.2.1"))
+    assert engine.get("example.test").probes == 4
+    assert [snapshot['probes'] for _, _, snapshot in engine.earlier_snapshots()] == [1]
+
+
+def test_remove_drops_every_address():
+    """Removing a host name forgets the stats of all its addresses"""
+    engine = StatsEngine()
+    engine.update(reply("example.test", 5.0, "192.0.2.1"))
+    engine.update(reply("example.test", 5.0, "192.0.2.2"))
+    engine.update(reply("192.0.2.9", 1.0))
+    engine.remove("example.test")
+    assert engine.get("example.test") is None
+    assert list(engine.earlier_snapshots()) == []
+    assert [ip for ip, _ in engine.snapshots()] == ["192.0.2.9"]
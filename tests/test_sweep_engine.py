@@ -0,0 +1,53 @@
+"""Tests for the sweep engine and discovery"""
+
+import itertools
+import json
+import os
+import sys
+
+import pytest
+
+from pingtest import PingTest, SweepEngine
+from probe_result import STATUS_OK, ProbeResult
+
+FAKE_FPING = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fake_fping.py")
+
+
+def test_batch_sweep_consumes_addresses_lazily():
+    """Batch probers get chunks of at most max_in_flight hosts, generated as they are needed"""
+    chunks = []
+    generated = []
+
+    def batch(ips):
+        chunks.append(len(ips))
+        for ip in ips:
+            yield ProbeResult(ip, status=STATUS_OK, response_time=1.0, packet_loss=0.0)
+
+    def addresses():
+        for i in itertools.count():
+            if i == 1000:
+                return
+            generated.append(i)
+            yield f"10.0.{i // 256}.{i % 256}"
+
+    engine = SweepEngine(None, max_in_flight=64, batch=batch)
+    try:
+        sweep = engine.sweep(addresses())
+        next(sweep)
+        assert len(generated) == 64
+        assert len(list(sweep)) == 999
+    finally:
+        engine.shutdown()
+    assert chunks == [64] * 15 + [40]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake_fping.py is run through its shebang")
+def test_discovery_resolves_host_names_it_sweeps(tmp_path, monkeypatch):
+    """Host names given to discovery are resolved even when they are not configured targets"""
+    monkeypatch.chdir(tmp_path)
+    config = {"ip_addresses": {}, "backend": "fping", "fping_path": FAKE_FPING, "timeout": 1,
+              "log_file": str(tmp_path / "pingtest.log")}
+    (tmp_path / "config.json").write_text(json.dumps(config))
+    pingtest = PingTest(str(tmp_path / "config.json"))
+    found = pingtest.run_discovery(["localhost", "127.0.0.2"])
+    assert found == {"localhost": "", "127.0.0.2": ""}
@@ -0,0 +1,49 @@
+"""Tests for target parsing and lazy block expansion"""
+
+import pytest
+
+from targets import TargetSet, is_valid_target, subtract_spans, target_error
+
+
+@pytest.mark.parametrize("spec", ["192.168.1.20-10", "192.168.1.300", "10.0.0.0/33", "192.168.1.1-foo",
+                                  "fe80::1-10.0.0.1", "1.2.3"])
+def test_malformed_addresses_are_not_host_names(spec):
+    """Specs written as addresses, blocks or ranges are never accepted as host names"""
+    assert not is_valid_target(spec)
+    targets = TargetSet({spec: "x"})
+    assert not targets
+    assert [invalid for invalid, _error in targets.invalid] == [spec]
+
+
+def test_range_error_is_passed_on():
+    assert target_error("192.168.1.20-10") == "Range 192.168.1.20-10 ends before it starts"
+
+
+@pytest.mark.parametrize("spec", ["example.com", "host-1", "10-20.example.net", "192.168.1.1", "10.0.0.0/30",
+                                  "192.168.1.10-20"])
+def test_valid_targets(spec):
+    assert target_error(spec) is None
+
+
+def test_overlapping_targets_are_probed_once():
+    """An address covered by a single entry and by blocks is yielded once and counted once"""
+    targets = TargetSet({'127.0.0.0/30': 'blk', '127.0.0.1': 'lo', '127.0.0.1-127.0.0.5': 'range'})
+    addresses = list(targets)
+    assert addresses == ['127.0.0.1', '127.0.0.2', '127.0.0.3', '127.0.0.4', '127.0.0.5']
+    assert len(targets) == len(addresses)
+    assert targets.get('127.0.0.1') == 'lo'
+    assert targets.get('127.0.0.2') == 'blk'
+    assert targets.get('127.0.0.4') == 'range'
+
+
+def test_add_inside_a_block_keeps_the_count():
+    targets = TargetSet({'10.0.0.0/29': 'blk'})
+    targets.add('10.0.0.3', 'three')
+    targets.add('10.0.0.3', 'renamed')
+    targets.add('site/10.0.0.3', 'remote')
+    assert len(targets) == len(list(targets)) == 7
+
+
+def test_subtract_spans():
+    assert subtract_spans(1, 10, [(3, 4), (8, 20)]) == [(1, 2), (5, 7)]
+    assert subtract_spans(1, 10, [(0, 11)]) == []